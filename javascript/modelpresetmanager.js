@@ -23,3 +23,28 @@ function go_to_tab(tabname = "Model Preset Manager", tabsId = "tabs") {
 		}
 	});
 }
+
+let model_preset_manager_retrieved_checkpoint = null;
+let model_preset_manager_retrieved_once = false;
+
+// Fill the tab from the prefetch cache or the saved presets file when it is opened, but only when the checkpoint changed so
+// unsaved edits survive tab switches. This never hashes or downloads; that stays on the Retrieve and Download buttons
+onUiTabChange(function() {
+	const tab = get_uiCurrentTabContent();
+	if (!tab || tab.id !== "tab_model preset manager") {
+		return;
+	}
+
+	const checkpoint_input = gradioApp().querySelector("#setting_sd_model_checkpoint input");
+	const checkpoint = checkpoint_input ? checkpoint_input.value : null;
+	if (model_preset_manager_retrieved_once && checkpoint === model_preset_manager_retrieved_checkpoint) {
+		return;
+	}
+	model_preset_manager_retrieved_checkpoint = checkpoint;
+	model_preset_manager_retrieved_once = true;
+
+	const auto_retrieve_button = gradioApp().getElementById("auto_retrieve_model_info_button");
+	if (auto_retrieve_button) {
+		auto_retrieve_button.click();
+	}
+});
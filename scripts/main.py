@@ -1,26 +1,147 @@
-import base64
+import time
+module_import_start_time = time.perf_counter()
+
+import atexit
+import codecs
+import collections
+import concurrent.futures
+import contextlib
+import copy
+import functools
+import gzip
 import gradio as gr
 import hashlib
+import inspect
+import html
 import json
-import numpy as np
 import os
 import re
-import requests  # Replace urllib.request with requests
-import subprocess
-import time
+import threading
+import types
 
-from io import BytesIO
 from modules import generation_parameters_copypaste as parameters_copypaste
 from modules import script_callbacks
+from modules import sd_models
 from modules import shared
-from PIL import Image
-from pathlib import Path
-from typing import Any
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
 
 CIVITAI_MODEL_INFO_BY_HASH_URL = 'https://civitai.com/api/v1/model-versions/by-hash/'
 CIVITAI_MODEL_PAGE_BY_ID_URL = 'https://civitai.com/models/'
 CIVITAI_MODEL_DESCRIPTION_TAG = 'mantine-TypographyStylesProvider-root mantine-dfvxn9'
 CIVITAI_MODEL_DESCRIPTION_PRESET_PREFIX = '###ModelPresets###'
+HASH_CACHE_FILE_NAME = 'model hashes.json'
+SQLITE_DATABASE_FILE_NAME = 'model presets.sqlite3'
+MODEL_INFO_KEYS = ("url", "default_preset", "trigger_words", "presets")
+SEARCH_TOKEN_PATTERN = re.compile(r'[\w+\-.]+')
+SEARCH_FIELD_QUERY_PATTERN = re.compile(r'(\w+):(?:"([^"]*)"|(\S+))')
+GENERATION_PARAMETER_PATTERN = re.compile(r'\s*([\w ]+):\s*("(?:\\.|[^\\"])+"|[^,]*)(?:,|$)')
+SEARCH_FIELDS = {"Steps": "steps", "Sampler": "sampler", "CFG scale": "cfg", "Size": "size"}
+HASH_BUFFER_SIZE = 8 * 1024 * 1024
+HASH_PROGRESS_INTERVAL = 0.5
+CHECKPOINT_DIRECTORY = os.path.join("models", "Stable-diffusion")
+CHECKPOINT_EXTENSIONS = ('.safetensors', '.ckpt')
+CIVITAI_REQUEST_TIMEOUT = 30
+CIVITAI_MAX_RETRIES = 3
+CIVITAI_RETRY_BACKOFF = 1
+INDEX_CHECKPOINTS_WORKERS = 8
+CIVITAI_RESPONSE_CACHE_DIRECTORY_NAME = 'civitai cache'
+CIVITAI_RESPONSE_CACHE_TTL = 60 * 60
+CIVITAI_RESPONSE_CACHE_MAX_AGE = 30 * 24 * 60 * 60
+CIVITAI_STREAM_CHUNK_SIZE = 64 * 1024
+BRACE_PATTERN = re.compile(r'[{}]')
+THUMBNAIL_SIZE = (300, 300)
+THUMBNAIL_WORKERS = 2
+THUMBNAIL_MANIFEST_FILE_NAME = 'thumbnails.json'
+INDEX_CHECKPOINTS_HASH_WORKERS = 2
+MODEL_INFO_WRITE_DEBOUNCE = 0.25
+PRESETS_LOCK_FILE_NAME = '.lock'
+PRESETS_LOCK_RETRY_INTERVAL = 0.05
+DOWNLOAD_MODEL_INFO_TIMEOUT = 60
+DOWNLOAD_WORKERS = 4
+MODEL_REGISTRY_POLL_INTERVAL = 10
+IMPORT_TIME_BUDGET_MS = 50
+UI_BUILD_TIME_BUDGET_MS = 250
+PREFETCH_CACHE_SIZE = 8
+DIAGNOSTICS_SAMPLES_PER_NAME = 1000
+MAINTENANCE_JOURNAL_FILE_NAME = '.maintenance journal'
+GALLERY_CACHE_DIRECTORY_NAME = 'gallery cache'
+LIBRARY_EXPORT_DIRECTORY_NAME = 'library exports'
+GALLERY_THUMBNAIL_SIZE = (128, 128)
+GALLERY_THUMBNAIL_QUALITY = 80
+GALLERY_PAGE_SIZE = 48
+BATCH_PRESET_LABEL_PATTERN = re.compile(r'^(.*?) \[(\w+)\] / (.*)$')
+BATCH_PRESET_CHOICE_LIMIT = 500
+
+class Diagnostics:
+    # Per-function latency samples and I/O counters; every hook returns immediately while disabled
+    def __init__(self):
+        self.enabled = False
+        self.timings = {}
+        self.counters = {"bytes_hashed": 0, "bytes_read": 0, "bytes_written": 0, "http_calls": 0}
+        self.lock = threading.Lock()
+
+    def record(self, name, elapsed_time):
+        with self.lock:
+            count, samples = self.timings.get(name, (0, None))
+            if samples is None:
+                samples = collections.deque(maxlen=DIAGNOSTICS_SAMPLES_PER_NAME)
+            samples.append(elapsed_time)
+            self.timings[name] = (count + 1, samples)
+
+    def add(self, counter, amount = 1):
+        if self.enabled:
+            with self.lock:
+                self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def reset(self):
+        with self.lock:
+            self.timings = {}
+            self.counters = {counter: 0 for counter in self.counters}
+
+    def snapshot(self):
+        with self.lock:
+            timings = {name: (count, sorted(samples)) for name, (count, samples) in self.timings.items()}
+            counters = dict(self.counters)
+
+        def percentile(samples, fraction):
+            return round(samples[min(len(samples) - 1, int(len(samples) * fraction))] * 1000, 2)
+
+        return {
+            "enabled": self.enabled,
+            "timings_ms": {name: {"count": count, "p50": percentile(samples, 0.5), "p95": percentile(samples, 0.95), "max": round(samples[-1] * 1000, 2)} for name, (count, samples) in sorted(timings.items())},
+            "counters": counters
+        }
+
+def instrumented(function):
+    # Times the wrapped handler or I/O helper; generator handlers are timed until they finish streaming
+    name = function.__name__
+
+    if inspect.isgeneratorfunction(function):
+        @functools.wraps(function)
+        def generator_wrapper(*args, **kwargs):
+            if not diagnostics.enabled:
+                return (yield from function(*args, **kwargs))
+            start_time = time.perf_counter()
+            try:
+                return (yield from function(*args, **kwargs))
+            finally:
+                diagnostics.record(name, time.perf_counter() - start_time)
+        return generator_wrapper
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if not diagnostics.enabled:
+            return function(*args, **kwargs)
+        start_time = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            diagnostics.record(name, time.perf_counter() - start_time)
+    return wrapper
 
 def get_model_info_file_path(model_hash):
     current_directory = os.path.dirname(__file__)
@@ -34,69 +155,1399 @@ def empty_model_info():
                 "presets": {"default": ""}
             }
 
+def write_file_atomically(file_path, data, fsync = False):
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    temp_file_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_file_path, "wb") as file:
+            file.write(data)
+            diagnostics.add("bytes_written", len(data))
+            if fsync:
+                file.flush()
+                os.fsync(file.fileno())
+        os.replace(temp_file_path, file_path)
+    finally:
+        if os.path.exists(temp_file_path):
+            os.remove(temp_file_path)
+
+def lock_windows_file(lock_file):
+    # LK_LOCK raises OSError after ten one-second attempts; poll LK_NBLCK instead so a save waits out any holder
+    lock_file.seek(0)
+    while True:
+        try:
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+            return
+        except OSError:
+            time.sleep(PRESETS_LOCK_RETRY_INTERVAL)
+
+@contextlib.contextmanager
+def presets_directory_lock():
+    # Advisory lock shared by every WebUI instance using this extensions folder
+    lock_file_path = os.path.join(os.path.dirname(get_model_info_file_path("")), PRESETS_LOCK_FILE_NAME)
+    os.makedirs(os.path.dirname(lock_file_path), exist_ok=True)
+    with open(lock_file_path, "a+b") as lock_file:
+        if os.name == "nt":
+            lock_windows_file(lock_file)
+        else:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == "nt":
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+def use_compact_json():
+    return shared.opts.data.get("model_preset_manager_compact_json", False)
+
+def dump_model_info(model_info):
+    if use_compact_json():
+        return json.dumps(model_info, separators=(",", ":"))
+    return json.dumps(model_info, indent=4)
+
+def write_model_info_file(model_info_file_path, model_info, overwrite = True):
+    with presets_directory_lock():
+        if overwrite or not os.path.exists(model_info_file_path):
+            write_file_atomically(model_info_file_path, dump_model_info(model_info).encode("utf-8"), fsync=True)
+
+def get_maintenance_journal_path():
+    return os.path.join(os.path.dirname(get_model_info_file_path("")), MAINTENANCE_JOURNAL_FILE_NAME)
+
+def append_to_maintenance_journal(short_hashes):
+    # Caller holds presets_directory_lock; one hash per line, read back and truncated by the maintenance job
+    if short_hashes:
+        with open(get_maintenance_journal_path(), "a") as file:
+            file.write("".join(f"{short_hash}\n" for short_hash in short_hashes))
+
+def take_maintenance_journal():
+    with presets_directory_lock():
+        try:
+            with open(get_maintenance_journal_path(), "r") as file:
+                short_hashes = sorted({line.strip() for line in file if line.strip()})
+        except FileNotFoundError:
+            return []
+        os.remove(get_maintenance_journal_path())
+    return short_hashes
+
 def initialize_model_info_file(model_hash):
     model_info_file_path = get_model_info_file_path(model_hash)
     
-    os.makedirs(os.path.dirname(model_info_file_path), exist_ok=True)
-    
     if not os.path.exists(model_info_file_path):
-        with open(model_info_file_path, "w") as file:
-            empty_model_info_file = empty_model_info()
-
-            json.dump(empty_model_info_file, file, indent=4)
+        write_model_info_file(model_info_file_path, empty_model_info(), overwrite=False)
     return model_info_file_path
 
-def get_model_hash_and_info_from_model_filename(model_filename, initializeIfMissing = True):    
-    short_hash = get_short_hash_from_filename(model_filename)
-    if initializeIfMissing:
-        model_info_file_path = initialize_model_info_file(short_hash)
-    else:
+class ModelInfoStore:
+    # Parsed model_info dicts keyed by short hash, reused while the file's mtime and size are unchanged.
+    # Saves are held for MODEL_INFO_WRITE_DEBOUNCE seconds so a burst of clicks becomes one atomic write
+    def __init__(self):
+        self.entries = {}
+        self.pending = {}
+        self.bases = {}
+        self.flush_timer = None
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.counters = {"disk_reads": 0, "cache_hits": 0, "disk_writes": 0, "coalesced_writes": 0}
+
+    def get(self, short_hash, initializeIfMissing = True):
+        with self.lock:
+            if short_hash in self.pending:
+                self.counters["cache_hits"] += 1
+                return copy.deepcopy(self.pending[short_hash])
+
         model_info_file_path = get_model_info_file_path(short_hash)
-    
-    try:
+        try:
+            stat = os.stat(model_info_file_path)
+        except FileNotFoundError:
+            # Reads never create files; the presets file is written by the first save
+            return empty_model_info() if initializeIfMissing else None
+        file_signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self.lock:
+            entry = self.entries.get(short_hash)
+            if entry and entry[0] == file_signature:
+                self.counters["cache_hits"] += 1
+                return copy.deepcopy(entry[1])
+
         with open(model_info_file_path, "r") as file:
-            return short_hash, json.load(file)
-    except FileNotFoundError:
+            model_info = json.load(file)
+
+        diagnostics.add("bytes_read", stat.st_size)
+        with self.lock:
+            self.counters["disk_reads"] += 1
+            self.entries[short_hash] = (file_signature, model_info)
+        return copy.deepcopy(model_info)
+
+    def save(self, short_hash, model_info):
+        with self.lock:
+            if short_hash in self.pending:
+                self.counters["coalesced_writes"] += 1
+            else:
+                # What was on disk when this edit started, so flush can tell our changes from another process's
+                entry = self.entries.get(short_hash)
+                self.bases[short_hash] = entry[1] if entry else None
+            self.pending[short_hash] = copy.deepcopy(model_info)
+            if MODEL_INFO_WRITE_DEBOUNCE > 0 and self.flush_timer is None:
+                self.flush_timer = threading.Timer(MODEL_INFO_WRITE_DEBOUNCE, self.flush)
+                self.flush_timer.daemon = True
+                self.flush_timer.start()
+        if MODEL_INFO_WRITE_DEBOUNCE <= 0:
+            self.flush()
+
+    def flush(self):
+        with self.flush_lock:
+            with self.lock:
+                self.flush_timer = None
+                pending = dict(self.pending)
+                bases = {short_hash: self.bases.get(short_hash) for short_hash in pending}
+            if not pending:
+                return
+
+            # Another WebUI instance may have saved the same model since we read it; the file is re-read
+            # under the lock and our changes are merged onto it instead of overwriting theirs
+            with presets_directory_lock():
+                for short_hash, model_info in pending.items():
+                    model_info_file_path = get_model_info_file_path(short_hash)
+                    merged_model_info = model_info
+                    try:
+                        with open(model_info_file_path, "r") as file:
+                            disk_model_info = json.load(file)
+                    except (FileNotFoundError, json.JSONDecodeError):
+                        disk_model_info = None
+                    if disk_model_info is not None and disk_model_info != (bases[short_hash] or empty_model_info()):
+                        merged_model_info = merge_concurrent_model_info(bases[short_hash] or empty_model_info(), model_info, disk_model_info)
+
+                    write_file_atomically(model_info_file_path, dump_model_info(merged_model_info).encode("utf-8"), fsync=True)
+                    stat = os.stat(model_info_file_path)
+                    with self.lock:
+                        self.counters["disk_writes"] += 1
+                        if self.pending.get(short_hash) is model_info:
+                            del self.pending[short_hash]
+                            self.bases.pop(short_hash, None)
+                            self.entries[short_hash] = ((stat.st_mtime_ns, stat.st_size), merged_model_info)
+                        else:
+                            # A save that arrived mid-flush stays pending for the next timer, based on what it was edited from
+                            self.bases[short_hash] = model_info
+                append_to_maintenance_journal(pending)
+
+    def delete(self, short_hash):
+        with self.flush_lock:
+            with self.lock:
+                self.pending.pop(short_hash, None)
+                self.bases.pop(short_hash, None)
+                self.entries.pop(short_hash, None)
+            with presets_directory_lock():
+                try:
+                    os.remove(get_model_info_file_path(short_hash))
+                except FileNotFoundError:
+                    pass
+
+    def compact(self):
+        # One file per model leaves nothing to compact beyond removing files
+        pass
+
+    def read_uncached(self, short_hash):
+        # For whole-library passes: returns cached or pending info when present but never grows the cache
+        with self.lock:
+            if short_hash in self.pending:
+                return copy.deepcopy(self.pending[short_hash])
+        try:
+            with open(get_model_info_file_path(short_hash), "r") as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def list_model_hashes(self):
+        with self.lock:
+            pending_hashes = set(self.pending)
+        return sorted(pending_hashes.union(list_json_model_hashes()))
+
+    def invalidate(self, short_hash = None):
+        with self.lock:
+            if short_hash is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(short_hash, None)
+
+    def get_counters(self):
+        with self.lock:
+            return dict(self.counters)
+
+    def reset_counters(self):
+        with self.lock:
+            for key in self.counters:
+                self.counters[key] = 0
+
+class SqliteModelInfoStore:
+    # Same interface as ModelInfoStore, backed by one WAL-mode database; saves only touch the rows that changed
+    def __init__(self, database_path):
+        self.database_path = database_path
+        self.connection = None
+        self.data_version = None
+        self.entries = {}
+        self.lock = threading.RLock()
+        self.counters = {"disk_reads": 0, "cache_hits": 0, "disk_writes": 0}
+
+    def connect(self):
+        if self.connection is None:
+            os.makedirs(os.path.dirname(self.database_path), exist_ok=True)
+            import sqlite3
+            self.connection = sqlite3.connect(self.database_path, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS models (
+                    short_hash TEXT PRIMARY KEY,
+                    url TEXT NOT NULL DEFAULT '',
+                    default_preset TEXT NOT NULL DEFAULT 'default',
+                    extra TEXT NOT NULL DEFAULT '{}'
+                );
+                CREATE TABLE IF NOT EXISTS presets (
+                    short_hash TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    generation_data TEXT NOT NULL,
+                    PRIMARY KEY (short_hash, name)
+                );
+                CREATE INDEX IF NOT EXISTS presets_by_model_position ON presets (short_hash, position);
+                CREATE TABLE IF NOT EXISTS trigger_words (
+                    short_hash TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    word TEXT NOT NULL,
+                    PRIMARY KEY (short_hash, position)
+                );
+                CREATE INDEX IF NOT EXISTS trigger_words_by_word ON trigger_words (word);
+            """)
+        return self.connection
+
+    def validate_entries(self):
+        # data_version changes whenever another connection commits, so external writers drop the cache
+        data_version = self.connect().execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self.data_version:
+            self.entries.clear()
+            self.data_version = data_version
+
+    def read(self, short_hash):
+        connection = self.connect()
+        model_row = connection.execute("SELECT url, default_preset, extra FROM models WHERE short_hash = ?", (short_hash,)).fetchone()
+        if model_row is None:
+            return None
+        model_info = json.loads(model_row[2])
+        model_info["url"] = model_row[0]
+        model_info["default_preset"] = model_row[1]
+        model_info["trigger_words"] = [row[0] for row in connection.execute("SELECT word FROM trigger_words WHERE short_hash = ? ORDER BY position", (short_hash,))]
+        model_info["presets"] = {row[0]: row[1] for row in connection.execute("SELECT name, generation_data FROM presets WHERE short_hash = ? ORDER BY position", (short_hash,))}
+        return model_info
+
+    def get(self, short_hash, initializeIfMissing = True):
+        with self.lock:
+            self.validate_entries()
+            model_info = self.entries.get(short_hash)
+            if model_info is not None:
+                self.counters["cache_hits"] += 1
+                return copy.deepcopy(model_info)
+
+            model_info = self.read(short_hash)
+            if model_info is None:
+                return empty_model_info() if initializeIfMissing else None
+            self.counters["disk_reads"] += 1
+            self.entries[short_hash] = model_info
+            self.data_version = self.connection.execute("PRAGMA data_version").fetchone()[0]
+            return copy.deepcopy(model_info)
+
+    def save(self, short_hash, model_info):
+        with self.lock:
+            self.validate_entries()
+            previous_model_info = self.entries.get(short_hash) or self.read(short_hash) or {}
+            previous_presets = previous_model_info.get("presets", {})
+            presets = model_info.get("presets", {})
+            extra = {key: value for key, value in model_info.items() if key not in MODEL_INFO_KEYS}
+
+            with self.connect() as connection:
+                connection.execute("INSERT INTO models (short_hash, url, default_preset, extra) VALUES (?, ?, ?, ?) ON CONFLICT(short_hash) DO UPDATE SET url = excluded.url, default_preset = excluded.default_preset, extra = excluded.extra",
+                                   (short_hash, model_info.get("url", ""), model_info.get("default_preset", "default"), json.dumps(extra)))
+
+                removed_preset_names = [name for name in previous_presets if name not in presets]
+                connection.executemany("DELETE FROM presets WHERE short_hash = ? AND name = ?", [(short_hash, name) for name in removed_preset_names])
+
+                kept_preset_names = [name for name in presets if name in previous_presets]
+                if kept_preset_names == [name for name in previous_presets if name in presets]:
+                    # Order unchanged: only new or edited presets are written, new ones appended at the end
+                    next_position = connection.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM presets WHERE short_hash = ?", (short_hash,)).fetchone()[0]
+                    for name, generation_data in presets.items():
+                        if name not in previous_presets:
+                            connection.execute("INSERT INTO presets (short_hash, name, position, generation_data) VALUES (?, ?, ?, ?)", (short_hash, name, next_position, generation_data))
+                            next_position += 1
+                        elif previous_presets[name] != generation_data:
+                            connection.execute("UPDATE presets SET generation_data = ? WHERE short_hash = ? AND name = ?", (generation_data, short_hash, name))
+                else:
+                    connection.execute("DELETE FROM presets WHERE short_hash = ?", (short_hash,))
+                    connection.executemany("INSERT INTO presets (short_hash, name, position, generation_data) VALUES (?, ?, ?, ?)",
+                                           [(short_hash, name, position, generation_data) for position, (name, generation_data) in enumerate(presets.items())])
+
+                trigger_words = model_info.get("trigger_words", [])
+                if trigger_words != previous_model_info.get("trigger_words"):
+                    connection.execute("DELETE FROM trigger_words WHERE short_hash = ?", (short_hash,))
+                    connection.executemany("INSERT INTO trigger_words (short_hash, position, word) VALUES (?, ?, ?)",
+                                           [(short_hash, position, word) for position, word in enumerate(trigger_words)])
+
+            self.counters["disk_writes"] += 1
+            self.entries[short_hash] = copy.deepcopy(model_info)
+            self.data_version = self.connection.execute("PRAGMA data_version").fetchone()[0]
+        with presets_directory_lock():
+            append_to_maintenance_journal([short_hash])
+
+    def delete(self, short_hash):
+        with self.lock:
+            with self.connect() as connection:
+                for table in ("models", "presets", "trigger_words"):
+                    connection.execute(f"DELETE FROM {table} WHERE short_hash = ?", (short_hash,))
+            self.entries.pop(short_hash, None)
+            self.data_version = self.connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def compact(self):
+        with self.lock:
+            connection = self.connect()
+            # VACUUM goes through the WAL in WAL mode, so checkpoint after it to leave the WAL empty
+            connection.execute("VACUUM")
+            connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def read_uncached(self, short_hash):
+        with self.lock:
+            return self.read(short_hash)
+
+    def list_model_hashes(self):
+        with self.lock:
+            return [row[0] for row in self.connect().execute("SELECT short_hash FROM models ORDER BY short_hash")]
+
+    def invalidate(self, short_hash = None):
+        with self.lock:
+            if short_hash is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(short_hash, None)
+
+    def get_counters(self):
+        with self.lock:
+            return dict(self.counters)
+
+    def reset_counters(self):
+        with self.lock:
+            for key in self.counters:
+                self.counters[key] = 0
+
+def get_sqlite_database_path():
+    current_directory = os.path.dirname(__file__)
+    return os.path.join(current_directory, "model presets", SQLITE_DATABASE_FILE_NAME)
+
+def use_sqlite_storage():
+    return shared.opts.data.get("model_preset_manager_storage", "json") == "sqlite"
+
+def get_sqlite_model_info_store():
+    global sqlite_model_info_store
+    if sqlite_model_info_store is None:
+        sqlite_model_info_store = SqliteModelInfoStore(get_sqlite_database_path())
+    return sqlite_model_info_store
+
+def get_model_info_store():
+    return get_sqlite_model_info_store() if use_sqlite_storage() else model_info_store
+
+def list_json_model_hashes():
+    model_presets_directory = os.path.dirname(get_model_info_file_path(""))
+    if not os.path.isdir(model_presets_directory):
+        return []
+    return sorted(filename[:-len(".json")] for filename in os.listdir(model_presets_directory) if filename.endswith(".json"))
+
+@instrumented
+def import_json_presets_into_sqlite():
+    sqlite_store = get_sqlite_model_info_store()
+    imported = 0
+    for short_hash in list_json_model_hashes():
+        model_info = model_info_store.get(short_hash, False)
+        if validate_model_info(model_info):
+            sqlite_store.save(short_hash, model_info)
+            imported += 1
+    preset_search_index.invalidate()
+    return f"{imported} presets files imported into {SQLITE_DATABASE_FILE_NAME}"
+
+@instrumented
+def export_sqlite_presets_to_json():
+    sqlite_store = get_sqlite_model_info_store()
+    model_hashes = sqlite_store.list_model_hashes()
+    for short_hash in model_hashes:
+        model_info_store.save(short_hash, sqlite_store.get(short_hash, False))
+    return f"{len(model_hashes)} models exported to presets files"
+
+def merge_model_info(existing_model_info, imported_model_info):
+    # Keeps everything local; imported presets whose name is taken by different data get an " (imported)" suffix
+    merged_model_info = copy.deepcopy(existing_model_info)
+    if not merged_model_info.get("url"):
+        merged_model_info["url"] = imported_model_info.get("url", "")
+    merged_model_info["trigger_words"] = list(dict.fromkeys(merged_model_info.get("trigger_words", []) + imported_model_info.get("trigger_words", [])))
+    presets = merged_model_info.setdefault("presets", {})
+    for preset_name, generation_data in imported_model_info.get("presets", {}).items():
+        if not presets.get(preset_name):
+            presets[preset_name] = generation_data
+        elif presets[preset_name] != generation_data and generation_data not in presets.values():
+            presets[f"{preset_name} (imported)"] = generation_data
+    return merged_model_info
+
+def merge_concurrent_model_info(base_model_info, our_model_info, their_model_info):
+    # Three-way merge for two processes saving the same model: whatever we changed since base wins, key by key
+    # and preset by preset (including deletions); everything we left alone is taken from disk
+    merged_model_info = copy.deepcopy(their_model_info)
+    for key in set(base_model_info).union(our_model_info) - {"presets"}:
+        if our_model_info.get(key) != base_model_info.get(key):
+            if key in our_model_info:
+                merged_model_info[key] = copy.deepcopy(our_model_info[key])
+            else:
+                merged_model_info.pop(key, None)
+
+    base_presets = base_model_info.get("presets", {})
+    our_presets = our_model_info.get("presets", {})
+    merged_presets = merged_model_info.setdefault("presets", {})
+    for preset_name in list(base_presets) + [name for name in our_presets if name not in base_presets]:
+        if our_presets.get(preset_name) != base_presets.get(preset_name) or (preset_name in our_presets) != (preset_name in base_presets):
+            if preset_name in our_presets:
+                merged_presets[preset_name] = our_presets[preset_name]
+            else:
+                merged_presets.pop(preset_name, None)
+    return merged_model_info
+
+def get_library_export_directory():
+    current_directory = os.path.dirname(__file__)
+    return os.path.join(current_directory, LIBRARY_EXPORT_DIRECTORY_NAME)
+
+def export_preset_library(query):
+    # One gzipped NDJSON line per model, written as each model is read so memory stays flat. Each export
+    # replaces the previous bundle, which Gradio has already copied out for download
+    store = get_model_info_store()
+    model_hashes = preset_search_index.search_model_hashes(query) if query and query.strip() else store.list_model_hashes()
+    export_directory = get_library_export_directory()
+    os.makedirs(export_directory, exist_ok=True)
+    for filename in os.listdir(export_directory):
+        os.remove(os.path.join(export_directory, filename))
+    bundle_path = os.path.join(export_directory, f"model presets {time.strftime('%Y-%m-%d')}.ndjson.gz")
+    exported = 0
+    with gzip.open(bundle_path, "wt", encoding="utf-8") as file:
+        for short_hash in model_hashes:
+            model_info = store.read_uncached(short_hash)
+            if validate_model_info(model_info):
+                file.write(json.dumps({"short_hash": short_hash, "model_info": model_info}, separators=(",", ":")))
+                file.write("\n")
+                exported += 1
+    return bundle_path, f"{exported} models exported"
+
+def iter_preset_library_bundle(bundle_path):
+    with gzip.open(bundle_path, "rt", encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    yield None, None
+                    continue
+                yield entry.get("short_hash"), entry.get("model_info")
+
+def import_preset_library(bundle_file, conflict_mode):
+    if bundle_file is None:
+        return "no bundle selected"
+    bundle_path = getattr(bundle_file, "name", bundle_file)
+    start_time = time.perf_counter()
+    counts = {"imported": 0, "merged": 0, "skipped": 0, "invalid": 0}
+    store = get_model_info_store()
+
+    def resolve_conflict(short_hash, imported_model_info, existing_model_info):
+        if existing_model_info is None or conflict_mode == "overwrite":
+            counts["imported"] += 1
+            return imported_model_info
+        if conflict_mode == "skip":
+            counts["skipped"] += 1
+            return None
+        counts["merged"] += 1
+        return merge_model_info(existing_model_info, imported_model_info)
+
+    if store is model_info_store:
+        # Bulk path: one lock for the whole import and no per-file fsync; pending saves are flushed first
+        model_info_store.flush()
+        with presets_directory_lock():
+            for short_hash, imported_model_info in iter_preset_library_bundle(bundle_path):
+                if not short_hash or not validate_model_info(imported_model_info):
+                    counts["invalid"] += 1
+                    continue
+                model_info_file_path = get_model_info_file_path(short_hash)
+                model_info = resolve_conflict(short_hash, imported_model_info, model_info_store.read_uncached(short_hash) if os.path.exists(model_info_file_path) else None)
+                if model_info is not None:
+                    write_file_atomically(model_info_file_path, dump_model_info(model_info).encode("utf-8"))
+                    model_info_store.invalidate(short_hash)
+                    append_to_maintenance_journal([short_hash])
+    else:
+        for short_hash, imported_model_info in iter_preset_library_bundle(bundle_path):
+            if not short_hash or not validate_model_info(imported_model_info):
+                counts["invalid"] += 1
+                continue
+            model_info = resolve_conflict(short_hash, imported_model_info, store.read_uncached(short_hash))
+            if model_info is not None:
+                store.save(short_hash, model_info)
+
+    preset_search_index.invalidate()
+    elapsed_time = time.perf_counter() - start_time
+    return f"{counts['imported']} imported, {counts['merged']} merged, {counts['skipped']} skipped, {counts['invalid']} invalid in {elapsed_time:.1f} s"
+
+def is_empty_model_info(model_info):
+    return not model_info.get("url") and not model_info.get("trigger_words") and not any(model_info.get("presets", {}).values())
+
+def deduplicate_presets(model_info):
+    # Keeps the first preset of each distinct generation data, and always the default preset; returns the removed names
+    presets = model_info.get("presets", {})
+    default_preset = model_info.get("default_preset")
+    seen_generation_data = {presets[default_preset].strip()} if default_preset in presets else set()
+    removed_preset_names = []
+    for preset_name, generation_data in list(presets.items()):
+        if preset_name == default_preset:
+            continue
+        if generation_data.strip() in seen_generation_data:
+            del presets[preset_name]
+            removed_preset_names.append(preset_name)
+        else:
+            seen_generation_data.add(generation_data.strip())
+    return removed_preset_names
+
+def list_stale_thumbnails():
+    # Thumbnails are named after their checkpoint, so one whose checkpoint is gone can never be shown again.
+    # Only thumbnails this extension wrote are considered; other PNGs next to the checkpoints are never touched
+    live_thumbnail_paths = {os.path.abspath(get_thumbnail_path(os.path.splitext(os.path.relpath(path, CHECKPOINT_DIRECTORY))[0])) for path in list_checkpoint_files()}
+    with model_registry.lock:
+        live_thumbnail_paths.update(os.path.abspath(registered_model.thumbnail_path) for registered_model in model_registry.models_by_path.values())
+
+    return sorted(thumbnail_path for thumbnail_path in load_thumbnail_manifest() if thumbnail_path not in live_thumbnail_paths and os.path.exists(thumbnail_path))
+
+def get_checkpoint_short_hashes():
+    # Short hashes of every checkpoint on disk, or None when the orphan check can't be trusted: the registry
+    # isn't ready, no checkpoints are registered, or some checkpoint has never been hashed
+    if not model_registry.ready.wait(MODEL_REGISTRY_POLL_INTERVAL):
+        return None
+    with model_registry.lock:
+        registered_models = list(model_registry.models_by_path.values())
+    short_hashes = [registered_model.get_short_hash() for registered_model in registered_models]
+    if not short_hashes or not all(short_hashes):
+        return None
+    return set(short_hashes)
+
+@instrumented
+def run_library_maintenance(full_scan, remove_orphans, dry_run):
+    # Incremental runs only revisit models saved since the last run; a full scan also checks orphans and thumbnails
+    start_time = time.perf_counter()
+    store = get_model_info_store()
+    if store is model_info_store:
+        model_info_store.flush()
+    journal_hashes = take_maintenance_journal()
+    model_hashes = store.list_model_hashes() if full_scan else journal_hashes
+    checkpoint_short_hashes = get_checkpoint_short_hashes() if full_scan else None
+    counts = {"checked": 0, "empty": 0, "orphaned": 0, "deduplicated": 0, "shared": 0, "thumbnails": 0, "responses": 0}
+    lines = []
+    models_by_preset = collections.defaultdict(set)
+
+    for short_hash in model_hashes:
+        model_info = store.read_uncached(short_hash)
+        # A presets file that is there but reads as nothing (zero bytes, or cut short) counts as empty
+        unreadable = model_info is None and store is model_info_store and os.path.exists(get_model_info_file_path(short_hash))
+        if model_info is None and not unreadable:
+            continue
+        counts["checked"] += 1
+
+        if unreadable or not validate_model_info(model_info) or is_empty_model_info(model_info):
+            counts["empty"] += 1
+            lines.append(f"empty: {short_hash}{' (unreadable)' if unreadable else ''}")
+            if not dry_run:
+                store.delete(short_hash)
+            continue
+
+        if remove_orphans and checkpoint_short_hashes is not None and short_hash not in checkpoint_short_hashes:
+            counts["orphaned"] += 1
+            lines.append(f"orphaned: {short_hash} ({len(model_info['presets'])} presets)")
+            if not dry_run:
+                store.delete(short_hash)
+            continue
+
+        removed_preset_names = deduplicate_presets(model_info)
+        if removed_preset_names:
+            counts["deduplicated"] += len(removed_preset_names)
+            lines.append(f"duplicates: {short_hash} {', '.join(removed_preset_names)}")
+            if not dry_run:
+                save_model_info(short_hash, model_info)
+
+        if full_scan:
+            for generation_data in model_info["presets"].values():
+                if generation_data.strip():
+                    models_by_preset[generation_data.strip()].add(short_hash)
+
+    # The same preset saved for several models is reported, not removed: each model keeps its own copy
+    counts["shared"] = sum(1 for short_hashes in models_by_preset.values() if len(short_hashes) > 1)
+
+    if full_scan:
+        for thumbnail_path in list_stale_thumbnails():
+            counts["thumbnails"] += 1
+            lines.append(f"stale thumbnail: {os.path.relpath(thumbnail_path, CHECKPOINT_DIRECTORY)}")
+            if not dry_run:
+                os.remove(thumbnail_path)
+        if not dry_run:
+            prune_thumbnail_manifest()
+        counts["responses"] = prune_civitai_response_cache(dry_run)
+        if not dry_run:
+            store.compact()
+            counts["thumbnails"] += gallery_thumbnail_cache.prune()
+
+    if dry_run:
+        # Nothing changed, so the journal is put back for the real run
+        with presets_directory_lock():
+            append_to_maintenance_journal(journal_hashes)
+    if not dry_run and (counts["empty"] or counts["orphaned"]):
+        preset_search_index.invalidate()
+
+    summary = f"{'would remove' if dry_run else 'removed'} {counts['empty']} empty and {counts['orphaned']} orphaned presets files, {counts['deduplicated']} duplicate presets and {counts['thumbnails']} stale thumbnails; {counts['checked']} models checked in {time.perf_counter() - start_time:.1f} s"
+    if full_scan:
+        summary += f", {counts['shared']} presets shared by several models, {counts['responses']} expired Civitai responses {'would be pruned' if dry_run else 'pruned'}"
+    if remove_orphans and full_scan and checkpoint_short_hashes is None:
+        summary += "\norphan check skipped: no checkpoints are registered yet or some have not been hashed, run Index All Checkpoints first"
+    elif remove_orphans and not full_scan:
+        summary += "\norphan check needs a full scan"
+    return "\n".join([summary] + lines)
+
+def get_model_hash_and_info_from_model_filename(model_filename, initializeIfMissing = True):    
+    short_hash = get_short_hash_from_filename(model_filename)
+    model_info = get_model_info_store().get(short_hash, initializeIfMissing)
+    if model_info is None:
         return short_hash, empty_model_info()
+    return short_hash, model_info
         
 def get_model_hash_and_info_from_current_model(initializeIfMissing = True):
     return get_model_hash_and_info_from_model_filename(current_model_filename(), initializeIfMissing)
 
 def get_model_info_from_model_hash(model_hash):     
-    model_info_file_path = initialize_model_info_file(model_hash)
-    with open(model_info_file_path, "r") as file:
-        return json.load(file)
+    return get_model_info_store().get(model_hash)
 
+@instrumented
 def save_model_info(short_hash, model_info):
-    model_info_file_path = initialize_model_info_file(short_hash)
-    with open(model_info_file_path, "w") as file:
-        json.dump(model_info, file, indent=4)
+    get_model_info_store().save(short_hash, model_info)
+    preset_search_index.update_model(short_hash, model_info)
+
+class Preset:
+    # One preset's A1111 generation data, parsed once and shared through parse_preset's cache, so it is read-only
+    __slots__ = ("text", "prompt", "negative_prompt", "parameters", "steps", "sampler", "cfg_scale", "width", "height", "seed")
+
+    def __init__(self, text):
+        self.text = text
+        lines = text.split("\n")
+
+        parameters_line_index = None
+        for i in range(len(lines) - 1, -1, -1):
+            if lines[i].strip().startswith("Steps:"):
+                parameters_line_index = i
+                break
+        prompt_end_index = len(lines) if parameters_line_index is None else parameters_line_index
+
+        negative_prompt_index = next((i for i in range(prompt_end_index) if lines[i].startswith("Negative prompt:")), None)
+        if negative_prompt_index is None:
+            self.prompt = "\n".join(lines[:prompt_end_index]).strip()
+            self.negative_prompt = ""
+        else:
+            self.prompt = "\n".join(lines[:negative_prompt_index]).strip()
+            self.negative_prompt = "\n".join(lines[negative_prompt_index:prompt_end_index])[len("Negative prompt:"):].strip()
+
+        if parameters_line_index is None:
+            self.parameters = types.MappingProxyType({})
+        else:
+            self.parameters = types.MappingProxyType({key.strip(): value.strip() for key, value in GENERATION_PARAMETER_PATTERN.findall(lines[parameters_line_index])})
+
+        self.steps = parse_number(self.parameters.get("Steps"), int)
+        self.sampler = self.parameters.get("Sampler")
+        self.cfg_scale = parse_number(self.parameters.get("CFG scale"), float)
+        self.seed = parse_number(self.parameters.get("Seed"), int)
+        width, _, height = self.parameters.get("Size", "").partition("x")
+        self.width = parse_number(width, int)
+        self.height = parse_number(height, int)
+
+    def size(self):
+        return f"{self.width}x{self.height}" if self.width and self.height else None
+
+    def summary(self):
+        parts = [f"Steps {self.steps}" if self.steps else None, self.sampler, f"CFG {self.cfg_scale:g}" if self.cfg_scale is not None else None, self.size()]
+        return ", ".join(part for part in parts if part)
+
+def parse_number(value, number_type):
+    try:
+        return number_type(value)
+    except (TypeError, ValueError):
+        return None
+
+@functools.lru_cache(maxsize=4096)
+def parse_preset(text):
+    # Presets are immutable, so identical generation data shares one parsed instance
+    return Preset(text or "")
+
+def normalize_search_field_value(field, value):
+    value = value.strip().lower()
+    if field in ("cfg", "steps"):
+        try:
+            return f"{float(value):g}"
+        except ValueError:
+            pass
+    return value
+
+def tokenize_search_text(text):
+    return SEARCH_TOKEN_PATTERN.findall(text.lower())
+
+class PresetSearchIndex:
+    # Inverted index from tokens to (short_hash, preset_name); field tokens look like "sampler:euler a" or "trigger:word"
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        self.postings = {}
+        self.document_tokens = {}
+        self.model_documents = {}
+        self.model_urls = {}
+        self.generation_data = {}
+        self.built = False
+
+    def model_tokens(self, model_info):
+        tokens = set()
+        for trigger_word in model_info.get("trigger_words", []):
+            tokens.add(f"trigger:{trigger_word.strip().lower()}")
+            tokens.update(tokenize_search_text(trigger_word))
+        return tokens
+
+    def preset_tokens(self, generation_data):
+        tokens = set(tokenize_search_text(generation_data))
+        for key, value in parse_preset(generation_data).parameters.items():
+            if key in SEARCH_FIELDS:
+                tokens.add(f"{SEARCH_FIELDS[key]}:{normalize_search_field_value(SEARCH_FIELDS[key], value)}")
+        return tokens
+
+    def remove_model(self, short_hash):
+        for document in self.model_documents.pop(short_hash, ()):
+            for token in self.document_tokens.pop(document, ()):
+                documents = self.postings.get(token)
+                if documents is not None:
+                    documents.discard(document)
+                    if not documents:
+                        del self.postings[token]
+            self.generation_data.pop(document, None)
+        self.model_urls.pop(short_hash, None)
+
+    def add_model(self, short_hash, model_info):
+        # Trigger words belong to the model: every preset document carries them, and a model with no
+        # saved presets yet is indexed through its empty default preset so trigger searches still find it
+        model_tokens = self.model_tokens(model_info)
+        presets = {preset_name: generation_data for preset_name, generation_data in model_info.get("presets", {}).items() if generation_data}
+        if not presets and model_tokens:
+            presets = {model_info.get("default_preset", "default"): ""}
+
+        documents = set()
+        for preset_name, generation_data in presets.items():
+            document = (short_hash, preset_name)
+            tokens = self.preset_tokens(generation_data) | model_tokens
+            for token in tokens:
+                self.postings.setdefault(token, set()).add(document)
+            self.document_tokens[document] = tokens
+            self.generation_data[document] = generation_data
+            documents.add(document)
+        self.model_documents[short_hash] = documents
+        self.model_urls[short_hash] = model_info.get("url", "")
+
+    def update_model(self, short_hash, model_info):
+        with self.lock:
+            if not self.built:
+                return
+            self.remove_model(short_hash)
+            self.add_model(short_hash, model_info)
+
+    def build(self):
+        store = get_model_info_store()
+        with self.lock:
+            self.reset()
+            for short_hash in store.list_model_hashes():
+                model_info = store.read_uncached(short_hash)
+                if validate_model_info(model_info):
+                    self.add_model(short_hash, model_info)
+            self.built = True
+
+    def query_tokens(self, query):
+        tokens = []
+        for field, quoted_value, value in SEARCH_FIELD_QUERY_PATTERN.findall(query):
+            field = field.lower()
+            if field in SEARCH_FIELDS.values() or field == "trigger":
+                tokens.append(f"{field}:{normalize_search_field_value(field, quoted_value or value)}")
+            else:
+                tokens.extend(tokenize_search_text(f"{field}:{quoted_value or value}"))
+        tokens.extend(tokenize_search_text(SEARCH_FIELD_QUERY_PATTERN.sub(" ", query)))
+        return tokens
+
+    def matching_documents(self, query):
+        with self.lock:
+            if not self.built:
+                self.build()
+            tokens = self.query_tokens(query)
+            if not tokens:
+                return set()
+
+            # Intersect starting from the rarest token so the working set stays small
+            posting_lists = sorted((self.postings.get(token, set()) for token in tokens), key=len)
+            documents = set(posting_lists[0])
+            for posting_list in posting_lists[1:]:
+                documents &= posting_list
+                if not documents:
+                    break
+            return documents
+
+    def search_model_hashes(self, query):
+        return sorted({short_hash for short_hash, preset_name in self.matching_documents(query)})
+
+    def search(self, query, limit = 200):
+        with self.lock:
+            documents = self.matching_documents(query)
+            return len(documents), [(short_hash, preset_name, self.model_urls.get(short_hash, ""), self.generation_data[(short_hash, preset_name)]) for short_hash, preset_name in sorted(documents)[:limit]]
+
+    def invalidate(self):
+        with self.lock:
+            self.built = False
+
+@instrumented
+def search_presets(query):
+    start_time = time.perf_counter()
+    total, results = preset_search_index.search(query)
+    elapsed_time = (time.perf_counter() - start_time) * 1000
+    return [list(result) for result in results] or [["", "", "", ""]], f"{total} presets found in {elapsed_time:.1f} ms{f', showing the first {len(results)}' if len(results) < total else ''}"
+
+@instrumented
+def rebuild_preset_search_index():
+    start_time = time.perf_counter()
+    preset_search_index.build()
+    elapsed_time = (time.perf_counter() - start_time) * 1000
+    return f"search index rebuilt over {len(preset_search_index.document_tokens)} presets in {elapsed_time:.0f} ms"
+
+def get_civitai_session():
+    # One pooled session shared by every Civitai call, retrying rate limits and server errors with backoff
+    global civitai_session
+    with civitai_session_lock:
+        if civitai_session is None:
+            # requests is only imported once the first Civitai call is made
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+
+            retry = Retry(total=CIVITAI_MAX_RETRIES, backoff_factor=CIVITAI_RETRY_BACKOFF, status_forcelist=(429, 500, 502, 503, 504), allowed_methods=frozenset(["GET"]))
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=INDEX_CHECKPOINTS_WORKERS, max_retries=retry)
+            civitai_session = requests.Session()
+            civitai_session.mount("https://", adapter)
+            civitai_session.mount("http://", adapter)
+        return civitai_session
+
+class Cancellation:
+    # Fired from the UI thread when a download is abandoned; closes whatever response the worker is blocked reading
+    def __init__(self):
+        self.cancelled = False
+        self.callbacks = []
+        self.lock = threading.Lock()
+
+    def on_cancel(self, callback):
+        with self.lock:
+            if not self.cancelled:
+                self.callbacks.append(callback)
+                return
+        callback()
+
+    def cancel(self):
+        with self.lock:
+            if self.cancelled:
+                return
+            self.cancelled = True
+            callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"cancel callback failed: {e}")
+
+def close_civitai_response(response):
+    # shutdown() wakes a read blocked in another thread (urllib3 2.3+); close() alone leaves it waiting for the timeout
+    shutdown = getattr(response.raw, "shutdown", None)
+    if shutdown is not None:
+        try:
+            shutdown()
+        except (ValueError, RuntimeError):
+            # Already fully read and its connection handed back to the pool
+            pass
+    response.close()
+
+def get_civitai_response_cache_paths(url):
+    current_directory = os.path.dirname(__file__)
+    cache_key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+    cache_directory = os.path.join(current_directory, CIVITAI_RESPONSE_CACHE_DIRECTORY_NAME)
+    return os.path.join(cache_directory, f"{cache_key}.json"), os.path.join(cache_directory, f"{cache_key}.body")
+
+def get_civitai_response_prefix_url(url):
+    # Cache key for the part of a streamed body a consumer read before stopping; fragments never reach the server
+    return f"{url}#prefix"
 
+def load_civitai_response_cache_entry(url):
+    metadata_path, body_path = get_civitai_response_cache_paths(url)
+    try:
+        with open(metadata_path, "r") as file:
+            metadata = json.load(file)
+        if metadata.get("url") != url or not os.path.exists(body_path):
+            return None
+        return metadata
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def read_civitai_response_cache_body(url):
+    metadata_path, body_path = get_civitai_response_cache_paths(url)
+    with open(body_path, "rb") as file:
+        return file.read()
+
+def iter_civitai_response_cache_body(url):
+    metadata_path, body_path = get_civitai_response_cache_paths(url)
+    with open(body_path, "rb") as file:
+        for chunk in iter(lambda: file.read(CIVITAI_STREAM_CHUNK_SIZE), b''):
+            yield chunk
+
+def iter_response_into_civitai_response_cache(url, response, cancellation = None):
+    # Tees the streamed body into the cache. Only a fully read body is cached under the URL; a consumer that
+    # stops early caches the prefix it read under the prefix URL instead, unless it was cancelled
+    metadata_path, body_path = get_civitai_response_cache_paths(url)
+    os.makedirs(os.path.dirname(body_path), exist_ok=True)
+    temp_file_path = f"{body_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    completed = False
+    stopped_early = False
+    try:
+        with open(temp_file_path, "wb") as file:
+            try:
+                for chunk in response.iter_content(CIVITAI_STREAM_CHUNK_SIZE):
+                    file.write(chunk)
+                    diagnostics.add("bytes_written", len(chunk))
+                    yield chunk
+            except GeneratorExit:
+                stopped_early = True
+        completed = cancellation is None or not cancellation.cancelled
+    finally:
+        response.close()
+        if completed:
+            cache_url = get_civitai_response_prefix_url(url) if stopped_early else url
+            os.replace(temp_file_path, get_civitai_response_cache_paths(cache_url)[1])
+            save_civitai_response_cache_entry(cache_url, response, None)
+        elif os.path.exists(temp_file_path):
+            os.remove(temp_file_path)
+
+def save_civitai_response_cache_entry(url, response, body):
+    metadata_path, body_path = get_civitai_response_cache_paths(url)
+    metadata = {
+        "url": url,
+        "fetched_at": time.time(),
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified")
+    }
+    if body is not None:
+        write_file_atomically(body_path, body)
+    write_file_atomically(metadata_path, json.dumps(metadata).encode("utf-8"))
+
+def civitai_get(url, headers = None, stream = False, cancellation = None, accept_prefix = False):
+    # Returns (status_code, body), or (status_code, chunk iterator) when streaming; fresh cache entries
+    # cost nothing and stale ones are revalidated with ETag/Last-Modified. Cancelling closes the response mid-read.
+    # With accept_prefix, a fresh cached prefix of a streamed body is returned as (206, chunk iterator)
+    read_cached_body = iter_civitai_response_cache_body if stream else read_civitai_response_cache_body
+    cache_entry = load_civitai_response_cache_entry(url)
+    if cache_entry and time.time() - cache_entry["fetched_at"] < CIVITAI_RESPONSE_CACHE_TTL:
+        return 200, read_cached_body(url)
+    if stream and accept_prefix:
+        prefix_url = get_civitai_response_prefix_url(url)
+        prefix_entry = load_civitai_response_cache_entry(prefix_url)
+        if prefix_entry and time.time() - prefix_entry["fetched_at"] < CIVITAI_RESPONSE_CACHE_TTL:
+            return 206, iter_civitai_response_cache_body(prefix_url)
+
+    request_headers = dict(headers or {})
+    if cache_entry:
+        if cache_entry.get("etag"):
+            request_headers["If-None-Match"] = cache_entry["etag"]
+        if cache_entry.get("last_modified"):
+            request_headers["If-Modified-Since"] = cache_entry["last_modified"]
+
+    diagnostics.add("http_calls")
+    response = get_civitai_session().get(url, headers=request_headers, timeout=CIVITAI_REQUEST_TIMEOUT, stream=stream)
+    if cancellation is not None:
+        cancellation.on_cancel(lambda: close_civitai_response(response))
+    if response.status_code == 304 and cache_entry:
+        response.close()
+        metadata_path, body_path = get_civitai_response_cache_paths(url)
+        cache_entry["fetched_at"] = time.time()
+        write_file_atomically(metadata_path, json.dumps(cache_entry).encode("utf-8"))
+        return 200, read_cached_body(url)
+
+    if stream:
+        if response.status_code == 200:
+            return 200, iter_response_into_civitai_response_cache(url, response, cancellation)
+        return response.status_code, response.iter_content(CIVITAI_STREAM_CHUNK_SIZE)
+
+    if response.status_code == 200:
+        save_civitai_response_cache_entry(url, response, response.content)
+    return response.status_code, response.content
+
+def prune_civitai_response_cache(dry_run = False):
+    # Past the max age an entry is no longer worth revalidating; bodies left without metadata are removed too
+    cache_directory = os.path.join(os.path.dirname(__file__), CIVITAI_RESPONSE_CACHE_DIRECTORY_NAME)
+    try:
+        filenames = os.listdir(cache_directory)
+    except FileNotFoundError:
+        return 0
+
+    removed_entries = 0
+    live_cache_keys = set()
+    for filename in filenames:
+        cache_key, extension = os.path.splitext(filename)
+        if extension != ".json":
+            continue
+        metadata_path = os.path.join(cache_directory, filename)
+        try:
+            with open(metadata_path, "r") as file:
+                fetched_at = json.load(file).get("fetched_at", 0)
+        except (OSError, json.JSONDecodeError):
+            fetched_at = 0
+        if time.time() - fetched_at < CIVITAI_RESPONSE_CACHE_MAX_AGE:
+            live_cache_keys.add(cache_key)
+            continue
+        removed_entries += 1
+        if not dry_run:
+            os.remove(metadata_path)
+
+    if not dry_run:
+        for filename in filenames:
+            if filename.endswith(".body") and os.path.splitext(filename)[0] not in live_cache_keys:
+                try:
+                    os.remove(os.path.join(cache_directory, filename))
+                except FileNotFoundError:
+                    pass
+    return removed_entries
+
+@instrumented
 def get_model_url_trigger_words_and_first_image_url_from_hash(short_hash):
-    response = requests.get(f"{CIVITAI_MODEL_INFO_BY_HASH_URL}{short_hash}")
-    data = response.json()
+    status_code, body = civitai_get(f"{CIVITAI_MODEL_INFO_BY_HASH_URL}{short_hash}")
+    data = json.loads(body)
 
     # The get() method returns None if the key does not exist.
     trigger_words = data.get("trainedWords", [])
-    images = data.get("images", [{}])
+    images = data.get("images") or [{}]
     model_url = f'{CIVITAI_MODEL_PAGE_BY_ID_URL}{data.get("modelId", "")}'
 
     first_image_url = images[0].get("url", None)
 
     return model_url, trigger_words, first_image_url
 
-def get_short_hash_from_filename(filename):
-    match = re.search(r'\[(.*?)\]', filename)
-    if match:
-        return match.group(1)
-    filename = remove_hash_and_whitespace(filename)
-    os.path.join("models", "Stable-diffusion", filename)
+def get_hash_cache_file_path():
+    current_directory = os.path.dirname(__file__)
+    return os.path.join(current_directory, HASH_CACHE_FILE_NAME)
+
+def load_hash_cache():
+    # Entries are keyed by absolute path and only trusted while size and mtime_ns still match
+    global hash_cache
+    if hash_cache is None:
+        try:
+            with open(get_hash_cache_file_path(), "r") as file:
+                hash_cache = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            hash_cache = {}
+    return hash_cache
+
+def save_hash_cache():
+    write_file_atomically(get_hash_cache_file_path(), json.dumps(hash_cache, indent=4).encode("utf-8"))
+
+def get_cached_short_hash(file_path):
+    file_path = os.path.abspath(file_path)
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+
+    with hash_cache_lock:
+        entry = load_hash_cache().get(file_path)
+
+    if entry and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+        return entry.get("short_hash")
+    return None
+
+def set_cached_hash(file_path, sha256_hexdigest):
+    file_path = os.path.abspath(file_path)
+    stat = os.stat(file_path)
+    with hash_cache_lock:
+        load_hash_cache()[file_path] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": sha256_hexdigest,
+            "short_hash": sha256_hexdigest[:10]
+        }
+        save_hash_cache()
+    model_registry.set_short_hash(file_path, sha256_hexdigest[:10], (stat.st_size, stat.st_mtime_ns))
+
+def invalidate_hash_cache(file_path = None):
+    # Drops one entry, or the whole cache when no path is given
+    global hash_cache
+    with hash_cache_lock:
+        if file_path is None:
+            hash_cache = {}
+        else:
+            load_hash_cache().pop(os.path.abspath(file_path), None)
+        save_hash_cache()
+
+@instrumented
+def hash_file(file_path, progress_callback = None):
+    # Reads into one reused buffer; hashlib releases the GIL while digesting large chunks
+    if progress_callback is None and hasattr(hashlib, "file_digest"):
+        with open(file_path, 'rb') as f:
+            sha256_hexdigest = hashlib.file_digest(f, "sha256").hexdigest()
+        diagnostics.add("bytes_hashed", os.path.getsize(file_path))
+        return sha256_hexdigest
+
     sha256 = hashlib.sha256()
-    with open(filename, 'rb') as f:
-        for chunk in iter(lambda: f.read(4096), b''):
-            sha256.update(chunk)
-    return sha256.hexdigest()[:10]
+    total_bytes = os.path.getsize(file_path)
+    hashed_bytes = 0
+    buffer = bytearray(HASH_BUFFER_SIZE)
+    buffer_view = memoryview(buffer)
+    with open(file_path, 'rb', buffering=0) as f:
+        while True:
+            read_bytes = f.readinto(buffer)
+            if not read_bytes:
+                break
+            sha256.update(buffer_view[:read_bytes])
+            hashed_bytes += read_bytes
+            if progress_callback:
+                progress_callback(hashed_bytes, total_bytes)
+    diagnostics.add("bytes_hashed", hashed_bytes)
+    return sha256.hexdigest()
+
+class HashJob:
+    def __init__(self, file_path):
+        self.file_path = os.path.abspath(file_path)
+        self.hashed_bytes = 0
+        self.total_bytes = 0
+        self.sha256 = None
+        self.error = None
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        try:
+            self.total_bytes = os.path.getsize(self.file_path)
+            self.sha256 = hash_file(self.file_path, self.update_progress)
+            set_cached_hash(self.file_path, self.sha256)
+        except Exception as e:
+            self.error = e
+        finally:
+            with hash_jobs_lock:
+                hash_jobs.pop(self.file_path, None)
+            self.done.set()
+
+    def update_progress(self, hashed_bytes, total_bytes):
+        self.hashed_bytes = hashed_bytes
+        self.total_bytes = total_bytes
+
+    def progress_text(self):
+        if not self.total_bytes:
+            return "hashing..."
+        return f"hashing {self.hashed_bytes * 100 // self.total_bytes}%"
+
+def start_hash_job(file_path):
+    # Callers asking for the same file while it is being hashed share one job
+    file_path = os.path.abspath(file_path)
+    with hash_jobs_lock:
+        job = hash_jobs.get(file_path)
+        if job is None:
+            job = HashJob(file_path)
+            hash_jobs[file_path] = job
+            job.thread.start()
+    return job
+
+def get_file_signature(file_path):
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns)
+
+class RegisteredModel:
+    def __init__(self, title, file_path, model_name, short_hash = None, file_signature = None):
+        self.title = title
+        self.file_path = os.path.abspath(file_path)
+        self.model_name = model_name
+        self.short_hash = short_hash
+        # The checkpoint's (size, mtime_ns) when short_hash was computed
+        self.file_signature = file_signature or (get_file_signature(self.file_path) if short_hash else None)
+        self.thumbnail_path = get_thumbnail_path(model_name)
+
+    def get_short_hash(self):
+        # A checkpoint overwritten in place keeps its title but not its hash
+        if self.short_hash and get_file_signature(self.file_path) == self.file_signature:
+            return self.short_hash
+        return None
 
+    @property
+    def presets_file_path(self):
+        short_hash = self.get_short_hash()
+        return get_model_info_file_path(short_hash) if short_hash else None
+
+class ModelRegistry:
+    # Checkpoint title -> absolute path -> short hash -> presets file -> thumbnail, rebuilt only when the checkpoint folders change
+    def __init__(self):
+        self.models = {}
+        self.models_by_path = {}
+        self.signature = None
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+        self.watcher = None
+
+    def scan_signature(self):
+        # Directory mtimes change whenever a checkpoint is added, removed or renamed
+        signature = []
+        for directory, _, _ in os.walk(CHECKPOINT_DIRECTORY):
+            try:
+                signature.append((directory, os.stat(directory).st_mtime_ns))
+            except OSError:
+                pass
+        return tuple(signature)
+
+    def refresh(self):
+        signature = self.scan_signature()
+        registered_models = []
+        for file_path in list_checkpoint_files():
+            name = os.path.relpath(file_path, CHECKPOINT_DIRECTORY)
+            registered_models.append(RegisteredModel(name, file_path, os.path.splitext(name)[0], get_cached_short_hash(file_path)))
+
+        # WebUI's own list also covers --ckpt-dir folders and hashes it has already computed
+        for checkpoint_info in list(getattr(sd_models, "checkpoints_list", {}).values()):
+            file_path = getattr(checkpoint_info, "filename", None)
+            if not file_path:
+                continue
+            name = getattr(checkpoint_info, "name", None) or os.path.basename(file_path)
+            registered_models.append(RegisteredModel(getattr(checkpoint_info, "title", name), file_path, os.path.splitext(name)[0], getattr(checkpoint_info, "shorthash", None) or get_cached_short_hash(file_path)))
+
+        models = {}
+        models_by_path = {}
+        for registered_model in registered_models:
+            registered_model = models_by_path.setdefault(registered_model.file_path, registered_model)
+            for key in self.model_keys(registered_model):
+                models[key] = registered_model
+
+        with self.lock:
+            self.models = models
+            self.models_by_path = models_by_path
+            self.signature = signature
+        self.ready.set()
+
+    def model_keys(self, registered_model):
+        keys = [registered_model.title, remove_hash_and_whitespace(registered_model.title)]
+        if registered_model.short_hash:
+            keys.append(f"{keys[1]} [{registered_model.short_hash}]")
+        return keys
+
+    def resolve(self, title):
+        self.ready.wait(MODEL_REGISTRY_POLL_INTERVAL)
+        with self.lock:
+            return self.models.get(title) or self.models.get(remove_hash_and_whitespace(title))
+
+    def set_short_hash(self, file_path, short_hash, file_signature = None):
+        with self.lock:
+            registered_model = self.models_by_path.get(os.path.abspath(file_path))
+            if registered_model is None:
+                return
+            registered_model.short_hash = short_hash
+            registered_model.file_signature = file_signature or get_file_signature(registered_model.file_path)
+            for key in self.model_keys(registered_model):
+                self.models[key] = registered_model
+
+    def watch(self):
+        while True:
+            time.sleep(MODEL_REGISTRY_POLL_INTERVAL)
+            try:
+                if self.scan_signature() != self.signature:
+                    self.refresh()
+            except Exception as e:
+                print(f"model registry refresh failed: {e}")
+
+    def start(self):
+        if self.watcher is None:
+            self.watcher = threading.Thread(target=self.start_and_watch, daemon=True)
+            self.watcher.start()
+
+    def start_and_watch(self):
+        try:
+            self.refresh()
+        finally:
+            self.ready.set()
+        self.watch()
+
+@functools.lru_cache(maxsize=1024)
+def get_bracketed_hash(model_filename):
+    match = re.search(r'\[(.*?)\]', model_filename)
+    return match.group(1) if match else None
+
+def get_model_file_path(model_filename):
+    registered_model = model_registry.resolve(model_filename)
+    if registered_model:
+        return registered_model.file_path
+    return os.path.join(CHECKPOINT_DIRECTORY, remove_hash_and_whitespace(model_filename))
+
+def get_known_short_hash(model_filename):
+    # Bracketed hash in the title, or one the registry knows for the checkpoint as it is now; never reads the file
+    bracketed_hash = get_bracketed_hash(model_filename)
+    if bracketed_hash:
+        return bracketed_hash
+    registered_model = model_registry.resolve(model_filename)
+    return registered_model.get_short_hash() if registered_model else None
+
+@instrumented
+def get_short_hash_from_filename(filename):
+    short_hash = get_known_short_hash(filename)
+    if short_hash:
+        return short_hash
+    filename = get_model_file_path(filename)
+
+    short_hash = get_cached_short_hash(filename)
+    if short_hash:
+        model_registry.set_short_hash(filename, short_hash)
+        return short_hash
+
+    job = start_hash_job(filename)
+    job.done.wait()
+    if job.error:
+        raise job.error
+    return job.sha256[:10]
+
+@instrumented
+def hash_current_model_with_progress():
+    model_filename = current_model_filename()
+    short_hash = get_known_short_hash(model_filename)
+    if short_hash:
+        yield short_hash
+        return
+
+    file_path = get_model_file_path(model_filename)
+    short_hash = get_cached_short_hash(file_path)
+    if short_hash:
+        model_registry.set_short_hash(file_path, short_hash)
+        yield short_hash
+        return
+
+    job = start_hash_job(file_path)
+    while not job.done.wait(HASH_PROGRESS_INTERVAL):
+        yield job.progress_text()
+
+    if job.error:
+        yield f"hash failed: {job.error}"
+    else:
+        yield job.sha256[:10]
+
+@functools.lru_cache(maxsize=1024)
 def remove_hash_and_whitespace(s, remove_extension = False):
     # Remove any whitespace and hash surrounded by square brackets
     cleaned_string = re.sub(r'\s*\[.*?\]', '', s)
@@ -107,87 +1558,572 @@ def remove_hash_and_whitespace(s, remove_extension = False):
     
     return cleaned_string
 
-def get_model_presets_from_civitai_model_url(model_url):   
+def decode_model_presets_candidate(text, start_index, end_index):
+    # Only the balanced {...} candidate is decoded, so the result never depends on how much of the page has arrived
+    candidate = text[start_index:end_index]
+    try:
+        model_presets = json.loads(candidate)
+    except json.JSONDecodeError:
+        # Presets pasted into a Civitai description come back with their quotes HTML-escaped
+        try:
+            model_presets = json.loads(html.unescape(candidate))
+        except json.JSONDecodeError:
+            return None
+    return model_presets if isinstance(model_presets, dict) else None
+
+def extract_model_presets_from_chunks(chunks, cancellation = None):
+    # Single pass over the streamed page: find the description tag, then the preset prefix, then the
+    # first balanced {...} that decodes; returns as soon as it does so the rest of the page is never read
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    markers = [CIVITAI_MODEL_DESCRIPTION_TAG, CIVITAI_MODEL_DESCRIPTION_PRESET_PREFIX]
+    marker_index = 0
+    text = ""
+    scan_index = 0
+    opened_braces = 0
+    json_start_index = 0
+
+    for chunk in chunks:
+        if cancellation is not None and cancellation.cancelled:
+            return None
+        text += decoder.decode(chunk)
+
+        while marker_index < len(markers):
+            marker = markers[marker_index]
+            marker_start_index = text.find(marker, scan_index)
+            if marker_start_index == -1:
+                # Keep just enough of the tail to match a marker split across chunks
+                text = text[max(scan_index, len(text) - len(marker) + 1):]
+                scan_index = 0
+                break
+            scan_index = marker_start_index + len(marker)
+            marker_index += 1
+        if marker_index < len(markers):
+            continue
+
+        for match in BRACE_PATTERN.finditer(text, scan_index):
+            i = match.start()
+            if text[i] == '{':
+                if opened_braces == 0:
+                    json_start_index = i
+                opened_braces += 1
+            elif opened_braces > 0:
+                opened_braces -= 1
+                if opened_braces == 0:
+                    model_presets = decode_model_presets_candidate(text, json_start_index, i + 1)
+                    if model_presets is not None:
+                        return model_presets
+
+        if opened_braces == 0:
+            text = ""
+            scan_index = 0
+        else:
+            text = text[json_start_index:]
+            scan_index = len(text)
+            json_start_index = 0
+    return None
+
+def read_model_presets_from_chunks(chunks, cancellation = None):
+    try:
+        return extract_model_presets_from_chunks(chunks, cancellation)
+    except Exception:
+        # The read fails once cancellation has closed the response underneath it
+        if cancellation is not None and cancellation.cancelled:
+            return None
+        raise
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+@instrumented
+def get_model_presets_from_civitai_model_url(model_url, cancellation = None):   
     headers = {'User-Agent': 'Mozilla/5.0'}
-    model_page_html = requests.get(model_url, headers=headers).text
+    status_code, chunks = civitai_get(model_url, headers=headers, stream=True, cancellation=cancellation, accept_prefix=True)
+    model_presets = read_model_presets_from_chunks(chunks, cancellation)
+    if model_presets is None and status_code == 206 and not (cancellation is not None and cancellation.cancelled):
+        # The cached prefix ended before any presets, so read the whole page
+        status_code, chunks = civitai_get(model_url, headers=headers, stream=True, cancellation=cancellation)
+        model_presets = read_model_presets_from_chunks(chunks, cancellation)
+    return model_presets
 
-    data_start_index = model_page_html.find(CIVITAI_MODEL_DESCRIPTION_TAG)
-    if data_start_index == -1:
-        return None
+def get_thumbnail_path(modelName):
+    return os.path.join(CHECKPOINT_DIRECTORY, modelName + ".png")
 
-    model_page_html = model_page_html[data_start_index + len(CIVITAI_MODEL_DESCRIPTION_TAG):]
-    
-    preset_start_index = model_page_html.find(CIVITAI_MODEL_DESCRIPTION_PRESET_PREFIX)
-    if preset_start_index == -1:
+def get_image_array_digest(image_array):
+    return f"{image_array.shape}:{hashlib.blake2b(image_array.tobytes(), digest_size=16).hexdigest()}"
+
+def get_thumbnail_digest(thumbnail_path):
+    # Digest of the thumbnail's RGB pixels as Gradio will hand them back, cached per file version
+    try:
+        stat = os.stat(thumbnail_path)
+    except OSError:
         return None
-    else:
-        preset_start_index += len(CIVITAI_MODEL_DESCRIPTION_PRESET_PREFIX)
-    
-    opened_braces = 0
-    json_start_index = -1
-    for i in range(preset_start_index, len(model_page_html)):
-        if model_page_html[i] == '{':
-            if opened_braces == 0:
-                json_start_index = i
-            opened_braces += 1
-        elif model_page_html[i] == '}':
-            opened_braces -= 1
-            if opened_braces == 0:
-                try:
-                    possible_json_str = model_page_html[json_start_index:i + 1]
-                    json_obj = json.loads(possible_json_str)
-                    return json_obj
-                except json.JSONDecodeError:
-                    pass
-    return None
+    file_signature = (stat.st_mtime_ns, stat.st_size)
 
+    with thumbnail_digests_lock:
+        entry = thumbnail_digests.get(thumbnail_path)
+    if entry and entry[0] == file_signature:
+        return entry[1]
 
+    import numpy as np
+    from PIL import Image
 
+    with Image.open(thumbnail_path) as img:
+        digest = get_image_array_digest(np.asarray(img.convert("RGB")))
+    with thumbnail_digests_lock:
+        thumbnail_digests[thumbnail_path] = (file_signature, digest)
+    return digest
 
-def get_thumbnail_path(modelName):
-    return os.path.join("models", "Stable-diffusion", modelName + ".png")
+def get_thumbnail_manifest_path():
+    current_directory = os.path.dirname(__file__)
+    return os.path.join(current_directory, THUMBNAIL_MANIFEST_FILE_NAME)
 
+def load_thumbnail_manifest():
+    # Absolute paths of every thumbnail this extension has written
+    try:
+        with open(get_thumbnail_manifest_path(), "r") as file:
+            return set(json.load(file))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return set()
+
+def record_thumbnail(thumbnail_path):
+    thumbnail_path = os.path.abspath(thumbnail_path)
+    if thumbnail_path in load_thumbnail_manifest():
+        return
+    with presets_directory_lock():
+        thumbnail_paths = load_thumbnail_manifest()
+        thumbnail_paths.add(thumbnail_path)
+        write_file_atomically(get_thumbnail_manifest_path(), json.dumps(sorted(thumbnail_paths), indent=4).encode("utf-8"))
+
+def prune_thumbnail_manifest():
+    with presets_directory_lock():
+        thumbnail_paths = load_thumbnail_manifest()
+        existing_thumbnail_paths = {thumbnail_path for thumbnail_path in thumbnail_paths if os.path.exists(thumbnail_path)}
+        if existing_thumbnail_paths != thumbnail_paths:
+            write_file_atomically(get_thumbnail_manifest_path(), json.dumps(sorted(existing_thumbnail_paths), indent=4).encode("utf-8"))
+
+def save_thumbnail_atomically(img, thumbnail_path):
+    import numpy as np
+
+    temp_file_path = f"{thumbnail_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        img.save(temp_file_path, format="PNG")
+        os.replace(temp_file_path, thumbnail_path)
+    finally:
+        if os.path.exists(temp_file_path):
+            os.remove(temp_file_path)
+    record_thumbnail(thumbnail_path)
+
+    stat = os.stat(thumbnail_path)
+    digest = get_image_array_digest(np.asarray(img.convert("RGB")))
+    with thumbnail_digests_lock:
+        thumbnail_digests[thumbnail_path] = ((stat.st_mtime_ns, stat.st_size), digest)
+
+@instrumented
 def download_thumbnail(image_url, modelName):
     thumbnail_path = get_thumbnail_path(modelName)
     if os.path.exists(thumbnail_path):
         return
-    response = requests.get(image_url)
-    response.raise_for_status()
 
-    # Open the image using PIL and create a thumbnail with max size 300x300
-    img = Image.open(BytesIO(response.content))
-    img.thumbnail((300, 300))
-    
-    # Save the thumbnail
-    img.save(thumbnail_path)
-    
+    # Stream the full-resolution image to disk rather than holding it in memory
+    temp_download_path = f"{thumbnail_path}.{os.getpid()}.{threading.get_ident()}.download"
+    try:
+        diagnostics.add("http_calls")
+        with get_civitai_session().get(image_url, timeout=CIVITAI_REQUEST_TIMEOUT, stream=True) as response:
+            response.raise_for_status()
+            with open(temp_download_path, "wb") as file:
+                for chunk in response.iter_content(CIVITAI_STREAM_CHUNK_SIZE):
+                    file.write(chunk)
+
+        from PIL import Image
+
+        with Image.open(temp_download_path) as img:
+            # JPEGs decode straight at a reduced scale; other formats ignore the draft request
+            img.draft("RGB", THUMBNAIL_SIZE)
+            img.thumbnail(THUMBNAIL_SIZE)
+            save_thumbnail_atomically(img, thumbnail_path)
+    finally:
+        if os.path.exists(temp_download_path):
+            os.remove(temp_download_path)
+
+def submit_thumbnail_job(thumbnail_path, function, *args):
+    # One pending job per thumbnail; the model info panel renders without waiting for it
+    with thumbnail_futures_lock:
+        future = thumbnail_futures.get(thumbnail_path)
+        if future is None or future.done():
+            future = thumbnail_executor.submit(function, *args)
+            thumbnail_futures[thumbnail_path] = future
+    return future
+
+def write_thumbnail_from_np_array(image, thumbnail_path):
+    from PIL import Image
+
+    # Open the image and create a thumbnail with max size 300x300
+    img = Image.fromarray(image)
+    img.thumbnail(THUMBNAIL_SIZE)
+    save_thumbnail_atomically(img, thumbnail_path)
+
+@instrumented
 def save_thumbnail_from_np_array(current_model, image):
+    import numpy as np
+
     if image is None:
         print("no image in np array")
         return
         
     current_model = remove_hash_and_whitespace(current_model, True)
-    
-    # Open the image and create a thumbnail with max size 300x300
-    image = Image.fromarray(np.uint8(image))
-    image.thumbnail((300, 300))
-    
-    # Save the thumbnail
     thumbnail_path = get_thumbnail_path(current_model)
-    image.save(thumbnail_path)
+    image = np.uint8(image)
+
+    # Setting the thumbnail from a handler fires this change event too; don't re-encode what is already on disk
+    if get_image_array_digest(image) == get_thumbnail_digest(thumbnail_path):
+        return
+
+    submit_thumbnail_job(thumbnail_path, write_thumbnail_from_np_array, image, thumbnail_path)
     
 def get_model_thumbnail(image_url, short_hash, local, modelName):
     thumbnail_path = get_thumbnail_path(modelName)
 
-    if not local or not os.path.exists(thumbnail_path):
-        if image_url:
-            download_thumbnail(image_url, modelName)
-
     if os.path.exists(thumbnail_path):
         return thumbnail_path
+
+    if image_url:
+        submit_thumbnail_job(thumbnail_path, download_thumbnail, image_url, modelName)
     else:
         print("no local model thumbnail found")
-        return None
+    return None
+
+class GalleryThumbnailCache:
+    # Small WebP copies of the checkpoint thumbnails, named by the digest of the source PNG so each is encoded once
+    def __init__(self, cache_directory):
+        self.cache_directory = cache_directory
+        self.index_path = os.path.join(cache_directory, "index.json")
+        self.index = None
+        self.index_changed = False
+        self.lock = threading.Lock()
+        # One lock per digest being encoded, so page loads running in parallel never encode the same image twice
+        self.digest_locks = {}
+
+    def load_index(self):
+        if self.index is None:
+            try:
+                with open(self.index_path, "r") as file:
+                    self.index = json.load(file)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self.index = {}
+        return self.index
+
+    def save_index(self):
+        with self.lock:
+            if not self.index_changed:
+                return
+            data = json.dumps(self.index, separators=(",", ":")).encode("utf-8")
+            self.index_changed = False
+        write_file_atomically(self.index_path, data)
+
+    def get_webp_path(self, digest):
+        return os.path.join(self.cache_directory, f"{digest}.webp")
+
+    def get_placeholder(self):
+        placeholder_path = os.path.join(self.cache_directory, "placeholder.webp")
+        if not os.path.exists(placeholder_path):
+            from PIL import Image
+            self.write_webp(Image.new("RGB", GALLERY_THUMBNAIL_SIZE, (48, 48, 48)), placeholder_path)
+        return placeholder_path
+
+    def write_webp(self, img, webp_path):
+        import io
+
+        buffer = io.BytesIO()
+        img.save(buffer, format="WEBP", quality=GALLERY_THUMBNAIL_QUALITY)
+        write_file_atomically(webp_path, buffer.getvalue())
+
+    def get(self, thumbnail_path):
+        # Unchanged sources cost one stat; a new or edited PNG is read and digested, and decoded only if its digest is new
+        if not thumbnail_path:
+            return self.get_placeholder()
+        thumbnail_path = os.path.abspath(thumbnail_path)
+        try:
+            stat = os.stat(thumbnail_path)
+        except OSError:
+            return self.get_placeholder()
+
+        with self.lock:
+            entry = self.load_index().get(thumbnail_path)
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            webp_path = self.get_webp_path(entry["digest"])
+            if os.path.exists(webp_path):
+                return webp_path
+
+        with open(thumbnail_path, "rb") as file:
+            data = file.read()
+        diagnostics.add("bytes_read", len(data))
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        webp_path = self.get_webp_path(digest)
+        with self.lock:
+            digest_lock = self.digest_locks.setdefault(digest, threading.Lock())
+        with digest_lock:
+            if not os.path.exists(webp_path):
+                import io
+                from PIL import Image
+
+                with Image.open(io.BytesIO(data)) as img:
+                    img.draft("RGB", GALLERY_THUMBNAIL_SIZE)
+                    img = img.convert("RGB")
+                    img.thumbnail(GALLERY_THUMBNAIL_SIZE)
+                    self.write_webp(img, webp_path)
+        with self.lock:
+            self.digest_locks.pop(digest, None)
+
+        with self.lock:
+            self.load_index()[thumbnail_path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "digest": digest}
+            self.index_changed = True
+        return webp_path
+
+    def prune(self):
+        # Drops entries whose source PNG is gone and WebP files no entry points at; returns the number of files removed
+        with self.lock:
+            index = self.load_index()
+            for thumbnail_path in [path for path in index if not os.path.exists(path)]:
+                del index[thumbnail_path]
+                self.index_changed = True
+            live_digests = {entry["digest"] for entry in index.values()}
+        self.save_index()
+
+        removed = 0
+        if os.path.isdir(self.cache_directory):
+            for filename in os.listdir(self.cache_directory):
+                if filename.endswith(".webp") and filename != "placeholder.webp" and filename[:-len(".webp")] not in live_digests:
+                    os.remove(os.path.join(self.cache_directory, filename))
+                    removed += 1
+        return removed
+
+def get_gallery_cache_directory():
+    current_directory = os.path.dirname(__file__)
+    return os.path.join(current_directory, GALLERY_CACHE_DIRECTORY_NAME)
+
+def get_registered_models_by_short_hash():
+    model_registry.ready.wait(MODEL_REGISTRY_POLL_INTERVAL)
+    with model_registry.lock:
+        registered_models = list(model_registry.models_by_path.values())
+    registered_models_by_short_hash = {}
+    for registered_model in registered_models:
+        short_hash = registered_model.get_short_hash()
+        if short_hash:
+            registered_models_by_short_hash[short_hash] = registered_model
+    return registered_models_by_short_hash
+
+def list_gallery_models():
+    # Every model with presets, by checkpoint name; hashes without a checkpoint on disk sort last under their hash
+    registered_models = get_registered_models_by_short_hash()
+    gallery_models = []
+    for short_hash in get_model_info_store().list_model_hashes():
+        registered_model = registered_models.get(short_hash)
+        if registered_model:
+            gallery_models.append((0, registered_model.model_name.lower(), short_hash, registered_model.title, registered_model.thumbnail_path))
+        else:
+            gallery_models.append((1, short_hash, short_hash, short_hash, None))
+    return [gallery_model[2:] for gallery_model in sorted(gallery_models)]
+
+@instrumented
+def load_gallery_page(page):
+    # Only the requested page is read and converted, so opening the gallery never touches the whole library
+    gallery_models = list_gallery_models()
+    page_count = max((len(gallery_models) + GALLERY_PAGE_SIZE - 1) // GALLERY_PAGE_SIZE, 1)
+    page = min(max(int(page or 1), 1), page_count)
+    page_models = gallery_models[(page - 1) * GALLERY_PAGE_SIZE:page * GALLERY_PAGE_SIZE]
+
+    store = get_model_info_store()
+    futures = [thumbnail_executor.submit(gallery_thumbnail_cache.get, thumbnail_path) for _, _, thumbnail_path in page_models]
+    gallery_items = []
+    for (short_hash, title, _), future in zip(page_models, futures):
+        model_info = store.read_uncached(short_hash) or empty_model_info()
+        preset_count = sum(1 for generation_data in model_info.get("presets", {}).values() if generation_data)
+        gallery_items.append((future.result(), f"{remove_hash_and_whitespace(title, True)} ({preset_count} presets)"))
+    gallery_thumbnail_cache.save_index()
+
+    page_entries = [[short_hash, title] for short_hash, title, _ in page_models]
+    return gallery_items, page, f"page {page} of {page_count}, {len(gallery_models)} models with presets", page_entries
+
+def load_previous_gallery_page(page):
+    return load_gallery_page(int(page or 1) - 1)
+
+def load_next_gallery_page(page):
+    return load_gallery_page(int(page or 1) + 1)
+
+def select_gallery_model(selection: gr.SelectData, page_entries):
+    if not page_entries or selection.index >= len(page_entries):
+        return ""
+    short_hash, title = page_entries[selection.index]
+    model_info = get_model_info_store().read_uncached(short_hash) or empty_model_info()
+    lines = [f"{title} [{short_hash}]", model_info.get("url", "")]
+    lines.extend(f"{preset_name}{' (default)' if preset_name == model_info.get('default_preset') else ''}: {generation_data}" for preset_name, generation_data in model_info.get("presets", {}).items() if generation_data)
+    return "\n".join(line for line in lines if line)
+
+def batch_preset_label(short_hash, preset_name, registered_models):
+    registered_model = registered_models.get(short_hash)
+    model_name = os.path.basename(registered_model.model_name) if registered_model else "unknown model"
+    return f"{model_name} [{short_hash}] / {preset_name}"
+
+@instrumented
+def list_batch_preset_choices(query):
+    # Search results across models, or the current model's presets when the filter is empty
+    registered_models = get_registered_models_by_short_hash()
+    if query and query.strip():
+        total, results = preset_search_index.search(query, limit=BATCH_PRESET_CHOICE_LIMIT)
+        presets = [(short_hash, preset_name) for short_hash, preset_name, _, generation_data in results if generation_data]
+    else:
+        short_hash, model_info = get_model_hash_and_info_from_current_model(False)
+        presets = [(short_hash, preset_name) for preset_name, generation_data in model_info["presets"].items() if generation_data]
+        total = len(presets)
+    choices = [batch_preset_label(short_hash, preset_name, registered_models) for short_hash, preset_name in presets]
+    status = f"{total} presets found{f', showing the first {len(choices)}' if len(choices) < total else ''}"
+    return gr.update(choices=choices, value=[]), status
+
+def resolve_batch_presets(selected_labels):
+    # Returns (short_hash, preset_name, label, Preset) per selected label, in selection order, and the labels that no longer resolve
+    store = get_model_info_store()
+    resolved = []
+    missing = []
+    for label in selected_labels or []:
+        match = BATCH_PRESET_LABEL_PATTERN.match(label)
+        model_info = store.get(match.group(2), False) if match else None
+        generation_data = model_info.get("presets", {}).get(match.group(3)) if model_info else None
+        if not generation_data:
+            missing.append(label)
+            continue
+        resolved.append((match.group(2), match.group(3), label, parse_preset(generation_data)))
+    return resolved, missing
+
+@instrumented
+def diff_batch_presets(selected_labels, only_differences):
+    resolved, missing = resolve_batch_presets(selected_labels)
+    if not resolved:
+        return {"headers": ["Parameter"], "data": [[""]]}, "no presets selected"
+
+    parameter_names = list(dict.fromkeys(name for _, _, _, preset in resolved for name in preset.parameters))
+    rows = [["Prompt"] + [preset.prompt for _, _, _, preset in resolved], ["Negative prompt"] + [preset.negative_prompt for _, _, _, preset in resolved]]
+    rows.extend([name] + [preset.parameters.get(name, "") for _, _, _, preset in resolved] for name in parameter_names)
+    if only_differences and len(resolved) > 1:
+        rows = [row for row in rows if len(set(row[1:])) > 1]
+
+    status = f"{len(rows)} parameters compared across {len(resolved)} presets"
+    if missing:
+        status += f", {len(missing)} no longer found: {', '.join(missing)}"
+    return {"headers": ["Parameter"] + [label for _, _, label, _ in resolved], "data": rows or [[""] * (len(resolved) + 1)]}, status
+
+def preset_processing_arguments(preset):
+    # StableDiffusionProcessingTxt2Img keyword arguments for the parameters a preset can carry
+    arguments = {"prompt": preset.prompt, "negative_prompt": preset.negative_prompt, "seed": preset.seed if preset.seed is not None else -1}
+    if preset.steps:
+        arguments["steps"] = preset.steps
+    if preset.sampler:
+        arguments["sampler_name"] = preset.sampler
+    if preset.cfg_scale is not None:
+        arguments["cfg_scale"] = preset.cfg_scale
+    if preset.width and preset.height:
+        arguments["width"] = preset.width
+        arguments["height"] = preset.height
+
+    hr_scale = parse_number(preset.parameters.get("Hires upscale"), float)
+    if hr_scale:
+        arguments["enable_hr"] = True
+        arguments["hr_scale"] = hr_scale
+        arguments["hr_upscaler"] = preset.parameters.get("Hires upscaler")
+        arguments["hr_second_pass_steps"] = parse_number(preset.parameters.get("Hires steps"), int) or 0
+        arguments["denoising_strength"] = parse_number(preset.parameters.get("Denoising strength"), float) or 0.7
+
+    clip_skip = parse_number(preset.parameters.get("Clip skip"), int)
+    if clip_skip:
+        arguments["override_settings"] = {"CLIP_stop_at_last_layers": clip_skip}
+    return arguments
+
+def group_batch_presets_by_model(resolved):
+    # One group per model in selection order, with the loaded model first so it never gets swapped out and back
+    groups = {}
+    for short_hash, preset_name, label, preset in resolved:
+        groups.setdefault(short_hash, []).append((label, preset))
+    current_short_hash = get_known_short_hash(current_model_filename())
+    if current_short_hash in groups:
+        groups = {current_short_hash: groups.pop(current_short_hash), **groups}
+    return groups
+
+def load_checkpoint_for_batch(checkpoint_title):
+    # Setting opts.data directly skips the option's onchange handler, which would wait on the queue lock this batch holds
+    shared.opts.data["sd_model_checkpoint"] = checkpoint_title
+    sd_models.reload_model_weights()
+
+@instrumented
+def run_preset_batch(selected_labels, output_mode):
+    # Runs every selected preset as one queued job, loading each model once; output_mode "grid" also assembles a grid image
+    from modules import images, processing
+    from modules.call_queue import queue_lock
+
+    resolved, missing = resolve_batch_presets(selected_labels)
+    if not resolved:
+        return [], "no presets selected"
+
+    registered_models = get_registered_models_by_short_hash()
+    groups = group_batch_presets_by_model(resolved)
+    checkpoint_titles = {}
+    errors = [f"{label}: preset no longer found" for label in missing]
+    for short_hash in list(groups):
+        registered_model = registered_models.get(short_hash)
+        checkpoint_info = sd_models.get_closet_checkpoint_match(registered_model.title) if registered_model else None
+        if checkpoint_info is None:
+            errors.extend(f"{label}: no checkpoint with hash {short_hash}" for label, _ in groups.pop(short_hash))
+        else:
+            checkpoint_titles[short_hash] = checkpoint_info.title
+
+    result_images = []
+    captions = []
+    start_time = time.perf_counter()
+    with queue_lock:
+        original_checkpoint_title = current_model_filename()
+        shared.state.begin()
+        shared.state.job = "model_preset_manager_batch"
+        shared.state.job_count = sum(len(presets) for presets in groups.values())
+        try:
+            for short_hash, presets in groups.items():
+                if shared.state.interrupted:
+                    break
+                if checkpoint_titles[short_hash] != current_model_filename():
+                    load_checkpoint_for_batch(checkpoint_titles[short_hash])
+                for label, preset in presets:
+                    if shared.state.interrupted:
+                        break
+                    p = processing.StableDiffusionProcessingTxt2Img(
+                        sd_model=shared.sd_model,
+                        outpath_samples=shared.opts.outdir_samples or shared.opts.outdir_txt2img_samples,
+                        outpath_grids=shared.opts.outdir_grids or shared.opts.outdir_txt2img_grids,
+                        **preset_processing_arguments(preset))
+                    try:
+                        processed = processing.process_images(p)
+                    except Exception as e:
+                        errors.append(f"{label}: {e}")
+                        continue
+                    finally:
+                        p.close()
+                    if processed.images:
+                        result_images.append(processed.images[0])
+                        captions.append(label)
+        finally:
+            if current_model_filename() != original_checkpoint_title:
+                load_checkpoint_for_batch(original_checkpoint_title)
+            shared.state.end()
+
+    if output_mode == "grid" and len(result_images) > 1:
+        grid = images.image_grid(result_images)
+        if shared.opts.grid_save:
+            images.save_image(grid, shared.opts.outdir_grids or shared.opts.outdir_txt2img_grids, "grid", extension=shared.opts.grid_format, short_filename=not shared.opts.grid_extended_filename, grid=True)
+        gallery_items = [(grid, f"grid of {len(result_images)} presets")] + list(zip(result_images, captions))
+    else:
+        gallery_items = list(zip(result_images, captions))
+
+    status = f"{len(result_images)} presets generated across {len(groups)} models in {time.perf_counter() - start_time:.1f} s"
+    return gallery_items, "\n".join([status] + errors)
+
+def interrupt_preset_batch():
+    shared.state.interrupt()
 
 def update_default_preset(model_info):
     default_preset_name = model_info.get("default_preset", "default") or "default"
@@ -223,32 +2159,80 @@ def validate_model_info(model_info):
     required_keys = ["url", "default_preset", "trigger_words", "presets"]
     return model_info and all(key in model_info for key in required_keys)
 
+def model_info_outputs(model_filename, model_url, model_thumbnail, model_info, trigger_words, short_hash):
+    preset_name, current_generation_data = get_default_preset(model_info)        
+    presets = model_info.get("presets",{})
+    return model_filename, model_url, model_thumbnail, model_generation_data_update_return(current_generation_data, preset_name), gr.CheckboxGroup.update(choices = trigger_words), gr.Dropdown.update(choices = list(presets.keys()), value = preset_name), preset_name, short_hash, gr.update()
+
+def thumbnail_only_outputs(model_thumbnail):
+    return gr.update(), gr.update(), model_thumbnail, gr.update(), gr.update(), gr.update(), gr.update(), gr.update(), gr.update()
+
+def status_only_outputs(status):
+    return gr.update(), gr.update(), gr.update(), gr.update(), gr.update(), gr.update(), gr.update(), gr.update(), status
+
+@instrumented
 def download_model_info():
     model_filename = current_model_filename()
     short_hash, model_info = get_model_hash_and_info_from_model_filename(model_filename)
     model_url, trigger_words, first_image_url = get_model_url_trigger_words_and_first_image_url_from_hash(short_hash)
-    full_presets_file =  get_model_presets_from_civitai_model_url(model_url)
+    model_name = remove_hash_and_whitespace(model_filename, True)
+
+    # Once the model ID is known the page scrape and the thumbnail download run side by side
+    cancellation = Cancellation()
+    presets_future = download_executor.submit(get_model_presets_from_civitai_model_url, model_url, cancellation)
+    pending_futures = {presets_future: "presets"}
     
     model_thumbnail = None
     if first_image_url:
-        model_thumbnail = get_model_thumbnail(first_image_url, short_hash, False, remove_hash_and_whitespace(model_filename, True))
-    
-    model_info = get_model_info_from_model_hash(short_hash)   
+        model_thumbnail = get_model_thumbnail(first_image_url, short_hash, False, model_name)
+        with thumbnail_futures_lock:
+            thumbnail_future = thumbnail_futures.get(get_thumbnail_path(model_name))
+        if model_thumbnail is None and thumbnail_future is not None:
+            pending_futures[thumbnail_future] = "thumbnail"
     
     global triggerWordChoices
     triggerWordChoices = trigger_words
-    if validate_model_info(full_presets_file):
-        model_info = full_presets_file
-        triggerWordChoices = trigger_words = model_info.get("trigger_words", [])
-        save_model_info(short_hash, model_info)
-    else:            
-        set_trigger_words(model_filename)
-        set_model_url(model_filename, model_url) 
-           
-    preset_name, current_generation_data = get_default_preset(model_info)        
-    presets = model_info.get("presets",{})
-        
-    return model_filename, model_url, model_thumbnail, model_generation_data_update_return(current_generation_data, preset_name), gr.CheckboxGroup.update(choices = trigger_words), gr.Dropdown.update(choices = list(presets.keys()), value = preset_name), preset_name, short_hash
+
+    try:
+        yield model_info_outputs(model_filename, model_url, model_thumbnail, model_info, trigger_words, short_hash)
+
+        for future in concurrent.futures.as_completed(pending_futures, timeout=DOWNLOAD_MODEL_INFO_TIMEOUT):
+            if pending_futures[future] == "thumbnail":
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"thumbnail download failed: {e}")
+                model_thumbnail = get_model_thumbnail("", short_hash, True, model_name)
+                if model_thumbnail:
+                    yield thumbnail_only_outputs(model_thumbnail)
+                continue
+
+            try:
+                full_presets_file = future.result()
+            except Exception as e:
+                print(f"model page download failed: {e}")
+                full_presets_file = None
+
+            model_info = get_model_info_from_model_hash(short_hash)   
+            triggerWordChoices = trigger_words
+            if validate_model_info(full_presets_file):
+                model_info = full_presets_file
+                triggerWordChoices = trigger_words = model_info.get("trigger_words", [])
+                save_model_info(short_hash, model_info)
+            else:            
+                set_trigger_words(model_filename)
+                set_model_url(model_filename, model_url) 
+                model_info = get_model_info_from_model_hash(short_hash)
+            yield model_info_outputs(model_filename, model_url, gr.update(), model_info, trigger_words, short_hash)
+    except concurrent.futures.TimeoutError:
+        status = f"Model info download timed out after {DOWNLOAD_MODEL_INFO_TIMEOUT} seconds, showing what arrived so far"
+        print(status)
+        yield status_only_outputs(status)
+    finally:
+        # Runs on timeout and when the Cancel button closes this generator; a scrape already reading the page is
+        # stopped by closing its response, while a thumbnail already downloading still lands on disk
+        presets_future.cancel()
+        cancellation.cancel()
 
 def model_generation_data_update_return(current_generation_data, preset_name):
     model_hash, model_info = get_model_hash_and_info_from_current_model()
@@ -259,32 +2243,170 @@ def model_generation_data_update_return(current_generation_data, preset_name):
 def current_model_filename():
     return shared.opts.data.get('sd_model_checkpoint', 'Not found')
 
+class ModelInfoPrefetcher:
+    # LRU of the most recently loaded checkpoints' short hash and thumbnail, filled in the background on model load.
+    # model_info itself is only warmed in the store, which revalidates it against the file on every read
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def prefetch(self, model_filename):
+        return download_executor.submit(self.load, model_filename)
+
+    def load(self, model_filename):
+        try:
+            short_hash = get_short_hash_from_filename(model_filename)
+            get_model_info_store().get(short_hash, False)
+            model_thumbnail = get_model_thumbnail("", short_hash, True, remove_hash_and_whitespace(model_filename, True))
+            if model_thumbnail:
+                # Warms the digest so the image change event that follows rendering skips re-encoding
+                get_thumbnail_digest(model_thumbnail)
+        except Exception as e:
+            print(f"model info prefetch failed for {model_filename}: {e}")
+            return
+
+        with self.lock:
+            self.entries[model_filename] = (short_hash, model_thumbnail)
+            self.entries.move_to_end(model_filename)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+
+    def get(self, model_filename):
+        with self.lock:
+            entry = self.entries.get(model_filename)
+            if entry is None:
+                return None
+            self.entries.move_to_end(model_filename)
+            return entry
+
+def on_model_loaded(sd_model):
+    checkpoint_info = getattr(sd_model, "sd_checkpoint_info", None)
+    model_info_prefetcher.prefetch(getattr(checkpoint_info, "title", None) or current_model_filename())
+
+@instrumented
 def retrieve_model_info_from_disk(current_generation_data):
     model_filename = current_model_filename()
 
-    short_hash, model_info = get_model_hash_and_info_from_model_filename(model_filename, False)
+    prefetched = model_info_prefetcher.get(model_filename)
+    if prefetched:
+        short_hash, model_thumbnail = prefetched
+        model_info = get_model_info_store().get(short_hash)
+    else:
+        short_hash, model_info = get_model_hash_and_info_from_model_filename(model_filename, False)
+        model_thumbnail = None
 
-    if model_info:
+    if validate_model_info(model_info):
         model_url = model_info['url']
 
         if model_url:
-            model_thumbnail = get_model_thumbnail("", short_hash, True, remove_hash_and_whitespace(model_filename, True))
+            if model_thumbnail is None:
+                model_thumbnail = get_model_thumbnail("", short_hash, True, remove_hash_and_whitespace(model_filename, True))
             
-            preset_name, current_generation_data = get_default_preset(model_info)
             presets = model_info.setdefault('presets', {"default": ""})
             trigger_words = model_info.setdefault('trigger_words', [])
                 
             global triggerWordChoices
             triggerWordChoices = trigger_words
-            return model_filename, model_url, model_thumbnail, model_generation_data_update_return(current_generation_data, preset_name), gr.CheckboxGroup.update(choices = trigger_words), gr.Dropdown.update(choices = list(presets.keys()), value = preset_name), preset_name, short_hash
+            yield model_info_outputs(model_filename, model_url, model_thumbnail, model_info, trigger_words, short_hash)
         else:
             presets = model_info.setdefault('presets', {"default": ""})
-            return download_model_info()
+            yield from download_model_info()
 
     else:
         # Handle the case when the model is not found in the data structure
         presets = model_info.setdefault('presets', {"default": ""})
-        return download_model_info()
+        yield from download_model_info()
+
+@instrumented
+def show_local_model_info():
+    # Run by the JS when the tab opens or the checkpoint changes: renders prefetched or saved info only,
+    # never hashing the checkpoint or calling Civitai; Retrieve and Download stay explicit clicks
+    model_filename = current_model_filename()
+    prefetched = model_info_prefetcher.get(model_filename)
+    if prefetched:
+        short_hash, model_thumbnail = prefetched
+    else:
+        short_hash = get_known_short_hash(model_filename) or get_cached_short_hash(get_model_file_path(model_filename))
+        model_thumbnail = None
+
+    if not short_hash:
+        return model_filename, "", None, gr.Textbox.update(label = model_generation_data_label_text(), value = ""), gr.CheckboxGroup.update(choices = []), gr.Dropdown.update(choices = [], value = None), "", "", gr.update()
+
+    model_info = get_model_info_store().get(short_hash)
+    if not validate_model_info(model_info):
+        model_info = empty_model_info()
+    if model_thumbnail is None:
+        model_thumbnail = get_model_thumbnail("", short_hash, True, remove_hash_and_whitespace(model_filename, True))
+
+    global triggerWordChoices
+    triggerWordChoices = trigger_words = model_info['trigger_words']
+    return model_info_outputs(model_filename, model_info['url'], model_thumbnail, model_info, trigger_words, short_hash)
+
+def list_checkpoint_files():
+    checkpoint_files = []
+    for directory, _, filenames in os.walk(CHECKPOINT_DIRECTORY):
+        for filename in filenames:
+            if filename.lower().endswith(CHECKPOINT_EXTENSIONS):
+                checkpoint_files.append(os.path.join(directory, filename))
+    return sorted(checkpoint_files)
+
+def index_checkpoint(checkpoint_file_path, hash_semaphore):
+    # Hashes one checkpoint, looks it up on Civitai and fills in its presets file and thumbnail
+    hashed_bytes = 0
+    short_hash = get_cached_short_hash(checkpoint_file_path)
+    if not short_hash:
+        with hash_semaphore:
+            sha256_hexdigest = hash_file(checkpoint_file_path)
+        set_cached_hash(checkpoint_file_path, sha256_hexdigest)
+        short_hash = sha256_hexdigest[:10]
+        hashed_bytes = os.path.getsize(checkpoint_file_path)
+
+    model_url, trigger_words, first_image_url = get_model_url_trigger_words_and_first_image_url_from_hash(short_hash)
+    if model_url == CIVITAI_MODEL_PAGE_BY_ID_URL:
+        raise LookupError(f"{short_hash} not found on Civitai")
+
+    model_info = get_model_info_from_model_hash(short_hash)
+    model_info['url'] = model_url
+    model_info['trigger_words'] = trigger_words
+    save_model_info(short_hash, model_info)
+
+    if first_image_url:
+        model_name = os.path.splitext(os.path.relpath(checkpoint_file_path, CHECKPOINT_DIRECTORY))[0]
+        download_thumbnail(first_image_url, model_name)
+
+    return short_hash, hashed_bytes
+
+def index_checkpoints_progress_text(completed, total, errors, hashed_bytes, start_time):
+    elapsed_time = max(time.perf_counter() - start_time, 1e-6)
+    lines = [f"{completed}/{total} checkpoints indexed, {len(errors)} errors, {completed / elapsed_time:.2f} models/s, {hashed_bytes / (1024 * 1024) / elapsed_time:.1f} MB/s hashed"]
+    lines.extend(f"{os.path.relpath(path, CHECKPOINT_DIRECTORY)}: {error}" for path, error in errors)
+    return "\n".join(lines)
+
+@instrumented
+def index_all_checkpoints():
+    checkpoint_files = list_checkpoint_files()
+    if not checkpoint_files:
+        yield f"no checkpoints found in {CHECKPOINT_DIRECTORY}"
+        return
+
+    hash_semaphore = threading.Semaphore(INDEX_CHECKPOINTS_HASH_WORKERS)
+    errors = []
+    completed = 0
+    hashed_bytes = 0
+    start_time = time.perf_counter()
+    yield index_checkpoints_progress_text(completed, len(checkpoint_files), errors, hashed_bytes, start_time)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=INDEX_CHECKPOINTS_WORKERS) as executor:
+        futures = {executor.submit(index_checkpoint, path, hash_semaphore): path for path in checkpoint_files}
+        for future in concurrent.futures.as_completed(futures):
+            completed += 1
+            try:
+                short_hash, file_hashed_bytes = future.result()
+                hashed_bytes += file_hashed_bytes
+            except Exception as e:
+                errors.append((futures[future], e))
+            yield index_checkpoints_progress_text(completed, len(checkpoint_files), errors, hashed_bytes, start_time)
 
 def set_model_info(model_filename, label, info):
     short_hash, model_info = get_model_hash_and_info_from_model_filename(model_filename)    
@@ -294,9 +2416,11 @@ def set_model_info(model_filename, label, info):
     save_model_info(short_hash, model_info)
     return f"{label} updated."
 
+@instrumented
 def set_model_url(current_model, model_url):
     return set_model_info(current_model, 'url', model_url)
     
+@instrumented
 def show_model_url(model_url):
     iframe_html = f'<iframe src="{model_url}" width="100%" height="1080" frameborder="0"></iframe>'
     return iframe_html
@@ -309,17 +2433,47 @@ def bind_buttons(buttons, source_text_component):
     for tabname, button in buttons.items():
         parameters_copypaste.register_paste_params_button(parameters_copypaste.ParamBinding(paste_button=button, tabname=tabname, source_text_component=source_text_component, source_image_component=None, source_tabname=None))
 
+@functools.lru_cache(maxsize=256)
+def get_trigger_word_pattern(trigger_word):
+    # Escaped so words like "(style:1.2)" match literally; the trailing space is consumed on removal
+    return re.compile(rf"(?<!\w){re.escape(trigger_word)}(?!\w) ?")
+
+class TriggerWordMatcher:
+    def __init__(self, trigger_words):
+        self.trigger_words = tuple(dict.fromkeys(word for word in trigger_words if word))
+        # Longest first so the alternation prefers "cat girl" over "cat"; words nested inside a match are added back
+        longest_first_words = sorted(self.trigger_words, key=len, reverse=True)
+        self.pattern = re.compile(rf"(?<!\w)(?:{'|'.join(map(re.escape, longest_first_words))})(?!\w)") if longest_first_words else None
+        self.contained_words = {word: [other for other in longest_first_words if other != word and get_trigger_word_pattern(other).search(word)] for word in longest_first_words}
+
+    def find_all(self, prompt):
+        if self.pattern is None:
+            return set()
+        found_words = set()
+        for match in self.pattern.finditer(prompt):
+            found_words.add(match.group(0))
+            found_words.update(self.contained_words[match.group(0)])
+        return found_words
+
+@functools.lru_cache(maxsize=32)
+def get_trigger_word_matcher(trigger_words):
+    return TriggerWordMatcher(trigger_words)
+
 def getCheckedBoxesFromPrompt(prompt):
     global triggerWordChoices
-    checked_boxes = [choice for choice in triggerWordChoices if choice in prompt]
+    if not triggerWordChoices:
+        return []
+    found_words = get_trigger_word_matcher(tuple(triggerWordChoices)).find_all(prompt)
+    checked_boxes = [choice for choice in triggerWordChoices if choice in found_words]
     return checked_boxes
 
 def adjustPromptToCheckBox(checkBoxChange: gr.SelectData, prompt):
     new_prompt = prompt    
-    if checkBoxChange.selected and checkBoxChange.value not in new_prompt:
+    trigger_word_pattern = get_trigger_word_pattern(checkBoxChange.value)
+    if checkBoxChange.selected and not trigger_word_pattern.search(new_prompt):
         new_prompt = f"{checkBoxChange.value} {new_prompt}"
-    elif not checkBoxChange.selected and checkBoxChange.value in new_prompt:
-        new_prompt = re.sub(f"{checkBoxChange.value} ?", "", new_prompt).strip()
+    elif not checkBoxChange.selected and trigger_word_pattern.search(new_prompt):
+        new_prompt = trigger_word_pattern.sub("", new_prompt).strip()
     return new_prompt
 
 def compare_lists(list_a, list_b):
@@ -344,20 +2498,25 @@ def compare_lists(list_a, list_b):
 def model_generation_data_label_text(default=False):
     return f"Model Generation Data{' (default preset)' if default else ''}"
   
+@instrumented
 def handle_text_change(prompt):
     checked_boxes = getCheckedBoxesFromPrompt(prompt)
     return checked_boxes
 
+@instrumented
 def handle_checkbox_change(checkBoxChange: gr.SelectData, prompt):
     new_prompt = adjustPromptToCheckBox(checkBoxChange, prompt)
     return new_prompt
 
+@instrumented
 def save_preset(preset_name_textbox_value, model_generation_data):
     short_hash, model_info = get_model_hash_and_info_from_current_model()
     model_info['presets'][preset_name_textbox_value] = model_generation_data
     save_model_info(short_hash, model_info)
-    return gr.Dropdown.update(choices = list(model_info['presets'].keys()), value = preset_name_textbox_value),  f"{preset_name_textbox_value} saved", model_generation_data_update_return(model_generation_data, preset_name_textbox_value)
+    summary = parse_preset(model_generation_data).summary()
+    return gr.Dropdown.update(choices = list(model_info['presets'].keys()), value = preset_name_textbox_value),  f"{preset_name_textbox_value} saved{f' ({summary})' if summary else ''}", model_generation_data_update_return(model_generation_data, preset_name_textbox_value)
 
+@instrumented
 def rename_preset(preset_dropdown_value, preset_name_textbox_value, model_generation_data):
     short_hash, model_info = get_model_hash_and_info_from_current_model()
     new_current_preset_name = preset_name_textbox_value
@@ -380,6 +2539,7 @@ def rename_preset(preset_dropdown_value, preset_name_textbox_value, model_genera
     save_model_info(short_hash, model_info)
     return gr.Dropdown.update(choices = list(model_info['presets'].keys()), value = new_current_preset_name), message, model_generation_data_update_return(model_generation_data, preset_dropdown_value)
 
+@instrumented
 def delete_preset(preset_dropdown_value, model_generation_data):   
     short_hash, model_info = get_model_hash_and_info_from_current_model()
     del model_info['presets'][preset_dropdown_value]
@@ -389,27 +2549,35 @@ def delete_preset(preset_dropdown_value, model_generation_data):
     formatted_dict = json.dumps(model_info, indent=4)
     return gr.Dropdown.update(choices = list(model_info['presets'].keys()), value = new_current_preset_name), new_current_preset_name, f"Preset {preset_dropdown_value} deleted", model_generation_data_update_return(model_generation_data, new_current_preset_name)
 
+@instrumented
 def update_current_preset(preset_dropdown_value):
     model_hash, model_info = get_model_hash_and_info_from_current_model()
     new_model_generation_data = model_info['presets'].get(preset_dropdown_value,"")
     return preset_dropdown_value, model_generation_data_update_return(new_model_generation_data, preset_dropdown_value)
 
+@instrumented
 def set_default_preset(preset_dropdown_value, model_generation_data):
     short_hash, model_info = get_model_hash_and_info_from_current_model()
     model_info['default_preset'] = preset_dropdown_value
     save_model_info(short_hash, model_info)
     return f"{preset_dropdown_value} set to default", model_generation_data_update_return(model_generation_data, preset_dropdown_value)
 
+@instrumented
 def reveal_presets_file_in_explorer(model_hash):
     if not model_hash:
         return "no presets file for this model or no model retrieved"
         
-    model_info_file_path = initialize_model_info_file(model_hash)
+    if use_sqlite_storage():
+        model_info_file_path = get_sqlite_database_path()
+    else:
+        model_info_file_path = initialize_model_info_file(model_hash)
 
     explorer_path = os.path.join(os.environ["WINDIR"], "explorer.exe")
     explorer_command = f'"{explorer_path}" /e,/select,"{model_info_file_path}"'
+    import subprocess
     subprocess.run(explorer_command, shell=True)
     
+@instrumented
 def get_civitai_preset_sharing_text():
     short_hash, model_info = get_model_hash_and_info_from_current_model()
     return f"###ModelPresets###\n{json.dumps(model_info)}"
@@ -420,10 +2588,32 @@ def get_template_generation_data(includeExamplePrompt):
 Steps: 20, Sampler: Euler a, CFG scale: 7, Size: 512x512, Clip skip: 1
 """)
 
+@instrumented
 def append_template_generation_info(generation_data):
     return generation_data + get_template_generation_data(generation_data == "")
 
 triggerWordChoices = None
+hash_cache = None
+hash_cache_lock = threading.Lock()
+hash_jobs = {}
+hash_jobs_lock = threading.Lock()
+model_info_store = ModelInfoStore()
+sqlite_model_info_store = None
+preset_search_index = PresetSearchIndex()
+model_registry = ModelRegistry()
+model_info_prefetcher = ModelInfoPrefetcher(PREFETCH_CACHE_SIZE)
+startup_timings = {}
+diagnostics = Diagnostics()
+diagnostics.enabled = shared.opts.data.get("model_preset_manager_diagnostics", False)
+civitai_session = None
+civitai_session_lock = threading.Lock()
+download_executor = concurrent.futures.ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS)
+thumbnail_executor = concurrent.futures.ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS)
+thumbnail_futures = {}
+thumbnail_futures_lock = threading.Lock()
+thumbnail_digests = {}
+thumbnail_digests_lock = threading.Lock()
+gallery_thumbnail_cache = GalleryThumbnailCache(get_gallery_cache_directory())
 def on_ui_tabs():
     with gr.Blocks() as custom_tab_interface:
         current_model_textbox = gr.Textbox(interactive=False, label="Current Model:", visible=False) 
@@ -449,6 +2639,8 @@ def on_ui_tabs():
                                 with gr.Row():
                                     retrieve_button = gr.Button("Retrieve Local Model Info", elem_id = "retrieve_model_info_button")
                                     download_button = gr.Button("Download and Overwrite Model Info")
+                                    cancel_download_button = gr.Button("Cancel")
+                                    auto_retrieve_button = gr.Button(visible=False, elem_id = "auto_retrieve_model_info_button")
                                 with gr.Row():
                                     open_model_page_button = gr.Button("Open Model Page")
                                     set_model_url_button = gr.Button("Set Model URL") 
@@ -488,6 +2680,85 @@ def on_ui_tabs():
                                     with gr.Row():
                                         gr.Markdown('<div style="height: 10px;"></div>')
                          
+                with gr.Accordion("Index All Checkpoints", open=False):
+                    with gr.Row():
+                        index_all_checkpoints_button = gr.Button("Hash and Download Info for All Checkpoints")
+                    index_all_checkpoints_textbox = gr.Textbox(interactive=False, label="Index Progress", lines=3)
+
+                with gr.Accordion("Model Gallery", open=False):
+                    with gr.Row():
+                        load_gallery_button = gr.Button("Load Gallery")
+                        previous_gallery_page_button = gr.Button("Previous Page")
+                        gallery_page_number = gr.Number(value=1, precision=0, label="Page")
+                        next_gallery_page_button = gr.Button("Next Page")
+                    gallery_status_textbox = gr.Textbox(interactive=False, label="Gallery Status")
+                    model_gallery = gr.Gallery(label="Models with Presets", show_label=False).style(grid=8, height="auto")
+                    gallery_page_entries = gr.State([])
+                    gallery_model_textbox = gr.Textbox(interactive=False, label="Selected Model", lines=5)
+
+                with gr.Accordion("Batch Apply", open=False):
+                    with gr.Row():
+                        with gr.Column(scale = 4):
+                            batch_query_textbox = gr.Textbox(label="Filter", placeholder="search query across models, or empty for the current model's presets")
+                        with gr.Column(scale = 1):
+                            find_batch_presets_button = gr.Button("Find Presets")
+                    batch_presets_dropdown = gr.Dropdown(multiselect=True, choices=[], label="Selected Presets")
+                    with gr.Row():
+                        batch_only_differences_checkbox = gr.Checkbox(label="Only show differences", value=True)
+                        compare_batch_presets_button = gr.Button("Compare")
+                    batch_diff_dataframe = gr.Dataframe(headers=["Parameter"], interactive=False, wrap=True)
+                    with gr.Row():
+                        batch_output_mode_radio = gr.Radio(choices=["batch", "grid"], value="batch", label="Output")
+                        run_preset_batch_button = gr.Button("Generate", variant="primary")
+                        interrupt_preset_batch_button = gr.Button("Interrupt")
+                    batch_status_textbox = gr.Textbox(interactive=False, label="Batch Status", lines=2)
+                    batch_gallery = gr.Gallery(label="Batch Results", show_label=False).style(grid=4, height="auto")
+
+                with gr.Accordion("Search Presets", open=False):
+                    with gr.Row():
+                        with gr.Column(scale = 4):
+                            search_query_textbox = gr.Textbox(label="Search", placeholder='e.g. portrait sampler:"DPM++ 2M Karras" cfg:5 steps:30 size:512x768 trigger:"my style"')
+                        with gr.Column(scale = 1):
+                            search_button = gr.Button("Search")
+                            rebuild_search_index_button = gr.Button("Rebuild Index")
+                    search_status_textbox = gr.Textbox(interactive=False, label="Search Status")
+                    search_results = gr.Dataframe(headers=["Model Hash", "Preset", "Model URL", "Generation Data"], interactive=False, wrap=True)
+
+                with gr.Accordion("Diagnostics", open=False):
+                    with gr.Row():
+                        diagnostics_enabled_checkbox = gr.Checkbox(label="Record handler timings and I/O counters", value=diagnostics.enabled)
+                        refresh_diagnostics_button = gr.Button("Refresh")
+                        reset_diagnostics_button = gr.Button("Reset")
+                        export_diagnostics_button = gr.Button("Export JSON")
+                    diagnostics_textbox = gr.Textbox(interactive=False, label="Diagnostics", lines=10).style(show_copy_button=True)
+                    diagnostics_file = gr.File(label="Diagnostics Export", interactive=False)
+
+                with gr.Accordion("Import / Export Preset Library", open=False):
+                    with gr.Row():
+                        with gr.Column():
+                            export_library_query_textbox = gr.Textbox(label="Export Filter", placeholder="search query, or empty to export every model")
+                            export_library_button = gr.Button("Export Library")
+                            export_library_file = gr.File(label="Exported Bundle", interactive=False)
+                        with gr.Column():
+                            import_library_file = gr.File(label="Bundle to Import (.ndjson.gz)", file_types=[".gz"])
+                            import_conflict_radio = gr.Radio(choices=["merge", "skip", "overwrite"], value="merge", label="When a model already has presets")
+                            import_library_button = gr.Button("Import Library")
+
+                with gr.Accordion("Preset Storage", open=False):
+                    gr.Markdown("The storage backend is chosen in Settings > Model Preset Manager.")
+                    with gr.Row():
+                        import_json_presets_button = gr.Button("Import Presets Files into SQLite")
+                        export_sqlite_presets_button = gr.Button("Export SQLite to Presets Files")
+
+                with gr.Accordion("Library Maintenance", open=False):
+                    gr.Markdown("Removes empty presets files and duplicate presets. Without a full scan only models saved since the last run are checked; a full scan also removes thumbnails of deleted checkpoints.")
+                    with gr.Row():
+                        maintenance_full_scan_checkbox = gr.Checkbox(label="Full scan", value=False)
+                        maintenance_remove_orphans_checkbox = gr.Checkbox(label="Remove presets of checkpoints no longer on disk", value=False)
+                        maintenance_dry_run_checkbox = gr.Checkbox(label="Dry run", value=True)
+                        run_maintenance_button = gr.Button("Run Maintenance")
+                    maintenance_textbox = gr.Textbox(interactive=False, label="Maintenance Report", lines=10).style(show_copy_button=True)
+
                 with gr.Row():
                     with gr.Column(scale = 4):
                         output_textbox = gr.Textbox(interactive=False, label="Output").style(show_copy_button=True)
@@ -514,8 +2785,11 @@ def on_ui_tabs():
         set_model_url_button.click(fn=set_model_url, inputs=[current_model_textbox, model_url_textbox], outputs=[output_textbox]) 
         append_template_button.click(fn=append_template_generation_info, inputs=[model_generation_data], outputs=[model_generation_data]) 
         
-        download_button.click(fn=download_model_info, inputs=[], outputs=[current_model_textbox, model_url_textbox, image_input, model_generation_data, triggerWords, preset_dropdown, preset_name_textbox, model_hash_textbox])
-        retrieve_button.click(fn=retrieve_model_info_from_disk, inputs=[], outputs=[current_model_textbox, model_url_textbox, image_input, model_generation_data, triggerWords, preset_dropdown, preset_name_textbox, model_hash_textbox])
+        # Hash first so the Model Hash textbox streams progress; the info handlers then hit the hash cache
+        download_event = download_button.click(fn=hash_current_model_with_progress, inputs=[], outputs=[model_hash_textbox], show_progress=False).then(fn=download_model_info, inputs=[], outputs=[current_model_textbox, model_url_textbox, image_input, model_generation_data, triggerWords, preset_dropdown, preset_name_textbox, model_hash_textbox, output_textbox])
+        retrieve_event = retrieve_button.click(fn=hash_current_model_with_progress, inputs=[], outputs=[model_hash_textbox], show_progress=False).then(fn=retrieve_model_info_from_disk, inputs=[], outputs=[current_model_textbox, model_url_textbox, image_input, model_generation_data, triggerWords, preset_dropdown, preset_name_textbox, model_hash_textbox, output_textbox])
+        cancel_download_button.click(fn=None, inputs=[], outputs=[], cancels=[download_event, retrieve_event])
+        auto_retrieve_button.click(fn=show_local_model_info, inputs=[], outputs=[current_model_textbox, model_url_textbox, image_input, model_generation_data, triggerWords, preset_dropdown, preset_name_textbox, model_hash_textbox, output_textbox])
         show_presets_in_explorer_button.click(fn = reveal_presets_file_in_explorer, inputs = [model_hash_textbox], outputs = [output_textbox])
                 
         set_preset_button.click(fn=set_default_preset, inputs=[preset_dropdown, model_generation_data], outputs=[output_textbox, model_generation_data ])                
@@ -523,6 +2797,38 @@ def on_ui_tabs():
         rename_preset_button.click(fn=rename_preset, inputs=[preset_dropdown, preset_name_textbox, model_generation_data], outputs=[preset_dropdown, output_textbox, model_generation_data])
         delete_preset_button.click(fn=delete_preset, inputs=[preset_dropdown, model_generation_data], outputs=[preset_dropdown, preset_name_textbox, output_textbox, model_generation_data])         
         
+        index_all_checkpoints_button.click(fn=index_all_checkpoints, inputs=[], outputs=[index_all_checkpoints_textbox], show_progress=False)
+        
+        gallery_outputs = [model_gallery, gallery_page_number, gallery_status_textbox, gallery_page_entries]
+        load_gallery_button.click(fn=load_gallery_page, inputs=[gallery_page_number], outputs=gallery_outputs)
+        gallery_page_number.submit(fn=load_gallery_page, inputs=[gallery_page_number], outputs=gallery_outputs)
+        previous_gallery_page_button.click(fn=load_previous_gallery_page, inputs=[gallery_page_number], outputs=gallery_outputs)
+        next_gallery_page_button.click(fn=load_next_gallery_page, inputs=[gallery_page_number], outputs=gallery_outputs)
+        model_gallery.select(fn=select_gallery_model, inputs=[gallery_page_entries], outputs=[gallery_model_textbox], show_progress=False)
+        
+        find_batch_presets_button.click(fn=list_batch_preset_choices, inputs=[batch_query_textbox], outputs=[batch_presets_dropdown, batch_status_textbox])
+        batch_query_textbox.submit(fn=list_batch_preset_choices, inputs=[batch_query_textbox], outputs=[batch_presets_dropdown, batch_status_textbox])
+        compare_batch_presets_button.click(fn=diff_batch_presets, inputs=[batch_presets_dropdown, batch_only_differences_checkbox], outputs=[batch_diff_dataframe, batch_status_textbox])
+        run_preset_batch_button.click(fn=run_preset_batch, inputs=[batch_presets_dropdown, batch_output_mode_radio], outputs=[batch_gallery, batch_status_textbox])
+        interrupt_preset_batch_button.click(fn=interrupt_preset_batch, inputs=[], outputs=[])
+        
+        search_button.click(fn=search_presets, inputs=[search_query_textbox], outputs=[search_results, search_status_textbox])
+        search_query_textbox.submit(fn=search_presets, inputs=[search_query_textbox], outputs=[search_results, search_status_textbox])
+        rebuild_search_index_button.click(fn=rebuild_preset_search_index, inputs=[], outputs=[search_status_textbox])
+        
+        diagnostics_enabled_checkbox.change(fn=set_diagnostics_enabled, inputs=[diagnostics_enabled_checkbox], outputs=[diagnostics_textbox], show_progress=False)
+        refresh_diagnostics_button.click(fn=refresh_diagnostics, inputs=[], outputs=[diagnostics_textbox])
+        reset_diagnostics_button.click(fn=reset_diagnostics, inputs=[], outputs=[diagnostics_textbox])
+        export_diagnostics_button.click(fn=export_diagnostics, inputs=[], outputs=[diagnostics_file])
+        
+        export_library_button.click(fn=export_preset_library, inputs=[export_library_query_textbox], outputs=[export_library_file, output_textbox])
+        import_library_button.click(fn=import_preset_library, inputs=[import_library_file, import_conflict_radio], outputs=[output_textbox])
+        
+        import_json_presets_button.click(fn=import_json_presets_into_sqlite, inputs=[], outputs=[output_textbox])
+        export_sqlite_presets_button.click(fn=export_sqlite_presets_to_json, inputs=[], outputs=[output_textbox])
+        
+        run_maintenance_button.click(fn=run_library_maintenance, inputs=[maintenance_full_scan_checkbox, maintenance_remove_orphans_checkbox, maintenance_dry_run_checkbox], outputs=[maintenance_textbox])
+        
         get_civitai_preset_text.click(fn=get_civitai_preset_sharing_text, inputs=[], outputs=[output_textbox])         
         
         model_generation_data.change(fn = handle_text_change, inputs = [model_generation_data], outputs = [triggerWords], show_progress=False)
@@ -532,6 +2838,55 @@ def on_ui_tabs():
 
     return [(custom_tab_interface, "Model Preset Manager", "model preset manager")]
 
+def get_diagnostics_report():
+    report = diagnostics.snapshot()
+    report["startup_ms"] = dict(startup_timings)
+    report["model_info_store"] = get_model_info_store().get_counters()
+    return report
 
-script_callbacks.on_ui_tabs(on_ui_tabs)
+def set_diagnostics_enabled(enabled):
+    diagnostics.enabled = enabled
+    return json.dumps(get_diagnostics_report(), indent=4)
+
+def refresh_diagnostics():
+    return json.dumps(get_diagnostics_report(), indent=4)
+
+def reset_diagnostics():
+    diagnostics.reset()
+    get_model_info_store().reset_counters()
+    return refresh_diagnostics()
+
+def export_diagnostics():
+    import tempfile
+    with tempfile.NamedTemporaryFile("w", prefix="model_preset_manager_diagnostics_", suffix=".json", delete=False) as file:
+        json.dump(get_diagnostics_report(), file, indent=4)
+    return file.name
+
+def timed_on_ui_tabs():
+    start_time = time.perf_counter()
+    try:
+        return on_ui_tabs()
+    finally:
+        elapsed_time = time.perf_counter() - start_time
+        startup_timings["on_ui_tabs_ms"] = round(elapsed_time * 1000, 1)
+        diagnostics.record("on_ui_tabs", elapsed_time)
+        if startup_timings["on_ui_tabs_ms"] > UI_BUILD_TIME_BUDGET_MS:
+            print(f"Model Preset Manager UI took {startup_timings['on_ui_tabs_ms']} ms to build, over its {UI_BUILD_TIME_BUDGET_MS} ms budget")
+
+def on_ui_settings():
+    section = ("model_preset_manager", "Model Preset Manager")
+    shared.opts.add_option("model_preset_manager_storage", shared.OptionInfo("json", "Preset storage backend", gr.Radio, {"choices": ["json", "sqlite"]}, section=section))
+    shared.opts.add_option("model_preset_manager_diagnostics", shared.OptionInfo(False, "Record diagnostics (handler latency, I/O and network counters) from startup", section=section))
+    shared.opts.add_option("model_preset_manager_compact_json", shared.OptionInfo(False, "Write presets files as compact (non-indented) JSON", section=section))
+
+
+script_callbacks.on_ui_tabs(timed_on_ui_tabs)
+script_callbacks.on_ui_settings(on_ui_settings)
+script_callbacks.on_model_loaded(on_model_loaded)
+atexit.register(model_info_store.flush)
+model_registry.start()
+
+startup_timings["module_import_ms"] = round((time.perf_counter() - module_import_start_time) * 1000, 1)
+if startup_timings["module_import_ms"] > IMPORT_TIME_BUDGET_MS:
+    print(f"Model Preset Manager import took {startup_timings['module_import_ms']} ms, over its {IMPORT_TIME_BUDGET_MS} ms budget")
 
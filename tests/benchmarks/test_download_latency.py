@@ -0,0 +1,70 @@
+# Download and Overwrite latency against a stub Civitai server with realistic per-request delays
+import os
+import shutil
+import time
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from helpers import png_bytes
+from test_scraping import read_fixture
+
+LOOKUP_DELAY = 0.1
+PAGE_DELAY = 0.4
+IMAGE_DELAY = 0.4
+
+
+@pytest.fixture
+def delayed_civitai(mpm, civitai):
+    from modules import shared
+
+    shared.opts.data["sd_model_checkpoint"] = "model.safetensors [0123456789]"
+    civitai.add("/models/4201", read_fixture("model_page.html"), content_type="text/html", delay=PAGE_DELAY, chunk_size=4096)
+    image_url = civitai.add("/images/1.png", png_bytes(), content_type="image/png", delay=IMAGE_DELAY)
+    civitai.add_model("0123456789", 4201, ["examplestyle"], image_url, delay=LOOKUP_DELAY)
+    return civitai
+
+
+def reset_downloads(mpm):
+    shutil.rmtree(os.path.join(os.path.dirname(mpm.__file__), mpm.CIVITAI_RESPONSE_CACHE_DIRECTORY_NAME), ignore_errors=True)
+    for path in (mpm.get_thumbnail_path("model"), mpm.get_model_info_file_path("0123456789")):
+        if os.path.exists(path):
+            os.remove(path)
+    mpm.model_info_store.invalidate()
+
+
+def timed(function, elapsed_times):
+    def wrapper():
+        start_time = time.perf_counter()
+        try:
+            return function()
+        finally:
+            elapsed_times.append(time.perf_counter() - start_time)
+    return wrapper
+
+
+@pytest.mark.benchmark(group="download_model_info")
+def test_download_model_info_latency(benchmark, mpm, delayed_civitai):
+    elapsed_times = []
+    outputs = benchmark.pedantic(timed(lambda: list(mpm.download_model_info()), elapsed_times), setup=lambda: reset_downloads(mpm), rounds=3)
+
+    assert outputs[0][7] == "0123456789"
+    assert os.path.exists(mpm.get_thumbnail_path("model"))
+    # The page scrape and the thumbnail download overlap once the lookup returns
+    assert max(elapsed_times) < LOOKUP_DELAY + PAGE_DELAY + IMAGE_DELAY
+
+
+@pytest.mark.benchmark(group="download_model_info")
+def test_download_model_info_first_update_latency(benchmark, mpm, delayed_civitai):
+    def first_update():
+        generator = mpm.download_model_info()
+        try:
+            return next(generator)
+        finally:
+            generator.close()
+
+    elapsed_times = []
+    assert benchmark.pedantic(timed(first_update, elapsed_times), setup=lambda: reset_downloads(mpm), rounds=3)[7] == "0123456789"
+    # The panel renders after the hash lookup, without waiting for the page or the thumbnail
+    assert max(elapsed_times) < LOOKUP_DELAY + min(PAGE_DELAY, IMAGE_DELAY)
@@ -0,0 +1,212 @@
+# Old vs new hot paths, run with pytest-benchmark:
+#   python -m pytest tests/benchmarks --benchmark-autosave
+#   python -m pytest tests/benchmarks --benchmark-compare --benchmark-compare-fail=mean:20%
+import hashlib
+import json
+import os
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from helpers import write_checkpoint
+
+SYNTHETIC_CHECKPOINT_SIZE = 64 * 1024 * 1024
+FIXTURES_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures")
+
+
+def legacy_hash_file(file_path):
+    # The original 4 KB read loop
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for byte_block in iter(lambda: file.read(4096), b""):
+            sha256.update(byte_block)
+    return sha256.hexdigest()
+
+
+def legacy_extract_model_presets(mpm, page_text):
+    # The original scan: whole page in memory, every brace counted by hand, json.loads on each balanced candidate
+    description_index = page_text.find(mpm.CIVITAI_MODEL_DESCRIPTION_TAG)
+    if description_index == -1:
+        return None
+    prefix_index = page_text.find(mpm.CIVITAI_MODEL_DESCRIPTION_PRESET_PREFIX, description_index)
+    if prefix_index == -1:
+        return None
+    opened_braces = 0
+    json_start_index = 0
+    for i in range(prefix_index, len(page_text)):
+        if page_text[i] == "{":
+            if opened_braces == 0:
+                json_start_index = i
+            opened_braces += 1
+        elif page_text[i] == "}" and opened_braces > 0:
+            opened_braces -= 1
+            if opened_braces == 0:
+                try:
+                    return json.loads(page_text[json_start_index:i + 1])
+                except json.JSONDecodeError:
+                    pass
+    return None
+
+
+@pytest.fixture(scope="module")
+def synthetic_checkpoint(tmp_path_factory):
+    webui_directory = str(tmp_path_factory.mktemp("checkpoint"))
+    return write_checkpoint(webui_directory, "synthetic.safetensors", os.urandom(SYNTHETIC_CHECKPOINT_SIZE))
+
+
+@pytest.fixture(scope="module")
+def large_model_page():
+    # The fixture page with a long description in front of the presets, as on real model pages
+    with open(os.path.join(FIXTURES_DIRECTORY, "model_page.html"), "r", encoding="utf-8") as file:
+        page_text = file.read()
+    filler = "<p>Changelog: {v1} tuned {v2} merged {v3} fixed hands.</p>\n" * 20000
+    return page_text.replace("<p>###ModelPresets###</p>", filler + "<p>###ModelPresets###</p>")
+
+
+@pytest.mark.benchmark(group="hash_file")
+def test_legacy_hash_file(benchmark, synthetic_checkpoint):
+    benchmark.pedantic(legacy_hash_file, args=(synthetic_checkpoint,), rounds=3)
+
+
+@pytest.mark.benchmark(group="hash_file")
+def test_hash_file(benchmark, mpm, synthetic_checkpoint):
+    assert benchmark.pedantic(mpm.hash_file, args=(synthetic_checkpoint,), rounds=3) == legacy_hash_file(synthetic_checkpoint)
+
+
+@pytest.mark.benchmark(group="hash_file_with_progress")
+def test_hash_file_with_progress(benchmark, mpm, synthetic_checkpoint):
+    benchmark.pedantic(mpm.hash_file, args=(synthetic_checkpoint, lambda hashed, total: None), rounds=3)
+
+
+@pytest.mark.benchmark(group="extract_model_presets")
+def test_legacy_extract_model_presets(benchmark, mpm, large_model_page):
+    assert benchmark(legacy_extract_model_presets, mpm, large_model_page) is not None
+
+
+@pytest.mark.benchmark(group="extract_model_presets")
+def test_extract_model_presets(benchmark, mpm, large_model_page):
+    page = large_model_page.encode("utf-8")
+    chunks = [page[i:i + mpm.CIVITAI_STREAM_CHUNK_SIZE] for i in range(0, len(page), mpm.CIVITAI_STREAM_CHUNK_SIZE)]
+    expected = legacy_extract_model_presets(mpm, large_model_page)
+    assert benchmark(mpm.extract_model_presets_from_chunks, chunks) == expected
+
+
+@pytest.mark.benchmark(group="load_presets")
+def test_load_presets_cached(benchmark, mpm):
+    model_info = mpm.empty_model_info()
+    model_info["presets"].update({f"preset {i}": f"prompt {i}\nSteps: 20, Sampler: Euler a, CFG scale: 7, Size: 512x512" for i in range(200)})
+    mpm.model_info_store.save("0123456789", model_info)
+    assert benchmark(mpm.model_info_store.get, "0123456789") == model_info
+
+
+def preset_library_model_info(preset_count):
+    model_info = {"url": "https://civitai.com/models/1", "default_preset": "preset 0", "trigger_words": ["examplestyle"], "presets": {}}
+    model_info["presets"].update({f"preset {i}": f"examplestyle, prompt {i}\nNegative prompt: blurry\nSteps: 20, Sampler: Euler a, CFG scale: 7, Size: 512x768" for i in range(preset_count)})
+    return model_info
+
+
+def write_presets_files(mpm, file_count):
+    # Written directly, not through the store, so setting up 10,000 files stays cheap
+    short_hashes = [f"{i:010x}" for i in range(file_count)]
+    os.makedirs(os.path.dirname(mpm.get_model_info_file_path("")), exist_ok=True)
+    model_info_text = json.dumps(preset_library_model_info(5), indent=4)
+    for short_hash in short_hashes:
+        with open(mpm.get_model_info_file_path(short_hash), "w") as file:
+            file.write(model_info_text)
+    return short_hashes
+
+
+def legacy_load_presets_files(mpm, short_hashes):
+    # The original read: open and json.load every file on every call
+    model_infos = []
+    for short_hash in short_hashes:
+        with open(mpm.get_model_info_file_path(short_hash), "r") as file:
+            model_infos.append(json.load(file))
+    return model_infos
+
+
+def legacy_save_model_info(mpm, short_hash, model_info):
+    # The original write: truncate in place and dump with indent=4
+    with open(mpm.get_model_info_file_path(short_hash), "w") as file:
+        json.dump(model_info, file, indent=4)
+
+
+@pytest.mark.benchmark(group="load_presets_files")
+@pytest.mark.parametrize("file_count", [10, 100, 1000, 10000])
+def test_legacy_load_presets_files(benchmark, mpm, file_count):
+    short_hashes = write_presets_files(mpm, file_count)
+    assert len(benchmark.pedantic(legacy_load_presets_files, args=(mpm, short_hashes), rounds=3)) == file_count
+
+
+@pytest.mark.benchmark(group="load_presets_files")
+@pytest.mark.parametrize("file_count", [10, 100, 1000, 10000])
+def test_load_presets_files_cold(benchmark, mpm, file_count):
+    short_hashes = write_presets_files(mpm, file_count)
+    load = lambda: [mpm.model_info_store.get(short_hash, False) for short_hash in short_hashes]
+    assert len(benchmark.pedantic(load, setup=mpm.model_info_store.invalidate, rounds=3)) == file_count
+
+
+@pytest.mark.benchmark(group="load_presets_files")
+@pytest.mark.parametrize("file_count", [10, 100, 1000, 10000])
+def test_load_presets_files_warm(benchmark, mpm, file_count):
+    short_hashes = write_presets_files(mpm, file_count)
+    load = lambda: [mpm.model_info_store.get(short_hash, False) for short_hash in short_hashes]
+    load()
+    assert len(benchmark.pedantic(load, rounds=3)) == file_count
+
+
+@pytest.mark.benchmark(group="save_presets")
+@pytest.mark.parametrize("preset_count", [1, 100, 1000])
+def test_legacy_save_presets(benchmark, mpm, preset_count):
+    os.makedirs(os.path.dirname(mpm.get_model_info_file_path("")), exist_ok=True)
+    benchmark.pedantic(legacy_save_model_info, args=(mpm, "0123456789", preset_library_model_info(preset_count)), rounds=3)
+
+
+@pytest.mark.benchmark(group="save_presets")
+@pytest.mark.parametrize("preset_count", [1, 100, 1000])
+def test_save_presets(benchmark, mpm, preset_count):
+    model_info = preset_library_model_info(preset_count)
+    benchmark.pedantic(mpm.model_info_store.save, args=("0123456789", model_info), rounds=3)
+    assert mpm.model_info_store.read_uncached("0123456789") == model_info
+
+
+@pytest.fixture(scope="module")
+def long_prompt_trigger_words():
+    return [f"style{i}" for i in range(200)] + ["cat", "cat girl", "(detailed:1.2)"]
+
+
+def long_prompt(word_count):
+    words = [f"word{i % 997}" for i in range(word_count)]
+    words[word_count // 2] = "cat girl"
+    words[-1] = "(detailed:1.2)"
+    return ", ".join(words)
+
+
+@pytest.mark.benchmark(group="trigger_word_matching")
+@pytest.mark.parametrize("word_count", [100, 1000, 10000])
+def test_legacy_trigger_word_matching(benchmark, long_prompt_trigger_words, word_count):
+    prompt = long_prompt(word_count)
+    # The original check: one substring scan of the prompt per trigger word
+    assert "cat" in benchmark(lambda: [word for word in long_prompt_trigger_words if word in prompt])
+
+
+@pytest.mark.benchmark(group="trigger_word_matching")
+@pytest.mark.parametrize("word_count", [100, 1000, 10000])
+def test_trigger_word_matching(benchmark, mpm, long_prompt_trigger_words, word_count):
+    prompt = long_prompt(word_count)
+    matcher = mpm.get_trigger_word_matcher(tuple(long_prompt_trigger_words))
+    assert benchmark(matcher.find_all, prompt) == {"cat girl", "cat", "(detailed:1.2)"}
+
+
+@pytest.mark.benchmark(group="thumbnail_generation")
+@pytest.mark.parametrize("size", [(512, 768), (1536, 2304), (3072, 4608)], ids=lambda size: f"{size[0]}x{size[1]}")
+def test_thumbnail_generation(benchmark, mpm, size):
+    import numpy as np
+    from PIL import Image
+
+    image = np.random.default_rng(0).integers(0, 256, (size[1], size[0], 3), dtype=np.uint8)
+    thumbnail_path = mpm.get_thumbnail_path("model")
+    benchmark.pedantic(mpm.write_thumbnail_from_np_array, args=(image, thumbnail_path), rounds=3)
+    with Image.open(thumbnail_path) as img:
+        assert max(img.size) == max(mpm.THUMBNAIL_SIZE)
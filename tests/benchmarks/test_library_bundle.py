@@ -0,0 +1,65 @@
+# Whole-library export and import at 5,000 models, run with pytest-benchmark:
+#   python -m pytest tests/benchmarks/test_library_bundle.py --benchmark-autosave
+import gzip
+import json
+import os
+import shutil
+import time
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+LIBRARY_MODEL_COUNT = 5000
+# The bundle should import in seconds rather than minutes of per-file open/parse/dump calls
+IMPORT_BUDGET_SECONDS = 10
+
+
+def library_model_info(i):
+    presets = {f"preset {j}": f"examplestyle, prompt {i}.{j}\nNegative prompt: blurry\nSteps: 20, Sampler: Euler a, CFG scale: 7, Size: 512x768" for j in range(5)}
+    return {"url": f"https://civitai.com/models/{i}", "default_preset": "preset 0", "trigger_words": ["examplestyle"], "presets": presets}
+
+
+@pytest.fixture
+def library_bundle(tmp_path):
+    bundle_path = tmp_path / "library.ndjson.gz"
+    with gzip.open(bundle_path, "wt", encoding="utf-8") as file:
+        for i in range(LIBRARY_MODEL_COUNT):
+            file.write(json.dumps({"short_hash": f"{i:010x}", "model_info": library_model_info(i)}))
+            file.write("\n")
+    return str(bundle_path)
+
+
+def clear_library(mpm):
+    shutil.rmtree(os.path.dirname(mpm.get_model_info_file_path("")), ignore_errors=True)
+    mpm.model_info_store.invalidate()
+
+
+def timed(function, elapsed_times):
+    def wrapper():
+        start_time = time.perf_counter()
+        try:
+            return function()
+        finally:
+            elapsed_times.append(time.perf_counter() - start_time)
+    return wrapper
+
+
+@pytest.mark.benchmark(group="preset_library")
+def test_import_preset_library(benchmark, mpm, library_bundle):
+    elapsed_times = []
+    summary = benchmark.pedantic(timed(lambda: mpm.import_preset_library(library_bundle, "merge"), elapsed_times), setup=lambda: clear_library(mpm), rounds=3)
+
+    assert summary.startswith(f"{LIBRARY_MODEL_COUNT} imported, 0 merged, 0 skipped, 0 invalid")
+    assert len(mpm.model_info_store.list_model_hashes()) == LIBRARY_MODEL_COUNT
+    assert max(elapsed_times) < IMPORT_BUDGET_SECONDS
+
+
+@pytest.mark.benchmark(group="preset_library")
+def test_export_preset_library(benchmark, mpm, library_bundle):
+    mpm.import_preset_library(library_bundle, "merge")
+    elapsed_times = []
+    bundle_path, summary = benchmark.pedantic(timed(lambda: mpm.export_preset_library(""), elapsed_times), setup=mpm.model_info_store.invalidate, rounds=3)
+
+    assert summary == f"{LIBRARY_MODEL_COUNT} models exported"
+    assert max(elapsed_times) < IMPORT_BUDGET_SECONDS
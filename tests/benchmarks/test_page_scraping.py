@@ -0,0 +1,18 @@
+# Page scraping over the saved-page fixtures, run with pytest-benchmark:
+#   python -m pytest tests/benchmarks --benchmark-autosave
+import os
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+FIXTURES_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures")
+
+
+@pytest.mark.benchmark(group="extract_model_presets_fixtures")
+@pytest.mark.parametrize("fixture_name", ["model_page.html", "model_page_escaped.html", "model_page_brace_decoy.html"])
+def test_extract_model_presets_from_saved_pages(benchmark, mpm, fixture_name):
+    with open(os.path.join(FIXTURES_DIRECTORY, fixture_name), "rb") as file:
+        page = file.read()
+    chunks = [page[i:i + 1000] for i in range(0, len(page), 1000)]
+    assert benchmark(mpm.extract_model_presets_from_chunks, chunks)["default_preset"] == "portrait"
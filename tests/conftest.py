@@ -0,0 +1,41 @@
+import os
+import sys
+
+TESTS_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIRECTORY, "stubs"))
+sys.path.insert(0, TESTS_DIRECTORY)
+
+import pytest
+
+from fake_civitai import FakeCivitai
+from helpers import load_main
+
+
+@pytest.fixture
+def mpm(tmp_path, monkeypatch):
+    # A freshly imported extension rooted in tmp_path, with saves written straight through
+    from modules import sd_models, shared
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(shared.opts, "data", {})
+    monkeypatch.setattr(sd_models, "checkpoints_list", {})
+    module = load_main(str(tmp_path))
+    module.MODEL_INFO_WRITE_DEBOUNCE = 0
+    yield module
+    module.model_info_store.flush()
+    module.download_executor.shutdown(wait=True, cancel_futures=True)
+    module.thumbnail_executor.shutdown(wait=True, cancel_futures=True)
+    if module.civitai_session is not None:
+        module.civitai_session.close()
+
+
+@pytest.fixture
+def civitai(mpm, monkeypatch):
+    server = FakeCivitai()
+    server.start()
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1")
+    mpm.CIVITAI_MODEL_INFO_BY_HASH_URL = f"{server.url}/api/v1/model-versions/by-hash/"
+    mpm.CIVITAI_MODEL_PAGE_BY_ID_URL = f"{server.url}/models/"
+    mpm.CIVITAI_RETRY_BACKOFF = 0
+    yield server
+    server.stop()
@@ -0,0 +1,112 @@
+import http.server
+import threading
+import time
+
+
+class Route:
+    def __init__(self, body, status=200, content_type="application/json", etag=None, failures=0, delay=0, chunk_size=None, chunk_delay=0):
+        self.body = body.encode("utf-8") if isinstance(body, str) else body
+        self.status = status
+        self.content_type = content_type
+        self.etag = etag
+        self.failures = failures
+        self.delay = delay
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+
+
+class FakeCivitaiHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server.fake_civitai
+        server.record(self.path, dict(self.headers))
+        route = server.routes.get(self.path)
+        if route is None:
+            return self.send_body(404, b'{"error": "not found"}', "application/json")
+
+        if route.delay:
+            time.sleep(route.delay)
+        with server.lock:
+            failing = route.failures > 0
+            if failing:
+                route.failures -= 1
+        if failing:
+            return self.send_body(503, b"unavailable", "text/plain")
+
+        if route.etag and self.headers.get("If-None-Match") == route.etag:
+            self.send_response(304)
+            self.send_header("ETag", route.etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if route.chunk_size:
+            return self.send_chunked(route)
+        self.send_body(route.status, route.body, route.content_type, route.etag)
+
+    def send_body(self, status, body, content_type, etag=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_chunked(self, route):
+        # Drips the body out so tests can observe early returns and cancellation
+        self.send_response(route.status)
+        self.send_header("Content-Type", route.content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for i in range(0, len(route.body), route.chunk_size):
+                chunk = route.body[i:i + route.chunk_size]
+                self.wfile.write(f"{len(chunk):x}\r\n".encode("ascii") + chunk + b"\r\n")
+                self.wfile.flush()
+                if route.chunk_delay:
+                    time.sleep(route.chunk_delay)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+
+class FakeCivitai:
+    # Serves registered paths on 127.0.0.1 and records every request it receives
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self.lock = threading.Lock()
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FakeCivitaiHandler)
+        self.server.daemon_threads = True
+        self.server.fake_civitai = self
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def add(self, path, body, **kwargs):
+        self.routes[path] = Route(body, **kwargs)
+        return f"{self.url}{path}"
+
+    def add_model(self, short_hash, model_id, trained_words=(), image_url=None, **kwargs):
+        import json
+        images = [{"url": image_url}] if image_url else []
+        return self.add(f"/api/v1/model-versions/by-hash/{short_hash}", json.dumps({"modelId": model_id, "trainedWords": list(trained_words), "images": images}), **kwargs)
+
+    def record(self, path, headers):
+        with self.lock:
+            self.requests.append((path, headers))
+
+    def request_count(self, path):
+        with self.lock:
+            return sum(1 for request_path, _ in self.requests if request_path == path)
@@ -0,0 +1,57 @@
+import importlib.util
+import io
+import os
+import shutil
+import sys
+import uuid
+
+TESTS_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+STUBS_DIRECTORY = os.path.join(TESTS_DIRECTORY, "stubs")
+REPOSITORY_DIRECTORY = os.path.dirname(TESTS_DIRECTORY)
+MAIN_SCRIPT_PATH = os.path.join(REPOSITORY_DIRECTORY, "scripts", "main.py")
+
+
+def install_extension(webui_directory):
+    # Lays out a WebUI root with the extension's main.py copied in, so presets files, caches and thumbnails land under tmp
+    scripts_directory = os.path.join(webui_directory, "extensions", "model_preset_manager", "scripts")
+    os.makedirs(scripts_directory, exist_ok=True)
+    os.makedirs(os.path.join(webui_directory, "models", "Stable-diffusion"), exist_ok=True)
+    # Copied then renamed, since subprocesses sharing this root may be importing it at the same moment
+    temp_file_path = os.path.join(scripts_directory, f"main.py.{os.getpid()}.tmp")
+    shutil.copy(MAIN_SCRIPT_PATH, temp_file_path)
+    os.replace(temp_file_path, os.path.join(scripts_directory, "main.py"))
+    return scripts_directory
+
+
+def load_main(webui_directory):
+    # Imports a fresh copy of the extension; the caller must already be chdir'ed into webui_directory
+    scripts_directory = install_extension(webui_directory)
+    module_name = f"model_preset_manager_main_{uuid.uuid4().hex}"
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(scripts_directory, "main.py"))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    module.model_registry.ready.wait()
+    return module
+
+
+def stub_environment(*extra_paths):
+    environment = dict(os.environ)
+    environment["PYTHONPATH"] = os.pathsep.join([STUBS_DIRECTORY, TESTS_DIRECTORY, *extra_paths])
+    return environment
+
+
+def write_checkpoint(webui_directory, name, data):
+    file_path = os.path.join(webui_directory, "models", "Stable-diffusion", name)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, "wb") as file:
+        file.write(data)
+    return file_path
+
+
+def png_bytes(size=(600, 400), color=(200, 40, 40)):
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="PNG")
+    return buffer.getvalue()
@@ -0,0 +1,36 @@
+# Minimal stand-in for Gradio 3 so scripts/main.py imports and on_ui_tabs builds outside WebUI
+
+
+class Component:
+    def __init__(self, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def __getattr__(self, name):
+        # .style(), .click(), .change(), .then() ... all chain back to the component
+        return lambda *args, **kwargs: self
+
+    @staticmethod
+    def update(**kwargs):
+        return kwargs
+
+
+class SelectData:
+    def __init__(self, index=None, value=None, selected=True):
+        self.index = index
+        self.value = value
+        self.selected = selected
+
+
+def update(**kwargs):
+    return kwargs
+
+
+def __getattr__(name):
+    return Component
@@ -0,0 +1,13 @@
+class ParamBinding:
+    def __init__(self, paste_button, tabname, source_text_component=None, source_image_component=None, source_tabname=None):
+        self.paste_button = paste_button
+        self.tabname = tabname
+
+
+def create_buttons(tabs_list):
+    import gradio as gr
+    return {tabname: gr.Button(tabname) for tabname in tabs_list}
+
+
+def register_paste_params_button(binding):
+    pass
@@ -0,0 +1,10 @@
+def on_ui_tabs(callback):
+    pass
+
+
+def on_ui_settings(callback):
+    pass
+
+
+def on_model_loaded(callback):
+    pass
@@ -0,0 +1,9 @@
+checkpoints_list = {}
+
+
+def get_closet_checkpoint_match(search_string):
+    return checkpoints_list.get(search_string)
+
+
+def reload_model_weights(sd_model=None, info=None):
+    return sd_model
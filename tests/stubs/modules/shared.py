@@ -0,0 +1,36 @@
+class Options:
+    def __init__(self):
+        self.data = {}
+
+    def add_option(self, key, info):
+        self.data.setdefault(key, info.default)
+
+    def __getattr__(self, name):
+        return self.__dict__["data"].get(name, "")
+
+
+class OptionInfo:
+    def __init__(self, default=None, label="", component=None, component_args=None, section=None, **kwargs):
+        self.default = default
+        self.label = label
+        self.section = section
+
+
+class State:
+    interrupted = False
+    job = ""
+    job_count = 0
+
+    def begin(self):
+        self.interrupted = False
+
+    def end(self):
+        pass
+
+    def interrupt(self):
+        self.interrupted = True
+
+
+opts = Options()
+state = State()
+sd_model = None
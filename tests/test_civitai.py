@@ -0,0 +1,135 @@
+import json
+import os
+import time
+import types
+
+import pytest
+
+from test_scraping import EXPECTED_PRESETS, read_fixture
+
+
+def expire_cache_entry(mpm, url, age):
+    metadata_path, body_path = mpm.get_civitai_response_cache_paths(url)
+    with open(metadata_path) as file:
+        metadata = json.load(file)
+    metadata["fetched_at"] = time.time() - age
+    with open(metadata_path, "w") as file:
+        json.dump(metadata, file)
+
+
+def test_server_errors_are_retried(mpm, civitai):
+    url = civitai.add("/api/v1/model-versions/by-hash/0123456789", '{"modelId": 1}', failures=2)
+
+    assert mpm.civitai_get(url) == (200, b'{"modelId": 1}')
+    assert civitai.request_count("/api/v1/model-versions/by-hash/0123456789") == 3
+
+
+def test_retries_back_off_exponentially(mpm, civitai):
+    mpm.CIVITAI_RETRY_BACKOFF = 0.05
+    url = civitai.add("/api/v1/model-versions/by-hash/0123456789", '{"modelId": 1}', failures=3)
+
+    start_time = time.perf_counter()
+    assert mpm.civitai_get(url) == (200, b'{"modelId": 1}')
+    # No sleep before the first retry, then 2x and 4x the backoff factor
+    assert time.perf_counter() - start_time >= 0.05 * (2 + 4)
+
+
+def test_retries_give_up_after_the_limit(mpm, civitai):
+    import requests
+
+    url = civitai.add("/api/v1/model-versions/by-hash/0123456789", '{"modelId": 1}', failures=mpm.CIVITAI_MAX_RETRIES + 1)
+    with pytest.raises(requests.exceptions.RetryError):
+        mpm.civitai_get(url)
+    assert civitai.request_count("/api/v1/model-versions/by-hash/0123456789") == mpm.CIVITAI_MAX_RETRIES + 1
+
+
+def test_fresh_cache_entries_skip_the_network(mpm, civitai):
+    url = civitai.add("/api/v1/model-versions/by-hash/0123456789", '{"modelId": 1}')
+
+    assert mpm.civitai_get(url) == (200, b'{"modelId": 1}')
+    assert mpm.civitai_get(url) == (200, b'{"modelId": 1}')
+    assert civitai.request_count("/api/v1/model-versions/by-hash/0123456789") == 1
+
+
+def test_stale_cache_entries_are_revalidated(mpm, civitai):
+    url = civitai.add("/api/v1/model-versions/by-hash/0123456789", '{"modelId": 1}', etag='"v1"')
+    mpm.civitai_get(url)
+    expire_cache_entry(mpm, url, mpm.CIVITAI_RESPONSE_CACHE_TTL + 1)
+
+    assert mpm.civitai_get(url) == (200, b'{"modelId": 1}')
+    path, headers = civitai.requests[-1]
+    assert headers.get("If-None-Match") == '"v1"'
+
+    # The 304 refreshed the entry, so the next call is a TTL hit again
+    mpm.civitai_get(url)
+    assert civitai.request_count("/api/v1/model-versions/by-hash/0123456789") == 2
+
+
+def test_streamed_bodies_are_cached_once_fully_read(mpm, civitai):
+    url = civitai.add("/models/1", "x" * 5000, content_type="text/html", chunk_size=1000)
+
+    status_code, chunks = mpm.civitai_get(url, stream=True)
+    assert b"".join(chunks) == b"x" * 5000
+    status_code, chunks = mpm.civitai_get(url, stream=True)
+    assert b"".join(chunks) == b"x" * 5000
+    assert civitai.request_count("/models/1") == 1
+
+
+
+def test_streams_stopped_early_are_not_cached_as_the_full_body(mpm, civitai):
+    body = b"x" * (4 * mpm.CIVITAI_STREAM_CHUNK_SIZE)
+    url = civitai.add("/models/1", body, content_type="text/html", chunk_size=mpm.CIVITAI_STREAM_CHUNK_SIZE)
+
+    status_code, chunks = mpm.civitai_get(url, stream=True)
+    next(chunks)
+    chunks.close()
+
+    status_code, chunks = mpm.civitai_get(url, stream=True)
+    assert (status_code, b"".join(chunks)) == (200, body)
+    assert civitai.request_count("/models/1") == 2
+
+
+def test_streams_stopped_early_cache_their_prefix_under_its_own_key(mpm, civitai):
+    body = b"x" * (4 * mpm.CIVITAI_STREAM_CHUNK_SIZE)
+    url = civitai.add("/models/1", body, content_type="text/html", chunk_size=mpm.CIVITAI_STREAM_CHUNK_SIZE)
+
+    status_code, chunks = mpm.civitai_get(url, stream=True)
+    next(chunks)
+    chunks.close()
+
+    status_code, chunks = mpm.civitai_get(url, stream=True, accept_prefix=True)
+    prefix = b"".join(chunks)
+    assert status_code == 206
+    assert 0 < len(prefix) < len(body)
+    assert civitai.request_count("/models/1") == 1
+
+
+def test_scraping_reuses_the_cached_prefix(mpm, civitai):
+    url = civitai.add("/models/1", read_fixture("model_page.html"), content_type="text/html")
+
+    assert mpm.get_model_presets_from_civitai_model_url(url)["presets"] == EXPECTED_PRESETS
+    assert mpm.get_model_presets_from_civitai_model_url(url)["presets"] == EXPECTED_PRESETS
+    assert civitai.request_count("/models/1") == 1
+
+
+def test_scraping_reads_the_whole_page_when_the_cached_prefix_has_no_presets(mpm, civitai):
+    page = read_fixture("model_page.html")
+    url = civitai.add("/models/1", page, content_type="text/html")
+    mpm.save_civitai_response_cache_entry(mpm.get_civitai_response_prefix_url(url), types.SimpleNamespace(headers={}), page[:100])
+
+    assert mpm.get_model_presets_from_civitai_model_url(url)["presets"] == EXPECTED_PRESETS
+    assert civitai.request_count("/models/1") == 1
+
+def test_maintenance_prunes_expired_responses(mpm, civitai):
+    fresh_url = civitai.add("/api/v1/model-versions/by-hash/0123456789", '{"modelId": 1}')
+    expired_url = civitai.add("/api/v1/model-versions/by-hash/9876543210", '{"modelId": 2}')
+    mpm.civitai_get(fresh_url)
+    mpm.civitai_get(expired_url)
+    expire_cache_entry(mpm, expired_url, mpm.CIVITAI_RESPONSE_CACHE_MAX_AGE + 1)
+
+    assert "1 expired Civitai responses would be pruned" in mpm.run_library_maintenance(True, False, True)
+    assert all(os.path.exists(path) for path in mpm.get_civitai_response_cache_paths(expired_url))
+
+    assert "1 expired Civitai responses pruned" in mpm.run_library_maintenance(True, False, False)
+    assert not any(os.path.exists(path) for path in mpm.get_civitai_response_cache_paths(expired_url))
+    assert all(os.path.exists(path) for path in mpm.get_civitai_response_cache_paths(fresh_url))
@@ -0,0 +1,87 @@
+import os
+import threading
+import time
+
+from helpers import png_bytes
+from test_scraping import read_fixture
+
+
+def slow_model_page(civitai, path="/models/4201"):
+    # The description, and so the presets, only arrive after about 10 s of dripped filler
+    page = read_fixture("model_page.html").replace(b"<main>", b"<main>" + b"<p>filler</p>" * 2000)
+    return civitai.add(path, page, content_type="text/html", chunk_size=len(page) // 100, chunk_delay=0.1)
+
+
+def test_cancellation_stops_a_scrape_that_is_already_reading(mpm, civitai):
+    model_url = slow_model_page(civitai)
+    cancellation = mpm.Cancellation()
+    result = {}
+    worker = threading.Thread(target=lambda: result.setdefault("presets", mpm.get_model_presets_from_civitai_model_url(model_url, cancellation)))
+    worker.start()
+    time.sleep(0.5)
+
+    start_time = time.perf_counter()
+    cancellation.cancel()
+    worker.join(5)
+
+    assert not worker.is_alive()
+    assert time.perf_counter() - start_time < 1
+    assert result == {"presets": None}
+    # A cancelled read never leaves a truncated page in the response cache
+    assert mpm.load_civitai_response_cache_entry(model_url) is None
+
+
+def test_cancel_before_the_response_arrives(mpm, civitai):
+    model_url = civitai.add("/models/4201", read_fixture("model_page.html"), content_type="text/html")
+    cancellation = mpm.Cancellation()
+    cancellation.cancel()
+
+    assert mpm.get_model_presets_from_civitai_model_url(model_url, cancellation) is None
+
+
+def test_closing_download_model_info_cancels_the_scrape(mpm, civitai):
+    from modules import shared
+
+    shared.opts.data["sd_model_checkpoint"] = "model.safetensors [0123456789]"
+    slow_model_page(civitai)
+    civitai.add_model("0123456789", 4201, ["examplestyle"])
+
+    generator = mpm.download_model_info()
+    first_outputs = next(generator)
+    assert first_outputs[1] == f"{civitai.url}/models/4201"
+    time.sleep(0.5)
+
+    start_time = time.perf_counter()
+    generator.close()
+    mpm.download_executor.shutdown(wait=True)
+    assert time.perf_counter() - start_time < 1
+
+
+
+def test_download_model_info_reports_a_timeout(mpm, civitai):
+    from modules import shared
+
+    shared.opts.data["sd_model_checkpoint"] = "model.safetensors [0123456789]"
+    slow_model_page(civitai)
+    civitai.add_model("0123456789", 4201, ["examplestyle"])
+    mpm.DOWNLOAD_MODEL_INFO_TIMEOUT = 0.5
+
+    outputs = list(mpm.download_model_info())
+
+    assert outputs[0][7] == "0123456789"
+    assert outputs[-1][8] == "Model info download timed out after 0.5 seconds, showing what arrived so far"
+
+def test_download_model_info_saves_scraped_presets(mpm, civitai):
+    from modules import shared
+
+    shared.opts.data["sd_model_checkpoint"] = "model.safetensors [0123456789]"
+    civitai.add("/models/4201", read_fixture("model_page.html"), content_type="text/html")
+    image_url = civitai.add("/images/1.png", png_bytes(), content_type="image/png")
+    civitai.add_model("0123456789", 4201, ["examplestyle"], image_url)
+
+    outputs = list(mpm.download_model_info())
+
+    assert mpm.model_info_store.get("0123456789")["default_preset"] == "portrait"
+    assert outputs[0][7] == "0123456789"
+    mpm.thumbnail_futures[mpm.get_thumbnail_path("model")].result()
+    assert os.path.exists(mpm.get_thumbnail_path("model"))
@@ -0,0 +1,103 @@
+import hashlib
+import os
+
+from helpers import write_checkpoint
+
+
+def test_hash_file_matches_sha256_with_and_without_progress(mpm, tmp_path):
+    data = os.urandom(3 * mpm.HASH_BUFFER_SIZE + 17)
+    file_path = write_checkpoint(str(tmp_path), "model.safetensors", data)
+    progress = []
+
+    assert mpm.hash_file(file_path) == hashlib.sha256(data).hexdigest()
+    assert mpm.hash_file(file_path, lambda hashed, total: progress.append((hashed, total))) == hashlib.sha256(data).hexdigest()
+    assert progress[-1] == (len(data), len(data))
+
+
+def test_short_hash_is_cached_by_size_and_mtime(mpm, tmp_path):
+    file_path = write_checkpoint(str(tmp_path), "model.safetensors", b"first checkpoint")
+    mpm.model_registry.refresh()
+
+    assert mpm.get_short_hash_from_filename("model.safetensors") == hashlib.sha256(b"first checkpoint").hexdigest()[:10]
+    assert mpm.get_cached_short_hash(file_path) == hashlib.sha256(b"first checkpoint").hexdigest()[:10]
+
+    # A reloaded cache is trusted only while the file is unchanged
+    mpm.hash_cache = None
+    assert mpm.get_cached_short_hash(file_path) == hashlib.sha256(b"first checkpoint").hexdigest()[:10]
+    with open(file_path, "wb") as file:
+        file.write(b"second checkpoint, longer")
+    assert mpm.get_cached_short_hash(file_path) is None
+
+
+def test_concurrent_callers_share_one_hash_job(mpm, tmp_path):
+    file_path = write_checkpoint(str(tmp_path), "model.safetensors", os.urandom(1024))
+    first_job = mpm.start_hash_job(file_path)
+    second_job = mpm.start_hash_job(file_path)
+    first_job.done.wait()
+
+    assert first_job is second_job or second_job.done.is_set()
+    assert first_job.error is None
+
+
+def test_bracketed_hash_skips_hashing(mpm):
+    assert mpm.get_short_hash_from_filename("missing.safetensors [0123456789]") == "0123456789"
+
+
+def test_hash_cache_saves_from_several_processes_never_collide(mpm, tmp_path):
+    import json
+    import subprocess
+    import sys
+
+    from helpers import stub_environment
+
+    scripts_directory = os.path.dirname(mpm.__file__)
+    script = (
+        "import json, os, sys, threading\n"
+        "from helpers import load_main\n"
+        "mpm = load_main(os.getcwd())\n"
+        "def save(i):\n"
+        "    for j in range(50):\n"
+        "        with mpm.hash_cache_lock:\n"
+        "            mpm.load_hash_cache()[f'{sys.argv[1]}-{i}-{j}'] = {'short_hash': '0123456789'}\n"
+        "            mpm.save_hash_cache()\n"
+        "threads = [threading.Thread(target=save, args=(i,)) for i in range(4)]\n"
+        "[thread.start() for thread in threads]\n"
+        "[thread.join() for thread in threads]\n"
+    )
+    processes = [subprocess.Popen([sys.executable, "-c", script, str(n)], cwd=str(tmp_path), env=stub_environment()) for n in range(3)]
+    assert [process.wait(timeout=60) for process in processes] == [0, 0, 0]
+
+    with open(os.path.join(scripts_directory, mpm.HASH_CACHE_FILE_NAME)) as file:
+        assert json.load(file)
+    assert [name for name in os.listdir(scripts_directory) if name.endswith(".tmp")] == []
+
+
+def test_registry_hash_is_dropped_when_the_checkpoint_is_overwritten(mpm, tmp_path):
+    file_path = write_checkpoint(str(tmp_path), "model.safetensors", b"first checkpoint")
+    mpm.model_registry.refresh()
+    assert mpm.get_short_hash_from_filename("model.safetensors") == hashlib.sha256(b"first checkpoint").hexdigest()[:10]
+    assert mpm.get_known_short_hash("model.safetensors") == hashlib.sha256(b"first checkpoint").hexdigest()[:10]
+
+    write_checkpoint(str(tmp_path), "model.safetensors", b"second checkpoint")
+    os.utime(file_path, ns=(os.stat(file_path).st_atime_ns, os.stat(file_path).st_mtime_ns + 1_000_000_000))
+
+    assert mpm.get_known_short_hash("model.safetensors") is None
+    assert mpm.model_registry.resolve("model.safetensors").presets_file_path is None
+    assert mpm.get_checkpoint_short_hashes() is None
+    assert mpm.get_short_hash_from_filename("model.safetensors") == hashlib.sha256(b"second checkpoint").hexdigest()[:10]
+    assert mpm.get_known_short_hash("model.safetensors") == hashlib.sha256(b"second checkpoint").hexdigest()[:10]
+
+
+def test_webui_short_hash_is_checked_against_the_file(mpm, tmp_path):
+    from types import SimpleNamespace
+
+    from modules import sd_models
+
+    file_path = write_checkpoint(str(tmp_path), os.path.join("..", "elsewhere", "model.safetensors"), b"webui checkpoint")
+    sd_models.checkpoints_list["model.safetensors [abcdef0123]"] = SimpleNamespace(filename=file_path, name="model.safetensors", title="model.safetensors [abcdef0123]", shorthash="abcdef0123")
+    mpm.model_registry.refresh()
+    assert mpm.get_known_short_hash("model.safetensors") == "abcdef0123"
+
+    with open(file_path, "ab") as file:
+        file.write(b" replaced")
+    assert mpm.get_known_short_hash("model.safetensors") is None
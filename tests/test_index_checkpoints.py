@@ -0,0 +1,52 @@
+import hashlib
+import os
+
+from helpers import png_bytes, write_checkpoint
+
+
+def short_hash_of(data):
+    return hashlib.sha256(data).hexdigest()[:10]
+
+
+def test_index_all_checkpoints_reports_errors_per_model(mpm, civitai, tmp_path):
+    checkpoints = {"found.safetensors": b"found on civitai", "nested/also found.ckpt": b"also on civitai", "missing.safetensors": b"never uploaded"}
+    for name, data in checkpoints.items():
+        write_checkpoint(str(tmp_path), name, data)
+    image_url = civitai.add("/images/found.png", png_bytes(), content_type="image/png")
+    civitai.add_model(short_hash_of(b"found on civitai"), 11, ["foundstyle"], image_url)
+    civitai.add_model(short_hash_of(b"also on civitai"), 12, ["alsostyle"])
+
+    progress = list(mpm.index_all_checkpoints())
+
+    assert progress[0].startswith("0/3 checkpoints indexed")
+    assert progress[-1].startswith("3/3 checkpoints indexed, 1 errors")
+    assert f"missing.safetensors: {short_hash_of(b'never uploaded')} not found on Civitai" in progress[-1]
+
+    model_info = mpm.model_info_store.get(short_hash_of(b"found on civitai"))
+    assert model_info["url"] == f"{civitai.url}/models/11"
+    assert model_info["trigger_words"] == ["foundstyle"]
+    assert mpm.model_info_store.get(short_hash_of(b"also on civitai"))["trigger_words"] == ["alsostyle"]
+    assert mpm.model_info_store.get(short_hash_of(b"never uploaded"), False) is None
+    assert os.path.exists(mpm.get_thumbnail_path("found"))
+    assert not os.path.exists(mpm.get_thumbnail_path(os.path.join("nested", "also found")))
+
+    # Every checkpoint was hashed once and is now served from the hash cache
+    for name, data in checkpoints.items():
+        assert mpm.get_cached_short_hash(os.path.join(mpm.CHECKPOINT_DIRECTORY, name)) == short_hash_of(data)
+
+
+def test_index_all_checkpoints_survives_server_errors(mpm, civitai, tmp_path):
+    write_checkpoint(str(tmp_path), "flaky.safetensors", b"flaky")
+    write_checkpoint(str(tmp_path), "down.safetensors", b"down")
+    civitai.add_model(short_hash_of(b"flaky"), 21, failures=1)
+    civitai.add_model(short_hash_of(b"down"), 22, failures=mpm.CIVITAI_MAX_RETRIES + 1)
+
+    progress = list(mpm.index_all_checkpoints())
+
+    assert progress[-1].startswith("2/2 checkpoints indexed, 1 errors")
+    assert "down.safetensors:" in progress[-1]
+    assert mpm.model_info_store.get(short_hash_of(b"flaky"))["url"] == f"{civitai.url}/models/21"
+
+
+def test_index_all_checkpoints_without_checkpoints(mpm):
+    assert list(mpm.index_all_checkpoints()) == [f"no checkpoints found in {mpm.CHECKPOINT_DIRECTORY}"]
@@ -0,0 +1,79 @@
+import hashlib
+import os
+
+from helpers import write_checkpoint
+
+
+def save_presets(mpm, short_hash):
+    model_info = mpm.empty_model_info()
+    model_info["presets"]["portrait"] = "a portrait\nSteps: 20, Sampler: Euler a, CFG scale: 7, Size: 512x768"
+    mpm.model_info_store.save(short_hash, model_info)
+
+
+def test_orphans_are_removed_once_every_checkpoint_is_hashed(mpm, tmp_path):
+    write_checkpoint(str(tmp_path), "model.safetensors", b"checkpoint")
+    mpm.model_registry.refresh()
+    live_short_hash = mpm.get_short_hash_from_filename("model.safetensors")
+    assert live_short_hash == hashlib.sha256(b"checkpoint").hexdigest()[:10]
+    save_presets(mpm, live_short_hash)
+    save_presets(mpm, "0123456789")
+
+    summary = mpm.run_library_maintenance(True, True, False)
+
+    assert "removed 0 empty and 1 orphaned presets files" in summary
+    assert os.path.exists(mpm.get_model_info_file_path(live_short_hash))
+    assert not os.path.exists(mpm.get_model_info_file_path("0123456789"))
+
+
+def test_orphan_check_is_skipped_without_registered_checkpoints(mpm):
+    save_presets(mpm, "0123456789")
+    assert mpm.get_checkpoint_short_hashes() is None
+
+    summary = mpm.run_library_maintenance(True, True, False)
+
+    assert "0 orphaned presets files" in summary
+    assert "orphan check skipped" in summary
+    assert os.path.exists(mpm.get_model_info_file_path("0123456789"))
+
+
+def test_orphan_check_is_skipped_while_the_registry_is_not_ready(mpm, tmp_path):
+    write_checkpoint(str(tmp_path), "model.safetensors", b"checkpoint")
+    mpm.model_registry.refresh()
+    mpm.get_short_hash_from_filename("model.safetensors")
+    save_presets(mpm, "0123456789")
+    mpm.model_registry.ready.clear()
+    mpm.MODEL_REGISTRY_POLL_INTERVAL = 0.01
+
+    summary = mpm.run_library_maintenance(True, True, False)
+
+    assert "orphan check skipped" in summary
+    assert os.path.exists(mpm.get_model_info_file_path("0123456789"))
+
+
+def test_orphan_check_is_skipped_while_a_checkpoint_is_unhashed(mpm, tmp_path):
+    write_checkpoint(str(tmp_path), "model.safetensors", b"checkpoint")
+    mpm.model_registry.refresh()
+    save_presets(mpm, "0123456789")
+
+    assert mpm.get_checkpoint_short_hashes() is None
+    assert "orphan check skipped" in mpm.run_library_maintenance(True, True, False)
+    assert os.path.exists(mpm.get_model_info_file_path("0123456789"))
+
+
+def test_zero_byte_and_truncated_presets_files_count_as_empty(mpm):
+    save_presets(mpm, "0123456789")
+    os.makedirs(os.path.dirname(mpm.get_model_info_file_path("")), exist_ok=True)
+    open(mpm.get_model_info_file_path("1111111111"), "w").close()
+    with open(mpm.get_model_info_file_path("2222222222"), "w") as file:
+        file.write('{"url": "", "default_preset": "default", "pres')
+
+    summary = mpm.run_library_maintenance(True, False, True)
+    assert "would remove 2 empty and 0 orphaned presets files" in summary
+    assert "empty: 1111111111 (unreadable)" in summary
+    assert "empty: 2222222222 (unreadable)" in summary
+    assert os.path.exists(mpm.get_model_info_file_path("1111111111"))
+
+    assert "removed 2 empty and 0 orphaned presets files" in mpm.run_library_maintenance(True, False, False)
+    assert not os.path.exists(mpm.get_model_info_file_path("1111111111"))
+    assert not os.path.exists(mpm.get_model_info_file_path("2222222222"))
+    assert os.path.exists(mpm.get_model_info_file_path("0123456789"))
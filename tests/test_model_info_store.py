@@ -0,0 +1,146 @@
+import json
+import os
+import types
+
+
+def test_get_never_creates_files(mpm):
+    assert mpm.model_info_store.get("0123456789") == mpm.empty_model_info()
+    assert mpm.model_info_store.get("0123456789", False) is None
+    assert not os.path.exists(mpm.get_model_info_file_path("0123456789"))
+
+
+def test_save_then_load_round_trips(mpm):
+    model_info = mpm.empty_model_info()
+    model_info["presets"]["portrait"] = "a portrait\nSteps: 20, Sampler: Euler a, CFG scale: 7, Size: 512x768"
+    mpm.model_info_store.save("0123456789", model_info)
+
+    with open(mpm.get_model_info_file_path("0123456789")) as file:
+        assert json.load(file) == model_info
+    assert mpm.model_info_store.get("0123456789") == model_info
+
+
+def test_get_returns_copies(mpm):
+    mpm.model_info_store.save("0123456789", mpm.empty_model_info())
+    model_info = mpm.model_info_store.get("0123456789")
+    model_info["presets"]["changed"] = "not saved"
+
+    assert "changed" not in mpm.model_info_store.get("0123456789")["presets"]
+
+
+def test_external_rewrite_is_picked_up(mpm):
+    mpm.model_info_store.save("0123456789", mpm.empty_model_info())
+    assert mpm.model_info_store.get("0123456789")["url"] == ""
+
+    model_info = mpm.empty_model_info()
+    model_info["url"] = "https://example.com/model"
+    with open(mpm.get_model_info_file_path("0123456789"), "w") as file:
+        json.dump(model_info, file, indent=8)
+
+    assert mpm.model_info_store.get("0123456789")["url"] == "https://example.com/model"
+
+
+def test_debounced_saves_coalesce(mpm):
+    mpm.MODEL_INFO_WRITE_DEBOUNCE = 60
+    for i in range(5):
+        model_info = mpm.empty_model_info()
+        model_info["presets"]["default"] = f"prompt {i}"
+        mpm.model_info_store.save("0123456789", model_info)
+
+    assert mpm.model_info_store.get("0123456789")["presets"]["default"] == "prompt 4"
+    assert not os.path.exists(mpm.get_model_info_file_path("0123456789"))
+    mpm.model_info_store.flush_timer.cancel()
+    mpm.model_info_store.flush()
+
+    counters = mpm.model_info_store.get_counters()
+    assert counters["disk_writes"] == 1
+    assert counters["coalesced_writes"] == 4
+
+
+def test_save_preset_handler(mpm):
+    from modules import shared
+
+    shared.opts.data["sd_model_checkpoint"] = "model.safetensors [0123456789]"
+    mpm.save_preset("portrait", "a portrait\nSteps: 30, Sampler: DPM++ 2M, CFG scale: 5.5, Size: 512x768")
+
+    model_info = mpm.model_info_store.get("0123456789")
+    assert model_info["presets"]["portrait"] == "a portrait\nSteps: 30, Sampler: DPM++ 2M, CFG scale: 5.5, Size: 512x768"
+    assert mpm.parse_preset(model_info["presets"]["portrait"]).summary() == "Steps 30, DPM++ 2M, CFG 5.5, 512x768"
+
+
+def test_merge_keeps_changes_from_both_sides(mpm):
+    base = mpm.empty_model_info()
+    base["presets"].update({"kept": "a", "ours changed": "b", "ours deleted": "c", "theirs changed": "d"})
+    ours = json.loads(json.dumps(base))
+    ours["presets"].update({"ours changed": "b2", "ours added": "e"})
+    del ours["presets"]["ours deleted"]
+    ours["default_preset"] = "ours added"
+    theirs = json.loads(json.dumps(base))
+    theirs["presets"].update({"theirs changed": "d2", "theirs added": "f"})
+    theirs["url"] = "https://example.com/theirs"
+
+    merged = mpm.merge_concurrent_model_info(base, ours, theirs)
+
+    assert merged["presets"] == {"default": "", "kept": "a", "ours changed": "b2", "theirs changed": "d2", "theirs added": "f", "ours added": "e"}
+    assert merged["url"] == "https://example.com/theirs"
+    assert merged["default_preset"] == "ours added"
+
+
+def test_flush_merges_onto_a_file_changed_by_another_process(mpm):
+    model_info = mpm.empty_model_info()
+    model_info["presets"]["first"] = "a"
+    mpm.model_info_store.save("0123456789", model_info)
+
+    model_info = mpm.model_info_store.get("0123456789")
+    model_info["presets"]["ours"] = "b"
+
+    other_model_info = mpm.empty_model_info()
+    other_model_info["presets"].update({"first": "a", "theirs": "c"})
+    with open(mpm.get_model_info_file_path("0123456789"), "w") as file:
+        json.dump(other_model_info, file)
+
+    mpm.model_info_store.save("0123456789", model_info)
+    with open(mpm.get_model_info_file_path("0123456789")) as file:
+        assert json.load(file)["presets"] == {"default": "", "first": "a", "theirs": "c", "ours": "b"}
+
+
+def test_concurrent_saves_from_several_processes_keep_every_preset(mpm, tmp_path):
+    import subprocess
+    import sys
+
+    from helpers import stub_environment
+
+    process_count = 4
+    saves_per_process = 25
+    script = (
+        "import os, sys\n"
+        "from helpers import load_main\n"
+        "mpm = load_main(os.getcwd())\n"
+        "mpm.MODEL_INFO_WRITE_DEBOUNCE = 0\n"
+        "for i in range(int(sys.argv[2])):\n"
+        "    model_info = mpm.model_info_store.get('0123456789')\n"
+        "    model_info['presets'][f'process {sys.argv[1]} preset {i}'] = f'prompt {i}'\n"
+        "    mpm.model_info_store.save('0123456789', model_info)\n"
+    )
+    processes = [subprocess.Popen([sys.executable, "-c", script, str(n), str(saves_per_process)], cwd=str(tmp_path), env=stub_environment()) for n in range(process_count)]
+    assert [process.wait(timeout=120) for process in processes] == [0] * process_count
+
+    with open(mpm.get_model_info_file_path("0123456789")) as file:
+        presets = json.load(file)["presets"]
+    assert len(presets) == 1 + process_count * saves_per_process
+    assert [name for name in os.listdir(os.path.dirname(mpm.get_model_info_file_path("0123456789"))) if name.endswith(".tmp")] == []
+
+
+def test_windows_lock_keeps_polling_while_another_instance_holds_it(mpm, monkeypatch, tmp_path):
+    attempts = []
+
+    def locking(fileno, mode, size):
+        attempts.append(mode)
+        if len(attempts) <= 3:
+            raise OSError("locked by another process")
+
+    monkeypatch.setattr(mpm, "msvcrt", types.SimpleNamespace(locking=locking, LK_NBLCK=2), raising=False)
+    mpm.PRESETS_LOCK_RETRY_INTERVAL = 0
+    with open(tmp_path / ".lock", "a+b") as lock_file:
+        mpm.lock_windows_file(lock_file)
+
+    assert attempts == [2] * 4
@@ -0,0 +1,98 @@
+import pytest
+
+PORTRAIT = "a portrait\nNegative prompt: blurry\nSteps: 28, Sampler: Euler a, CFG scale: 5, Size: 512x768, Seed: 42"
+CLOSEUP = "a closeup\nNegative prompt: blurry\nSteps: 28, Sampler: DPM++ 2M, CFG scale: 5, Size: 512x768, Clip skip: 2"
+LANDSCAPE = "a landscape\nSteps: 20, Sampler: Euler a, CFG scale: 7, Size: 768x512"
+
+
+@pytest.fixture
+def batch_library(mpm):
+    for short_hash, presets in (("0123456789", {"portrait": PORTRAIT, "closeup": CLOSEUP}), ("9876543210", {"landscape": LANDSCAPE})):
+        model_info = mpm.empty_model_info()
+        model_info["presets"].update(presets)
+        mpm.model_info_store.save(short_hash, model_info)
+
+
+def test_resolve_batch_presets_reports_missing_labels(mpm, batch_library):
+    labels = ["a [0123456789] / portrait", "b [9876543210] / landscape", "a [0123456789] / deleted", "c [5555555555] / portrait", "not a label", "a [0123456789] / default"]
+
+    resolved, missing = mpm.resolve_batch_presets(labels)
+
+    assert [(short_hash, preset_name, label) for short_hash, preset_name, label, preset in resolved] == [("0123456789", "portrait", labels[0]), ("9876543210", "landscape", labels[1])]
+    assert resolved[0][3] is mpm.parse_preset(PORTRAIT)
+    # The empty default preset has nothing to run, so it counts as missing too
+    assert missing == labels[2:]
+
+
+def test_diff_batch_presets_lists_every_parameter(mpm, batch_library):
+    table, status = mpm.diff_batch_presets(["a [0123456789] / portrait", "a [0123456789] / closeup"], False)
+
+    assert table["headers"] == ["Parameter", "a [0123456789] / portrait", "a [0123456789] / closeup"]
+    assert table["data"] == [
+        ["Prompt", "a portrait", "a closeup"],
+        ["Negative prompt", "blurry", "blurry"],
+        ["Steps", "28", "28"],
+        ["Sampler", "Euler a", "DPM++ 2M"],
+        ["CFG scale", "5", "5"],
+        ["Size", "512x768", "512x768"],
+        ["Seed", "42", ""],
+        ["Clip skip", "", "2"],
+    ]
+    assert status == "8 parameters compared across 2 presets"
+
+
+def test_diff_batch_presets_can_show_only_differences(mpm, batch_library):
+    table, status = mpm.diff_batch_presets(["a [0123456789] / portrait", "a [0123456789] / closeup", "a [0123456789] / deleted"], True)
+
+    assert [row[0] for row in table["data"]] == ["Prompt", "Sampler", "Seed", "Clip skip"]
+    assert status == "4 parameters compared across 2 presets, 1 no longer found: a [0123456789] / deleted"
+
+
+def test_diff_batch_presets_of_identical_presets_keeps_a_placeholder_row(mpm, batch_library):
+    table, status = mpm.diff_batch_presets(["a [0123456789] / portrait", "a [0123456789] / portrait"], True)
+
+    assert table["data"] == [["", "", ""]]
+    assert mpm.diff_batch_presets([], True) == ({"headers": ["Parameter"], "data": [[""]]}, "no presets selected")
+
+
+def test_group_batch_presets_by_model_puts_the_loaded_model_first(mpm, batch_library):
+    from modules import shared
+
+    resolved, missing = mpm.resolve_batch_presets(["a [0123456789] / portrait", "b [9876543210] / landscape", "a [0123456789] / closeup"])
+
+    shared.opts.data["sd_model_checkpoint"] = "elsewhere.safetensors [5555555555]"
+    groups = mpm.group_batch_presets_by_model(resolved)
+    assert list(groups) == ["0123456789", "9876543210"]
+    assert [label for label, preset in groups["0123456789"]] == ["a [0123456789] / portrait", "a [0123456789] / closeup"]
+
+    shared.opts.data["sd_model_checkpoint"] = "b.safetensors [9876543210]"
+    assert list(mpm.group_batch_presets_by_model(resolved)) == ["9876543210", "0123456789"]
+
+
+def test_preset_processing_arguments_map_hires_and_clip_skip(mpm):
+    preset = mpm.parse_preset("a portrait\nNegative prompt: blurry\nSteps: 28, Sampler: Euler a, CFG scale: 5.5, Size: 512x768, Hires upscale: 2, Hires upscaler: Latent, Hires steps: 10, Denoising strength: 0.45, Clip skip: 2")
+
+    assert mpm.preset_processing_arguments(preset) == {
+        "prompt": "a portrait",
+        "negative_prompt": "blurry",
+        "seed": -1,
+        "steps": 28,
+        "sampler_name": "Euler a",
+        "cfg_scale": 5.5,
+        "width": 512,
+        "height": 768,
+        "enable_hr": True,
+        "hr_scale": 2.0,
+        "hr_upscaler": "Latent",
+        "hr_second_pass_steps": 10,
+        "denoising_strength": 0.45,
+        "override_settings": {"CLIP_stop_at_last_layers": 2},
+    }
+
+
+def test_preset_processing_arguments_default_hires_steps_and_denoising(mpm):
+    arguments = mpm.preset_processing_arguments(mpm.parse_preset("a landscape\nSteps: 20, Seed: 7, Hires upscale: 1.5"))
+
+    assert (arguments["seed"], arguments["hr_scale"], arguments["hr_upscaler"], arguments["hr_second_pass_steps"], arguments["denoising_strength"]) == (7, 1.5, None, 0, 0.7)
+    assert "override_settings" not in arguments
+    assert "sampler_name" not in arguments and "width" not in arguments
@@ -0,0 +1,104 @@
+import gzip
+import json
+import os
+
+import pytest
+
+
+def model_info_with_presets(mpm, url, presets):
+    model_info = mpm.empty_model_info()
+    model_info["url"] = url
+    model_info["trigger_words"] = ["examplestyle"]
+    model_info["presets"].update(presets)
+    return model_info
+
+
+@pytest.fixture
+def library(mpm):
+    portrait_model_info = model_info_with_presets(mpm, "https://civitai.com/models/1", {"portrait": "a portrait\nSteps: 28, Sampler: Euler a, CFG scale: 5, Size: 512x768"})
+    landscape_model_info = model_info_with_presets(mpm, "https://civitai.com/models/2", {"landscape": "a landscape\nSteps: 20, Sampler: DDIM, CFG scale: 7, Size: 768x512"})
+    mpm.model_info_store.save("0123456789", portrait_model_info)
+    mpm.model_info_store.save("9876543210", landscape_model_info)
+    return {"0123456789": portrait_model_info, "9876543210": landscape_model_info}
+
+
+def remove_presets_files(mpm, short_hashes):
+    for short_hash in short_hashes:
+        os.remove(mpm.get_model_info_file_path(short_hash))
+    mpm.model_info_store.invalidate()
+
+
+def write_bundle(path, lines):
+    with gzip.open(path, "wt", encoding="utf-8") as file:
+        for line in lines:
+            file.write(line if isinstance(line, str) else json.dumps(line))
+            file.write("\n")
+    return str(path)
+
+
+def test_export_then_import_round_trips(mpm, library):
+    bundle_path, summary = mpm.export_preset_library("")
+    assert summary == "2 models exported"
+    remove_presets_files(mpm, library)
+
+    assert mpm.import_preset_library(bundle_path, "merge").startswith("2 imported, 0 merged, 0 skipped, 0 invalid")
+    for short_hash, model_info in library.items():
+        assert mpm.model_info_store.get(short_hash, False) == model_info
+
+
+def test_export_can_be_filtered_by_a_search_query(mpm, library):
+    bundle_path, summary = mpm.export_preset_library("sampler:ddim")
+
+    assert summary == "1 models exported"
+    assert [short_hash for short_hash, model_info in mpm.iter_preset_library_bundle(bundle_path)] == ["9876543210"]
+
+
+def test_exports_reuse_one_directory(mpm, library):
+    first_bundle_path, summary = mpm.export_preset_library("")
+    second_bundle_path, summary = mpm.export_preset_library("sampler:ddim")
+
+    assert os.path.dirname(first_bundle_path) == os.path.dirname(second_bundle_path) == mpm.get_library_export_directory()
+    assert os.listdir(mpm.get_library_export_directory()) == [os.path.basename(second_bundle_path)]
+
+
+@pytest.mark.parametrize("conflict_mode, expected_counts, expected_presets", [
+    ("merge", "1 imported, 1 merged, 0 skipped", {"default": "", "portrait": "a local portrait", "portrait (imported)": "a shared portrait", "closeup": "a closeup"}),
+    ("skip", "1 imported, 0 merged, 1 skipped", {"default": "", "portrait": "a local portrait"}),
+    ("overwrite", "2 imported, 0 merged, 0 skipped", {"default": "", "portrait": "a shared portrait", "closeup": "a closeup"}),
+])
+def test_import_resolves_conflicts(mpm, tmp_path, conflict_mode, expected_counts, expected_presets):
+    mpm.model_info_store.save("0123456789", model_info_with_presets(mpm, "", {"portrait": "a local portrait"}))
+    shared_model_info = model_info_with_presets(mpm, "https://civitai.com/models/1", {"portrait": "a shared portrait", "closeup": "a closeup"})
+    new_model_info = model_info_with_presets(mpm, "https://civitai.com/models/2", {"landscape": "a landscape"})
+    bundle_path = write_bundle(tmp_path / "bundle.ndjson.gz", [{"short_hash": "0123456789", "model_info": shared_model_info}, {"short_hash": "9876543210", "model_info": new_model_info}])
+
+    assert mpm.import_preset_library(bundle_path, conflict_mode).startswith(f"{expected_counts}, 0 invalid")
+    assert mpm.model_info_store.get("0123456789")["presets"] == expected_presets
+    assert mpm.model_info_store.get("9876543210") == new_model_info
+
+
+def test_import_counts_invalid_lines_and_keeps_going(mpm, tmp_path):
+    valid_model_info = model_info_with_presets(mpm, "https://civitai.com/models/1", {"portrait": "a portrait"})
+    bundle_path = write_bundle(tmp_path / "bundle.ndjson.gz", [
+        "{not json",
+        {"model_info": valid_model_info},
+        {"short_hash": "5555555555", "model_info": {"presets": {}}},
+        "",
+        {"short_hash": "0123456789", "model_info": valid_model_info},
+    ])
+
+    assert mpm.import_preset_library(bundle_path, "merge").startswith("1 imported, 0 merged, 0 skipped, 3 invalid")
+    assert mpm.model_info_store.get("0123456789", False) == valid_model_info
+    assert not os.path.exists(mpm.get_model_info_file_path("5555555555"))
+
+
+def test_import_into_sqlite_storage(mpm, library, tmp_path):
+    from modules import shared
+
+    bundle_path, summary = mpm.export_preset_library("")
+    shared.opts.data["model_preset_manager_storage"] = "sqlite"
+    try:
+        assert mpm.import_preset_library(bundle_path, "merge").startswith("2 imported")
+        assert mpm.get_sqlite_model_info_store().get("9876543210", False) == library["9876543210"]
+    finally:
+        mpm.get_sqlite_model_info_store().connection.close()
@@ -0,0 +1,61 @@
+import threading
+
+
+def save(mpm, short_hash, presets=None, trigger_words=(), url=""):
+    model_info = mpm.empty_model_info()
+    model_info["url"] = url
+    model_info["trigger_words"] = list(trigger_words)
+    model_info["presets"].update(presets or {})
+    mpm.save_model_info(short_hash, model_info)
+    return model_info
+
+
+def test_field_and_text_search(mpm):
+    save(mpm, "0123456789", {"portrait": "a portrait\nSteps: 30, Sampler: Euler a, CFG scale: 7.0, Size: 512x768"})
+    save(mpm, "9876543210", {"landscape": "a landscape\nSteps: 20, Sampler: Euler a, CFG scale: 5, Size: 768x512"})
+
+    assert mpm.preset_search_index.search('sampler:"euler a"')[0] == 2
+    assert [result[:2] for result in mpm.preset_search_index.search("cfg:7 portrait")[1]] == [("0123456789", "portrait")]
+    assert mpm.preset_search_index.search("steps:25")[0] == 0
+
+
+def test_trigger_words_are_indexed_per_model(mpm):
+    save(mpm, "0123456789", trigger_words=["lonely"], url="https://example.com/1")
+    save(mpm, "9876543210", {"rain": "rainy city\nSteps: 20"}, trigger_words=["lonely", "neon"])
+
+    total, results = mpm.preset_search_index.search("trigger:lonely")
+    assert total == 2
+    assert results == [("0123456789", "default", "https://example.com/1", ""), ("9876543210", "rain", "", "rainy city\nSteps: 20")]
+    assert mpm.preset_search_index.search_model_hashes("trigger:neon") == ["9876543210"]
+    assert mpm.preset_search_index.search_model_hashes("trigger:lonely steps:20") == ["9876543210"]
+
+
+def test_updates_replace_a_models_documents(mpm):
+    mpm.preset_search_index.build()
+    save(mpm, "0123456789", trigger_words=["lonely"])
+    assert mpm.preset_search_index.search_model_hashes("trigger:lonely") == ["0123456789"]
+
+    # Once a real preset is saved the placeholder default document goes away
+    save(mpm, "0123456789", {"rain": "rainy city"}, trigger_words=["lonely"])
+    assert [result[1] for result in mpm.preset_search_index.search("trigger:lonely")[1]] == ["rain"]
+
+    save(mpm, "0123456789", {"rain": "rainy city"})
+    assert mpm.preset_search_index.search("trigger:lonely")[0] == 0
+
+
+def test_build_keeps_its_lock_and_skips_the_store_cache(mpm):
+    for i in range(20):
+        save(mpm, f"{i:010d}", {"preset": f"prompt {i}"}, trigger_words=[f"word{i}"])
+    mpm.model_info_store.invalidate()
+    lock = mpm.preset_search_index.lock
+
+    threads = [threading.Thread(target=mpm.preset_search_index.build) for _ in range(4)]
+    threads += [threading.Thread(target=mpm.preset_search_index.search, args=("prompt",)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert mpm.preset_search_index.lock is lock
+    assert mpm.preset_search_index.search("prompt")[0] == 20
+    assert mpm.model_info_store.entries == {}
@@ -0,0 +1,32 @@
+import pytest
+
+
+def test_parsed_presets_are_read_only(mpm):
+    preset = mpm.parse_preset("a portrait\nNegative prompt: blurry\nSteps: 30, Sampler: DPM++ 2M, CFG scale: 5.5, Size: 512x768, Clip skip: 2")
+
+    assert preset.prompt == "a portrait"
+    assert preset.negative_prompt == "blurry"
+    assert dict(preset.parameters) == {"Steps": "30", "Sampler": "DPM++ 2M", "CFG scale": "5.5", "Size": "512x768", "Clip skip": "2"}
+    assert (preset.steps, preset.cfg_scale, preset.width, preset.height) == (30, 5.5, 512, 768)
+    # parse_preset hands the same instance to every caller, so nobody may change it
+    assert mpm.parse_preset(preset.text) is preset
+    with pytest.raises(TypeError):
+        preset.parameters["Steps"] = "10"
+
+
+def test_multi_line_prompts_stop_at_the_last_parameters_line(mpm):
+    preset = mpm.parse_preset("a portrait,\nSteps: in the background\nNegative prompt: blurry,\nlowres\nSteps: 20, Sampler: Euler a, Size: 640x480")
+
+    assert preset.prompt == "a portrait,\nSteps: in the background"
+    assert preset.negative_prompt == "blurry,\nlowres"
+    assert preset.summary() == "Steps 20, Euler a, 640x480"
+
+
+def test_presets_without_parameters(mpm):
+    preset = mpm.parse_preset("just a prompt")
+
+    assert (preset.prompt, preset.negative_prompt) == ("just a prompt", "")
+    assert dict(preset.parameters) == {}
+    assert (preset.steps, preset.sampler, preset.cfg_scale, preset.size()) == (None, None, None, None)
+    assert preset.summary() == ""
+    assert mpm.parse_preset(None).text == ""
@@ -0,0 +1,82 @@
+import hashlib
+import json
+import os
+
+from helpers import write_checkpoint
+
+
+def save_model_info(mpm, short_hash, **changes):
+    model_info = mpm.empty_model_info()
+    model_info.update(changes)
+    mpm.save_model_info(short_hash, model_info)
+    return model_info
+
+
+def test_prefetched_model_sees_external_rewrites(mpm, tmp_path):
+    from modules import shared
+
+    data = b"prefetched checkpoint"
+    short_hash = hashlib.sha256(data).hexdigest()[:10]
+    write_checkpoint(str(tmp_path), "model.safetensors", data)
+    mpm.model_registry.refresh()
+    shared.opts.data["sd_model_checkpoint"] = "model.safetensors"
+    save_model_info(mpm, short_hash, url="https://example.com/before")
+    mpm.model_info_prefetcher.prefetch("model.safetensors").result()
+
+    # Another WebUI instance, an import or a hand edit rewrites the presets file after the prefetch
+    model_info = mpm.empty_model_info()
+    model_info.update(url="https://example.com/after", trigger_words=["after"])
+    with open(mpm.get_model_info_file_path(short_hash), "w") as file:
+        json.dump(model_info, file, indent=2)
+
+    assert next(mpm.retrieve_model_info_from_disk(None))[1] == "https://example.com/after"
+    assert mpm.show_local_model_info()[1] == "https://example.com/after"
+    assert mpm.model_info_prefetcher.get("model.safetensors") == (short_hash, None)
+
+
+def test_deleted_presets_are_not_served_from_the_prefetcher(mpm, tmp_path):
+    from modules import shared
+
+    shared.opts.data["sd_model_checkpoint"] = "model.safetensors [0123456789]"
+    save_model_info(mpm, "0123456789", url="https://example.com/model", presets={"default": "", "portrait": "a portrait"})
+    mpm.model_info_prefetcher.prefetch("model.safetensors [0123456789]").result()
+
+    mpm.model_info_store.delete("0123456789")
+    outputs = mpm.show_local_model_info()
+
+    assert outputs[1] == ""
+    assert outputs[5]["choices"] == ["default"]
+
+
+def test_show_local_model_info_never_hashes_or_downloads(mpm, civitai, tmp_path):
+    from modules import shared
+
+    data = b"never hashed"
+    civitai.add_model(hashlib.sha256(data).hexdigest()[:10], 1)
+    write_checkpoint(str(tmp_path), "unknown.safetensors", data)
+    mpm.model_registry.refresh()
+    shared.opts.data["sd_model_checkpoint"] = "unknown.safetensors"
+
+    outputs = mpm.show_local_model_info()
+
+    assert outputs[0] == "unknown.safetensors"
+    assert outputs[7] == ""
+    assert mpm.hash_jobs == {}
+    assert mpm.load_hash_cache() == {}
+    assert civitai.requests == []
+    assert os.listdir(os.path.dirname(mpm.__file__)) == ["main.py"]
+
+
+def test_show_local_model_info_renders_a_known_model_without_a_url(mpm, civitai):
+    from modules import shared
+
+    shared.opts.data["sd_model_checkpoint"] = "model.safetensors [0123456789]"
+    save_model_info(mpm, "0123456789", trigger_words=["lonely"], presets={"default": "a lonely road"})
+
+    outputs = mpm.show_local_model_info()
+
+    assert outputs[1] == ""
+    assert outputs[3]["value"] == "a lonely road"
+    assert outputs[4]["choices"] == ["lonely"]
+    assert outputs[7] == "0123456789"
+    assert civitai.requests == []
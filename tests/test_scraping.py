@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+FIXTURES_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+EXPECTED_PRESETS = {"default": "", "portrait": "examplestyle, portrait of a woman\nNegative prompt: blurry\nSteps: 28, Sampler: DPM++ 2M Karras, CFG scale: 5, Size: 512x768, Clip skip: 2"}
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES_DIRECTORY, name), "rb") as file:
+        return file.read()
+
+
+def split_into_chunks(data, chunk_size):
+    return [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+
+
+@pytest.mark.parametrize("fixture_name", ["model_page.html", "model_page_escaped.html", "model_page_brace_decoy.html"])
+@pytest.mark.parametrize("chunk_size", [1, 7, 1000, 64 * 1024])
+def test_presets_are_found_at_any_chunking(mpm, fixture_name, chunk_size):
+    model_presets = mpm.extract_model_presets_from_chunks(split_into_chunks(read_fixture(fixture_name), chunk_size))
+
+    assert model_presets["default_preset"] == "portrait"
+    assert model_presets["presets"] == EXPECTED_PRESETS
+
+
+def test_decoded_candidate_is_bounded_by_its_braces(mpm):
+    # The brace scan ends the first candidate inside the string, at {"a": "}; decoding past that end
+    # would return {'a': '}'} whenever the rest of the object happened to have arrived already
+    text = '{"a": "}"} {"url": "", "default_preset": "default", "trigger_words": [], "presets": {"default": ""}}'
+    assert mpm.decode_model_presets_candidate(text, 0, text.index("}") + 1) is None
+
+    page = read_fixture("model_page.html").replace(b"<p>###ModelPresets###</p>", b"<p>###ModelPresets###</p>" + text.encode("utf-8"))
+    results = [mpm.extract_model_presets_from_chunks(split_into_chunks(page, chunk_size)) for chunk_size in (1, 1000, len(page))]
+    assert results[0] == results[1] == results[2] == {"url": "", "default_preset": "default", "trigger_words": [], "presets": {"default": ""}}
+
+
+def test_page_without_presets(mpm):
+    page = read_fixture("model_page.html").replace(b"###ModelPresets###", b"")
+    assert mpm.extract_model_presets_from_chunks(split_into_chunks(page, 1000)) is None
+
+
+def test_multibyte_characters_split_across_chunks(mpm):
+    page = read_fixture("model_page.html").replace(b"portrait of a woman", "portrait of a woman, 海辺".encode("utf-8"))
+    model_presets = mpm.extract_model_presets_from_chunks(split_into_chunks(page, 1))
+    assert "海辺" in model_presets["presets"]["portrait"]
+
+
+def test_stops_reading_once_presets_decode(mpm):
+    page = read_fixture("model_page.html")
+    chunks = split_into_chunks(page, 100)
+    consumed = []
+
+    def tracked_chunks():
+        for chunk in chunks:
+            consumed.append(chunk)
+            yield chunk
+
+    assert mpm.extract_model_presets_from_chunks(tracked_chunks()) is not None
+    assert len(consumed) < len(chunks)
+
+
+def test_scrape_over_http(mpm, civitai):
+    model_url = civitai.add("/models/4201", read_fixture("model_page.html"), content_type="text/html", chunk_size=512)
+    assert mpm.get_model_presets_from_civitai_model_url(model_url)["presets"] == EXPECTED_PRESETS
@@ -0,0 +1,124 @@
+import os
+import sqlite3
+
+import pytest
+
+
+@pytest.fixture
+def sqlite_store(mpm):
+    store = mpm.get_sqlite_model_info_store()
+    yield store
+    if store.connection is not None:
+        store.connection.close()
+
+
+def model_info_with_presets(mpm, *names):
+    model_info = mpm.empty_model_info()
+    model_info["trigger_words"] = ["examplestyle"]
+    for name in names:
+        model_info["presets"][name] = f"{name} prompt\nSteps: 20, Sampler: Euler a, CFG scale: 7, Size: 512x768"
+    return model_info
+
+
+def preset_rows(sqlite_store, short_hash):
+    return sqlite_store.connection.execute("SELECT name, position, generation_data FROM presets WHERE short_hash = ? ORDER BY position", (short_hash,)).fetchall()
+
+
+def test_save_then_get_round_trips(mpm, sqlite_store):
+    model_info = model_info_with_presets(mpm, "portrait", "landscape")
+    model_info["extra"] = {"kept": True}
+    sqlite_store.save("0123456789", model_info)
+    sqlite_store.invalidate()
+
+    assert sqlite_store.get("0123456789") == model_info
+    assert sqlite_store.get("9876543210", False) is None
+
+
+def test_editing_one_preset_only_rewrites_its_row(mpm, sqlite_store):
+    model_info = model_info_with_presets(mpm, "default", "portrait", "landscape")
+    sqlite_store.save("0123456789", model_info)
+    rows_before = preset_rows(sqlite_store, "0123456789")
+
+    model_info["presets"]["portrait"] = "a new portrait prompt"
+    changes_before = sqlite_store.connection.total_changes
+    sqlite_store.save("0123456789", model_info)
+
+    # One upsert of the models row plus one UPDATE of the edited preset
+    assert sqlite_store.connection.total_changes - changes_before == 2
+    rows_after = preset_rows(sqlite_store, "0123456789")
+    assert [row[:2] for row in rows_after] == [row[:2] for row in rows_before]
+    assert rows_after[1][2] == "a new portrait prompt"
+
+
+def test_new_presets_are_appended_without_touching_the_rest(mpm, sqlite_store):
+    model_info = model_info_with_presets(mpm, "default", "portrait")
+    sqlite_store.save("0123456789", model_info)
+
+    model_info["presets"]["landscape"] = "a landscape"
+    changes_before = sqlite_store.connection.total_changes
+    sqlite_store.save("0123456789", model_info)
+
+    assert sqlite_store.connection.total_changes - changes_before == 2
+    assert [row[:2] for row in preset_rows(sqlite_store, "0123456789")] == [("default", 0), ("portrait", 1), ("landscape", 2)]
+
+
+def test_reordering_presets_rewrites_their_positions(mpm, sqlite_store):
+    model_info = model_info_with_presets(mpm, "default", "portrait", "landscape")
+    sqlite_store.save("0123456789", model_info)
+
+    model_info["presets"] = dict(reversed(list(model_info["presets"].items())))
+    sqlite_store.save("0123456789", model_info)
+    sqlite_store.invalidate()
+
+    assert [row[:2] for row in preset_rows(sqlite_store, "0123456789")] == [("landscape", 0), ("portrait", 1), ("default", 2)]
+    assert list(sqlite_store.get("0123456789")["presets"]) == ["landscape", "portrait", "default"]
+
+
+def test_writes_from_another_connection_invalidate_the_cache(mpm, sqlite_store):
+    sqlite_store.save("0123456789", model_info_with_presets(mpm, "default"))
+    assert sqlite_store.get("0123456789")["url"] == ""
+    assert sqlite_store.get_counters()["cache_hits"] == 1
+
+    with sqlite3.connect(sqlite_store.database_path) as connection:
+        connection.execute("UPDATE models SET url = ? WHERE short_hash = ?", ("https://example.com/model", "0123456789"))
+    connection.close()
+
+    # PRAGMA data_version moved, so the cached entry is dropped and the row read again
+    assert sqlite_store.get("0123456789")["url"] == "https://example.com/model"
+    assert sqlite_store.get_counters()["disk_reads"] == 1
+
+
+def test_delete_removes_every_row_and_compact_truncates_the_wal(mpm, sqlite_store):
+    sqlite_store.save("0123456789", model_info_with_presets(mpm, "default", "portrait"))
+    sqlite_store.save("9876543210", model_info_with_presets(mpm, "default"))
+
+    sqlite_store.delete("0123456789")
+    assert sqlite_store.get("0123456789", False) is None
+    assert sqlite_store.list_model_hashes() == ["9876543210"]
+    for table in ("models", "presets", "trigger_words"):
+        assert sqlite_store.connection.execute(f"SELECT COUNT(*) FROM {table} WHERE short_hash = ?", ("0123456789",)).fetchone()[0] == 0
+
+    sqlite_store.compact()
+    assert os.path.getsize(f"{sqlite_store.database_path}-wal") == 0
+    assert sqlite_store.get("9876543210")["presets"] == model_info_with_presets(mpm, "default")["presets"]
+
+
+def test_json_presets_import_into_sqlite_and_export_back(mpm, sqlite_store):
+    portrait_model_info = model_info_with_presets(mpm, "default", "portrait")
+    landscape_model_info = model_info_with_presets(mpm, "default", "landscape")
+    mpm.model_info_store.save("0123456789", portrait_model_info)
+    mpm.model_info_store.save("9876543210", landscape_model_info)
+    with open(mpm.get_model_info_file_path("5555555555"), "w") as file:
+        file.write('{"presets": {}}')
+
+    assert mpm.import_json_presets_into_sqlite() == f"2 presets files imported into {mpm.SQLITE_DATABASE_FILE_NAME}"
+    assert sqlite_store.list_model_hashes() == ["0123456789", "9876543210"]
+    assert sqlite_store.get("0123456789") == portrait_model_info
+
+    for short_hash in ("0123456789", "9876543210"):
+        os.remove(mpm.get_model_info_file_path(short_hash))
+    mpm.model_info_store.invalidate()
+
+    assert mpm.export_sqlite_presets_to_json() == "2 models exported to presets files"
+    assert mpm.model_info_store.get("0123456789", False) == portrait_model_info
+    assert mpm.model_info_store.get("9876543210", False) == landscape_model_info
@@ -0,0 +1,36 @@
+import subprocess
+import sys
+
+from helpers import install_extension, stub_environment
+
+IMPORT_TIME_RUNS = 3
+
+
+def measure_import_time_ms(webui_directory, scripts_directory):
+    # Cumulative time python -X importtime reports for main itself, gradio and modules.* stubs included.
+    # Bytecode is allowed so, as in WebUI, only the first run pays for compiling main.py
+    environment = stub_environment(scripts_directory)
+    environment.pop("PYTHONDONTWRITEBYTECODE", None)
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=webui_directory, env=environment, capture_output=True, text=True, timeout=60, check=True)
+    for line in completed.stderr.splitlines():
+        fields = line.split("|")
+        if line.startswith("import time:") and len(fields) == 3 and fields[2].strip() == "main":
+            return int(fields[1]) / 1000
+    raise AssertionError(f"main not found in importtime output:\n{completed.stderr}")
+
+
+def test_import_time_is_within_budget(mpm, tmp_path):
+    scripts_directory = install_extension(str(tmp_path))
+    measure_import_time_ms(str(tmp_path), scripts_directory)
+    # Best of several warm runs, so a busy machine does not fail the check
+    import_time_ms = min(measure_import_time_ms(str(tmp_path), scripts_directory) for _ in range(IMPORT_TIME_RUNS))
+    assert import_time_ms < mpm.IMPORT_TIME_BUDGET_MS
+
+
+def test_on_ui_tabs_is_timed(mpm):
+    mpm.diagnostics.enabled = True
+    tabs = mpm.timed_on_ui_tabs()
+
+    assert [tab[1] for tab in tabs] == ["Model Preset Manager"]
+    assert 0 < mpm.startup_timings["on_ui_tabs_ms"] < mpm.UI_BUILD_TIME_BUDGET_MS
+    assert mpm.get_diagnostics_report()["timings_ms"]["on_ui_tabs"]["count"] == 1
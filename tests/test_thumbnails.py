@@ -0,0 +1,132 @@
+import os
+
+import numpy as np
+from PIL import Image
+
+from helpers import png_bytes, write_checkpoint
+
+
+def test_download_thumbnail_resizes_and_writes_atomically(mpm, civitai):
+    image_url = civitai.add("/images/1.png", png_bytes(), content_type="image/png")
+    mpm.download_thumbnail(image_url, "model")
+
+    thumbnail_path = mpm.get_thumbnail_path("model")
+    with Image.open(thumbnail_path) as img:
+        assert max(img.size) == 300
+    assert [name for name in os.listdir(os.path.dirname(thumbnail_path)) if name.endswith((".tmp", ".download"))] == []
+
+    # An existing thumbnail is never downloaded again
+    mpm.download_thumbnail(image_url, "model")
+    assert civitai.request_count("/images/1.png") == 1
+
+
+def test_saving_the_rendered_thumbnail_is_a_no_op(mpm):
+    image = np.zeros((300, 200, 3), dtype=np.uint8)
+    image[:, :, 1] = 255
+    mpm.write_thumbnail_from_np_array(image, mpm.get_thumbnail_path("model"))
+    mtime_ns = os.stat(mpm.get_thumbnail_path("model")).st_mtime_ns
+
+    mpm.save_thumbnail_from_np_array("model.safetensors [0123456789]", image)
+    assert mpm.thumbnail_futures == {}
+    assert os.stat(mpm.get_thumbnail_path("model")).st_mtime_ns == mtime_ns
+
+
+def test_get_model_thumbnail_queues_download_once(mpm, civitai):
+    image_url = civitai.add("/images/2.png", png_bytes(), content_type="image/png", delay=0.2)
+
+    assert mpm.get_model_thumbnail(image_url, "0123456789", False, "model") is None
+    assert mpm.get_model_thumbnail(image_url, "0123456789", False, "model") is None
+    mpm.thumbnail_futures[mpm.get_thumbnail_path("model")].result()
+
+    assert mpm.get_model_thumbnail(image_url, "0123456789", True, "model") == mpm.get_thumbnail_path("model")
+    assert civitai.request_count("/images/2.png") == 1
+
+
+def test_maintenance_only_removes_thumbnails_it_wrote(mpm, tmp_path):
+    write_checkpoint(str(tmp_path), "kept.safetensors", b"kept")
+    mpm.model_registry.refresh()
+    image = np.zeros((64, 64, 3), dtype=np.uint8)
+    for model_name in ("kept", "deleted"):
+        mpm.write_thumbnail_from_np_array(image, mpm.get_thumbnail_path(model_name))
+    user_png_path = os.path.join(mpm.CHECKPOINT_DIRECTORY, "my reference sheet.png")
+    with open(user_png_path, "wb") as file:
+        file.write(png_bytes())
+
+    assert mpm.list_stale_thumbnails() == [os.path.abspath(mpm.get_thumbnail_path("deleted"))]
+    assert "1 stale thumbnails" in mpm.run_library_maintenance(True, False, False)
+
+    assert os.path.exists(user_png_path)
+    assert os.path.exists(mpm.get_thumbnail_path("kept"))
+    assert not os.path.exists(mpm.get_thumbnail_path("deleted"))
+    assert mpm.load_thumbnail_manifest() == {os.path.abspath(mpm.get_thumbnail_path("kept"))}
+
+
+def gallery_models(mpm, tmp_path, thumbnails):
+    # Registers one hashed checkpoint with presets per (name, PNG bytes) pair and writes its thumbnail
+    for name, thumbnail in thumbnails:
+        write_checkpoint(str(tmp_path), f"{name}.safetensors", name.encode("utf-8"))
+    mpm.model_registry.refresh()
+    for name, thumbnail in thumbnails:
+        short_hash = mpm.get_short_hash_from_filename(f"{name}.safetensors")
+        model_info = mpm.empty_model_info()
+        model_info["presets"]["default"] = f"{name} prompt"
+        mpm.model_info_store.save(short_hash, model_info)
+        with open(mpm.get_thumbnail_path(name), "wb") as file:
+            file.write(thumbnail)
+
+
+def count_webp_encodes(monkeypatch, cache):
+    encoded_paths = []
+    write_webp = cache.write_webp
+    monkeypatch.setattr(cache, "write_webp", lambda img, webp_path: (encoded_paths.append(webp_path), write_webp(img, webp_path)))
+    return encoded_paths
+
+
+def test_gallery_encodes_each_digest_once(mpm, tmp_path, monkeypatch):
+    gallery_models(mpm, tmp_path, [("a", png_bytes(color=(200, 40, 40))), ("b", png_bytes(color=(200, 40, 40))), ("c", png_bytes(color=(40, 200, 40)))])
+    encoded_paths = count_webp_encodes(monkeypatch, mpm.gallery_thumbnail_cache)
+
+    gallery_items, page, status, page_entries = mpm.load_gallery_page(1)
+
+    # a and b share one PNG, so they share one WebP
+    assert len(encoded_paths) == 2
+    assert [os.path.basename(item[0]) for item in gallery_items].count(os.path.basename(gallery_items[0][0])) == 2
+    assert status == "page 1 of 1, 3 models with presets"
+    mpm.load_gallery_page(1)
+    assert len(encoded_paths) == 2
+    with Image.open(gallery_items[2][0]) as img:
+        assert img.format == "WEBP"
+        assert max(img.size) == max(mpm.GALLERY_THUMBNAIL_SIZE)
+
+
+def test_warm_gallery_page_reuses_the_index(mpm, tmp_path, monkeypatch):
+    gallery_models(mpm, tmp_path, [("a", png_bytes(color=(200, 40, 40))), ("b", png_bytes(color=(40, 200, 40)))])
+    cold_items = mpm.load_gallery_page(1)[0]
+    assert os.path.exists(mpm.gallery_thumbnail_cache.index_path)
+
+    # A restart starts from the saved index: unchanged PNGs cost a stat, not a read or an encode
+    mpm.gallery_thumbnail_cache = mpm.GalleryThumbnailCache(mpm.get_gallery_cache_directory())
+    encoded_paths = count_webp_encodes(monkeypatch, mpm.gallery_thumbnail_cache)
+    mpm.diagnostics.enabled = True
+    mpm.diagnostics.reset()
+
+    assert mpm.load_gallery_page(1)[0] == cold_items
+    assert encoded_paths == []
+    assert mpm.diagnostics.snapshot()["counters"]["bytes_read"] == 0
+
+
+def test_gallery_prune_removes_only_unreferenced_webps(mpm, tmp_path):
+    gallery_models(mpm, tmp_path, [("a", png_bytes(color=(200, 40, 40))), ("b", png_bytes(color=(40, 200, 40)))])
+    gallery_items = mpm.load_gallery_page(1)[0]
+    placeholder_path = mpm.gallery_thumbnail_cache.get_placeholder()
+    stray_webp_path = mpm.gallery_thumbnail_cache.get_webp_path("0" * 32)
+    with open(stray_webp_path, "wb") as file:
+        file.write(b"not referenced")
+    os.remove(mpm.get_thumbnail_path("b"))
+
+    assert mpm.gallery_thumbnail_cache.prune() == 2
+    assert os.path.exists(gallery_items[0][0])
+    assert not os.path.exists(gallery_items[1][0])
+    assert not os.path.exists(stray_webp_path)
+    assert os.path.exists(placeholder_path)
+    assert list(mpm.gallery_thumbnail_cache.load_index()) == [os.path.abspath(mpm.get_thumbnail_path("a"))]
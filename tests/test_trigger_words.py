@@ -0,0 +1,22 @@
+from gradio import SelectData
+
+
+def test_matcher_prefers_longest_and_keeps_nested_words(mpm):
+    matcher = mpm.TriggerWordMatcher(["cat", "cat girl", "(style:1.2)"])
+
+    assert matcher.find_all("a cat girl, (style:1.2)") == {"cat girl", "cat", "(style:1.2)"}
+    assert matcher.find_all("concatenate") == set()
+    assert mpm.TriggerWordMatcher([]).find_all("anything") == set()
+
+
+def test_checked_boxes_follow_prompt(mpm):
+    mpm.triggerWordChoices = ["lonely", "rainy city"]
+
+    assert mpm.handle_text_change("rainy city at night") == ["rainy city"]
+    assert mpm.handle_text_change("lonely, rainy city") == ["lonely", "rainy city"]
+
+
+def test_checkbox_adds_and_removes_words(mpm):
+    prompt = mpm.handle_checkbox_change(SelectData(value="lonely", selected=True), "rainy city")
+    assert prompt == "lonely rainy city"
+    assert mpm.handle_checkbox_change(SelectData(value="lonely", selected=False), prompt) == "rainy city"